@@ -0,0 +1,76 @@
+"""Composite and partial indexes for list and history queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ACTIVE_STATUSES = sa.text("status IN ('new', 'assigned', 'in_progress')")
+
+# (name, table, columns, extra kwargs) — must match __table_args__ in app.models
+_INDEXES = [
+    ("ix_repair_requests_created_at_id", "repair_requests", ["created_at", "id"], {}),
+    (
+        "ix_repair_requests_status_created_at_id",
+        "repair_requests",
+        ["status", "created_at", "id"],
+        {},
+    ),
+    (
+        "ix_repair_requests_master_id_created_at_id",
+        "repair_requests",
+        ["master_id", "created_at", "id"],
+        {},
+    ),
+    (
+        "ix_repair_requests_active_created_at_id",
+        "repair_requests",
+        ["created_at", "id"],
+        {"postgresql_where": _ACTIVE_STATUSES, "sqlite_where": _ACTIVE_STATUSES},
+    ),
+    (
+        "ix_request_audit_events_request_id_created_at",
+        "request_audit_events",
+        ["request_id", "created_at"],
+        {},
+    ),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block; on
+    # Postgres build each index in autocommit so writes are never blocked.
+    # Other dialects ignore the postgresql_* options.
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in _INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _kwargs in reversed(_INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
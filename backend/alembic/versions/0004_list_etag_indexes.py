@@ -0,0 +1,48 @@
+"""Indexes for list ETag validators (count + max(updated_at) per filter)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, columns) on repair_requests — must match __table_args__ in app.models
+_INDEXES = [
+    ("ix_repair_requests_updated_at", ["updated_at"]),
+    ("ix_repair_requests_status_updated_at", ["status", "updated_at"]),
+    ("ix_repair_requests_master_id_updated_at", ["master_id", "updated_at"]),
+]
+
+
+def upgrade() -> None:
+    # Same as 0003: build concurrently outside a transaction on Postgres.
+    with op.get_context().autocommit_block():
+        for name, columns in _INDEXES:
+            op.create_index(
+                name,
+                "repair_requests",
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _columns in reversed(_INDEXES):
+            op.drop_index(
+                name,
+                table_name="repair_requests",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,39 @@
+"""Add request_counters table (per-status and per-master request counts)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_counters",
+        sa.Column("master_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(32), nullable=False),
+        sa.Column("count", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("master_id", "status"),
+    )
+    # Backfill from existing rows; master_id 0 = totals (app.models.ALL_MASTERS).
+    op.execute("""
+        INSERT INTO request_counters (master_id, status, count)
+        SELECT 0, status, count(*) FROM repair_requests GROUP BY status
+        UNION ALL
+        SELECT master_id, status, count(*) FROM repair_requests
+        WHERE master_id IS NOT NULL GROUP BY master_id, status
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("request_counters")
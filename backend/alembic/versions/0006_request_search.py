@@ -0,0 +1,64 @@
+"""Full-text and phone search over repair_requests
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match the search DDL in app.models.request.
+_COLUMNS = [
+    """
+    ALTER TABLE repair_requests ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('russian', coalesce(client_name, '') || ' '
+            || coalesce(description, '') || ' ' || coalesce(address, ''))
+    ) STORED
+    """,
+    """
+    ALTER TABLE repair_requests ADD COLUMN IF NOT EXISTS client_phone_digits varchar(64)
+    GENERATED ALWAYS AS (regexp_replace(client_phone, '\\D', '', 'g')) STORED
+    """,
+]
+_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_repair_requests_search_vector "
+    "ON repair_requests USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+    "ix_repair_requests_client_phone_digits_trgm "
+    "ON repair_requests USING gin (client_phone_digits gin_trgm_ops)",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite gets its FTS5 table from metadata.create_all (tests, local runs).
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Stored generated columns rewrite the table once, under an exclusive lock.
+    for statement in _COLUMNS:
+        op.execute(statement)
+    with op.get_context().autocommit_block():
+        for statement in _INDEXES:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "ix_repair_requests_client_phone_digits_trgm"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_repair_requests_search_vector")
+    op.execute("ALTER TABLE repair_requests DROP COLUMN IF EXISTS client_phone_digits")
+    op.execute("ALTER TABLE repair_requests DROP COLUMN IF EXISTS search_vector")
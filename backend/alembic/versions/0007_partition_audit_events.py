@@ -0,0 +1,158 @@
+"""Partition request_audit_events by month on created_at (PostgreSQL)
+
+The existing table is not copied: it is renamed to request_audit_events_legacy
+and attached as the partition for everything before next month, so the
+migration costs one validating scan plus one index build instead of a
+rewrite, and both run before any exclusive lock is taken. New months get
+their own partitions (created ahead of time by python -m app.audit_retention;
+a DEFAULT partition catches anything else).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_MONTHS_AHEAD = 3
+
+
+def _month(offset: int) -> str:
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}-01 00:00:00+00"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    bound = _month(1)
+    legacy = "request_audit_events_legacy"
+
+    # The slow parts run first, outside the migration transaction, while the
+    # table keeps taking writes: the unique index the new primary key needs
+    # is built CONCURRENTLY, and the CHECK that proves the partition bound is
+    # validated under SHARE UPDATE EXCLUSIVE. The transaction below then only
+    # takes brief locks: ATTACH reuses both instead of building or scanning.
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {legacy}_id_created_at "
+            "ON request_audit_events (id, created_at)"
+        )
+        op.execute(
+            f"ALTER TABLE request_audit_events DROP CONSTRAINT IF EXISTS {legacy}_bound"
+        )
+        op.execute(
+            f"ALTER TABLE request_audit_events ADD CONSTRAINT {legacy}_bound "
+            f"CHECK (created_at < '{bound}') NOT VALID"
+        )
+        op.execute(
+            f"ALTER TABLE request_audit_events VALIDATE CONSTRAINT {legacy}_bound"
+        )
+
+    op.execute(f"ALTER TABLE request_audit_events RENAME TO {legacy}")
+    op.execute(
+        f"ALTER TABLE {legacy} RENAME CONSTRAINT request_audit_events_pkey "
+        f"TO {legacy}_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_request_audit_events_request_id "
+        f"RENAME TO ix_{legacy}_request_id"
+    )
+    op.execute(
+        "ALTER INDEX ix_request_audit_events_request_id_created_at "
+        f"RENAME TO ix_{legacy}_request_id_created_at"
+    )
+    op.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP DEFAULT")
+
+    # The partition key has to be part of the primary key.
+    op.execute("""
+        CREATE TABLE request_audit_events (
+            id integer NOT NULL DEFAULT nextval('request_audit_events_id_seq'),
+            request_id integer NOT NULL REFERENCES repair_requests (id),
+            action varchar(32) NOT NULL,
+            actor_id integer REFERENCES users (id),
+            actor_username varchar(64),
+            old_status varchar(32),
+            new_status varchar(32),
+            created_at timestamp with time zone NOT NULL DEFAULT now(),
+            CONSTRAINT request_audit_events_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """)
+    op.execute(
+        "ALTER SEQUENCE request_audit_events_id_seq OWNED BY request_audit_events.id"
+    )
+    op.execute(
+        "CREATE INDEX ix_request_audit_events_request_id_created_at "
+        "ON request_audit_events (request_id, created_at)"
+    )
+
+    # The validated CHECK proves the bound, so ATTACH skips its own scan; the
+    # unique index built above becomes the partition's primary key index.
+    op.execute(
+        f"ALTER TABLE request_audit_events ATTACH PARTITION {legacy} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{bound}')"
+    )
+    op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {legacy}_bound")
+
+    for offset in range(1, _MONTHS_AHEAD + 1):
+        start, end = _month(offset), _month(offset + 1)
+        op.execute(
+            f"CREATE TABLE request_audit_events_p{start[:4]}{start[5:7]} "
+            "PARTITION OF request_audit_events "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    op.execute(
+        "CREATE TABLE request_audit_events_default "
+        "PARTITION OF request_audit_events DEFAULT"
+    )
+
+
+def downgrade() -> None:
+    # Back to one plain table. Events already archived to disk are not restored.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("ALTER SEQUENCE request_audit_events_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE request_audit_events_plain (
+            id integer NOT NULL DEFAULT nextval('request_audit_events_id_seq'),
+            request_id integer NOT NULL REFERENCES repair_requests (id),
+            action varchar(32) NOT NULL,
+            actor_id integer REFERENCES users (id),
+            actor_username varchar(64),
+            old_status varchar(32),
+            new_status varchar(32),
+            created_at timestamp with time zone NOT NULL DEFAULT now()
+        )
+        """)
+    op.execute(
+        "INSERT INTO request_audit_events_plain "
+        "SELECT id, request_id, action, actor_id, actor_username, old_status, "
+        "new_status, created_at FROM request_audit_events"
+    )
+    op.execute("DROP TABLE request_audit_events")
+    op.execute("ALTER TABLE request_audit_events_plain RENAME TO request_audit_events")
+    op.execute(
+        "ALTER TABLE request_audit_events "
+        "ADD CONSTRAINT request_audit_events_pkey PRIMARY KEY (id)"
+    )
+    op.execute(
+        "CREATE INDEX ix_request_audit_events_request_id "
+        "ON request_audit_events (request_id)"
+    )
+    op.execute(
+        "CREATE INDEX ix_request_audit_events_request_id_created_at "
+        "ON request_audit_events (request_id, created_at)"
+    )
+    op.execute(
+        "ALTER SEQUENCE request_audit_events_id_seq OWNED BY request_audit_events.id"
+    )
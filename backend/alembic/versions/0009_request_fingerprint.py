@@ -0,0 +1,63 @@
+"""Duplicate detection on intake: repair_requests.fingerprint and duplicate_of_id
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match __table_args__ in app.models.request.
+_INDEX = "ix_repair_requests_fingerprint_created_at"
+
+
+def upgrade() -> None:
+    # Nullable columns without defaults: no table rewrite. Existing rows keep
+    # NULL; the duplicate window is minutes, so there is nothing to backfill.
+    op.add_column(
+        "repair_requests", sa.Column("fingerprint", sa.String(64), nullable=True)
+    )
+    op.add_column(
+        "repair_requests",
+        sa.Column(
+            "duplicate_of_id",
+            sa.Integer(),
+            sa.ForeignKey(
+                "repair_requests.id", name="fk_repair_requests_duplicate_of_id"
+            ),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            _INDEX,
+            "repair_requests",
+            ["fingerprint", "created_at"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            _INDEX,
+            table_name="repair_requests",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint(
+        "fk_repair_requests_duplicate_of_id", "repair_requests", type_="foreignkey"
+    )
+    op.drop_column("repair_requests", "duplicate_of_id")
+    op.drop_column("repair_requests", "fingerprint")
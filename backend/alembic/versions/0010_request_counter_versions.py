@@ -0,0 +1,54 @@
+"""List ETags from request_counters.version instead of count/max(updated_at)
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Only served the count/max(updated_at) list ETag (migration 0004).
+_UPDATED_AT_INDEXES = [
+    ("ix_repair_requests_updated_at", ["updated_at"]),
+    ("ix_repair_requests_status_updated_at", ["status", "updated_at"]),
+    ("ix_repair_requests_master_id_updated_at", ["master_id", "updated_at"]),
+]
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite (request_counters is tiny anyway).
+    op.add_column(
+        "request_counters",
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        for name, _columns in _UPDATED_AT_INDEXES:
+            op.drop_index(
+                name,
+                table_name="repair_requests",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in _UPDATED_AT_INDEXES:
+            op.create_index(
+                name,
+                "repair_requests",
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+    op.drop_column("request_counters", "version")
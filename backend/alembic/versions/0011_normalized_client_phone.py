@@ -0,0 +1,124 @@
+"""Phone search by prefix of repair_requests.client_phone_normalized
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match __table_args__ in app.models.request.
+_INDEX = "ix_repair_requests_client_phone_normalized"
+_BATCH = 10000
+
+# app.core.phones.normalize_phone in SQL: digits only, then the +7 / 8 trunk
+# prefix of an 11-digit number dropped.
+_NORMALIZED_SQL = (
+    "regexp_replace(regexp_replace(client_phone, '\\D', '', 'g'), "
+    "'^[78](\\d{10})$', '\\1')"
+)
+
+# Batches of ids, each committed on its own, so no long row locks or one huge
+# transaction. Needs the autocommit block: COMMIT inside DO is only allowed
+# outside a transaction block.
+_POSTGRES_BACKFILL = f"""
+DO $$
+DECLARE
+    last_id integer := 0;
+    max_id integer;
+BEGIN
+    SELECT coalesce(max(id), 0) INTO max_id FROM repair_requests;
+    WHILE last_id < max_id LOOP
+        UPDATE repair_requests SET client_phone_normalized = {_NORMALIZED_SQL}
+        WHERE id > last_id AND id <= last_id + {_BATCH}
+            AND client_phone_normalized IS NULL;
+        last_id := last_id + {_BATCH};
+        COMMIT;
+    END LOOP;
+END $$
+"""
+
+
+def _normalize_phone(phone: str) -> str:
+    # Frozen copy of app.core.phones.normalize_phone for non-Postgres databases.
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits[0] in "78":
+        return digits[1:]
+    return digits
+
+
+def upgrade() -> None:
+    # Nullable without a default: no table rewrite. The app fills the column
+    # on INSERT; existing rows are backfilled below.
+    op.add_column(
+        "repair_requests",
+        sa.Column("client_phone_normalized", sa.String(64), nullable=True),
+    )
+    if op.get_bind().dialect.name != "postgresql":
+        bind = op.get_bind()
+        rows = bind.execute(
+            sa.text("SELECT id, client_phone FROM repair_requests")
+        ).all()
+        if rows:
+            bind.execute(
+                sa.text(
+                    "UPDATE repair_requests SET client_phone_normalized = :phone "
+                    "WHERE id = :id"
+                ),
+                [{"id": id_, "phone": _normalize_phone(phone)} for id_, phone in rows],
+            )
+        op.create_index(_INDEX, "repair_requests", ["client_phone_normalized"])
+        return
+    with op.get_context().autocommit_block():
+        op.execute(_POSTGRES_BACKFILL)
+        op.create_index(
+            _INDEX,
+            "repair_requests",
+            ["client_phone_normalized"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_ops={"client_phone_normalized": "varchar_pattern_ops"},
+        )
+        # Replaced by the prefix index above (migration 0006).
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "ix_repair_requests_client_phone_digits_trgm"
+        )
+    op.execute("ALTER TABLE repair_requests DROP COLUMN IF EXISTS client_phone_digits")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(_INDEX, table_name="repair_requests")
+        op.drop_column("repair_requests", "client_phone_normalized")
+        return
+    # As in migration 0006: the stored generated column rewrites the table.
+    op.execute("""
+        ALTER TABLE repair_requests ADD COLUMN IF NOT EXISTS client_phone_digits
+        varchar(64) GENERATED ALWAYS AS (regexp_replace(client_phone, '\\D', '', 'g'))
+        STORED
+        """)
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_repair_requests_client_phone_digits_trgm "
+            "ON repair_requests USING gin (client_phone_digits gin_trgm_ops)"
+        )
+        op.drop_index(
+            _INDEX,
+            table_name="repair_requests",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+    op.drop_column("repair_requests", "client_phone_normalized")
@@ -4,14 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.deps.auth import get_current_user
+from app.api.routing import InstrumentedRoute
+from app.core.passwords import login_limiter
+from app.deps.auth import CurrentUser
 from app.db import get_db
-from app.models import User
 from app.repositories import UsersRepository
 from app.schemas import Token, UserRead
 from app.services import AuthService
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=InstrumentedRoute)
 
 
 @router.post("/token", response_model=Token)
@@ -19,10 +20,16 @@ async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> Token:
-    """Obtain access token. Safe: same message for invalid user or password."""
+    """Obtain access token. Safe: same message for invalid user or password.
+
+    Password checks are admission-controlled: 503 + Retry-After when overloaded.
+    """
     users_repo = UsersRepository(db)
     auth_service = AuthService(users_repo)
-    user = await auth_service.authenticate_user(form_data.username, form_data.password)
+    async with login_limiter.slot():
+        user = await auth_service.authenticate_user(
+            form_data.username, form_data.password
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,7 +45,7 @@ async def login(
 
 @router.get("/me", response_model=UserRead)
 async def get_me(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: CurrentUser,
 ) -> UserRead:
-    """Get current authenticated user."""
+    """Get current authenticated user (createdAt is omitted for claim-only principals)."""
     return UserRead.model_validate(current_user)
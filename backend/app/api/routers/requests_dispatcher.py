@@ -1,31 +1,232 @@
-from typing import Annotated, Optional
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Annotated, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import InstrumentedRoute
+from app.core.broker import get_broker
+from app.core.errors import DomainError
+from app.core.etag import etag_matches, not_modified, set_etag
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import JSONBytesResponse
+from app.core.settings import settings
 from app.deps.auth import DispatcherUser
+from app.deps.db import ReadDB
 from app.db import get_db
-from app.repositories import AuditRepository, RequestsRepository
-from app.schemas import RequestAssign, RequestRead
-from app.services import RequestsService
+from app.repositories import (
+    AuditRepository,
+    ChangeFeed,
+    CountersRepository,
+    RequestFilter,
+    RequestsRepository,
+)
+from app.schemas import (
+    AuditEventRead,
+    BulkRequest,
+    BulkResult,
+    RequestAssign,
+    RequestDetail,
+    RequestRead,
+    RequestStats,
+    dump_request_list,
+)
+from app.services import ExportService, RequestsService
+from app.services.export import encode_chunks
 
-router = APIRouter(prefix="/requests", tags=["requests-dispatcher"])
+router = APIRouter(
+    prefix="/requests", tags=["requests-dispatcher"], route_class=InstrumentedRoute
+)
+
+# Upper bound of ids per GET /requests/history call.
+MAX_HISTORY_IDS = 100
 
 
 def _requests_service(db: AsyncSession) -> RequestsService:
-    return RequestsService(RequestsRepository(db), AuditRepository(db))
+    return RequestsService(
+        RequestsRepository(db),
+        AuditRepository(db),
+        ChangeFeed(db),
+        CountersRepository(db),
+    )
 
 
 @router.get("", response_model=list[RequestRead])
 async def list_requests(
+    current_user: DispatcherUser,
+    db: ReadDB,
+    status: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
+    cursor: Annotated[Optional[str], Query(max_length=128)] = None,
+    q: Annotated[Optional[str], Query(max_length=200)] = None,
+    phone: Annotated[Optional[str], Query(max_length=64)] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """List requests with optional status filter and search. Dispatcher only.
+
+    q: words (or word beginnings) from client name, problem text or address;
+    phone: beginning of the client phone; formatting and +7 / 8 ignored.
+    Opt-in keyset pagination: pass limit (and cursor from the previous page);
+    the next page cursor is returned in the X-Next-Cursor header.
+    Conditional: 304 when If-None-Match still matches the list's ETag.
+    """
+    service = _requests_service(db)
+    etag = await service.list_etag(
+        status=status, limit=limit, cursor=cursor, q=q, phone=phone
+    )
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    requests, next_cursor = await service.list_requests_page(
+        status=status, limit=limit, cursor=cursor, q=q, phone=phone
+    )
+    response = JSONBytesResponse(dump_request_list(requests))
+    if etag is not None:
+        set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@router.get("/stats", response_model=RequestStats)
+async def get_request_stats(
+    current_user: DispatcherUser,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> RequestStats:
+    """Request counts per status and per master. Dispatcher only.
+
+    Read from the counters table (one row per master and status), not by
+    counting requests, so the cost does not grow with the number of requests.
+    """
+    return await _requests_service(db).get_stats()
+
+
+async def _change_events() -> AsyncIterator[str]:
+    async with get_broker().subscribe() as subscription:
+        # First frame: the client is subscribed and may (re)load the list now.
+        yield "retry: 3000\n\n"
+        while True:
+            message = await subscription.get(settings.CHANGES_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": ping\n\n"
+            else:
+                yield f"event: change\ndata: {message}\n\n"
+
+
+@router.get("/stream")
+async def stream_changes(
+    current_user: DispatcherUser,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> StreamingResponse:
+    """Server-Sent Events feed of committed request changes. Dispatcher only.
+
+    Each "change" event is {"type": "created" | "updated", "request": RequestRead};
+    {"type": "resync"} means events were missed and the list must be refetched.
+    """
+    # The stream outlives the handler: release the auth lookup's connection now.
+    await db.close()
+    return StreamingResponse(
+        _change_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_requests(
     current_user: DispatcherUser,
     db: Annotated[AsyncSession, Depends(get_db)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = (
+        "ndjson"
+    ),
+    gzip: Annotated[bool, Query()] = False,
     status: Annotated[Optional[str], Query()] = None,
-) -> list[RequestRead]:
-    """List requests with optional status filter. Dispatcher only."""
+    created_from: Annotated[Optional[datetime], Query()] = None,
+    created_to: Annotated[Optional[datetime], Query()] = None,
+) -> StreamingResponse:
+    """Export requests with their audit trail as NDJSON or CSV. Dispatcher only.
+
+    Rows are streamed from a server-side cursor as they are read, so memory
+    stays flat for any size; created_from/created_to select e.g. one month.
+    """
+    filter_ = RequestFilter(
+        status=status, created_from=created_from, created_to=created_to
+    )
+    service = ExportService(RequestsRepository(db))
+    if export_format == "ndjson":
+        lines = service.ndjson_lines(filter_)
+        media_type = "application/x-ndjson"
+    else:
+        lines = service.csv_lines(filter_)
+        media_type = "text/csv; charset=utf-8"
+    filename = f"requests.{export_format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        encode_chunks(lines, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_update_requests(
+    body: BulkRequest,
+    current_user: DispatcherUser,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> BulkResult:
+    """Assign / cancel up to 500 requests in one transaction. Dispatcher only.
+
+    Always 200: each item gets {"ok": true, "request": ...} or {"ok": false,
+    "code", "message"} with the same codes as the single-request endpoints.
+    """
     service = _requests_service(db)
-    requests = await service.list_requests(status=status)
-    return [RequestRead.model_validate(r) for r in requests]
+    results = await service.apply_bulk(
+        body.items,
+        actor_id=current_user.id,
+        actor_username=current_user.username,
+    )
+    return BulkResult(results=results)
+
+
+@router.get("/history", response_model=dict[int, list[AuditEventRead]])
+async def get_requests_history(
+    current_user: DispatcherUser,
+    db: ReadDB,
+    ids: Annotated[str, Query(pattern=r"^\d+(,\d+)*$", max_length=2000)],
+) -> dict[int, list[AuditEventRead]]:
+    """Audit history of several requests in one query. Dispatcher only.
+
+    ids=1,2,3 (up to 100) -> {"1": [...], "2": [...], "3": []}; unknown ids get [].
+    """
+    request_ids = list(dict.fromkeys(int(part) for part in ids.split(",")))
+    if len(request_ids) > MAX_HISTORY_IDS:
+        raise DomainError(
+            400, "too_many_ids", f"Не больше {MAX_HISTORY_IDS} заявок за запрос"
+        )
+    return await _requests_service(db).get_histories(request_ids)
+
+
+@router.get(
+    "/{request_id}", response_model=RequestDetail, response_model_exclude_unset=True
+)
+async def get_request_detail(
+    request_id: int,
+    current_user: DispatcherUser,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    include: Annotated[
+        Optional[str], Query(pattern=r"^(history|master)(,(history|master))*$")
+    ] = None,
+) -> RequestDetail:
+    """One request. Dispatcher only.
+
+    include=history,master embeds the audit trail and the assigned master;
+    served by one joined SELECT plus one SELECT ... IN for the history.
+    """
+    parts = set(include.split(",")) if include else set()
+    return await _requests_service(db).get_request_detail(request_id, include=parts)
 
 
 @router.patch("/{request_id}/assign", response_model=RequestRead)
@@ -43,7 +244,6 @@ async def assign_request(
         actor_id=current_user.id,
         actor_username=current_user.username,
     )
-    await db.refresh(req, attribute_names=["master"])
     return RequestRead.model_validate(req)
 
 
@@ -60,30 +260,29 @@ async def cancel_request(
         actor_id=current_user.id,
         actor_username=current_user.username,
     )
-    await db.refresh(req, attribute_names=["master"])
     return RequestRead.model_validate(req)
 
 
-@router.get("/{request_id}/history")
+@router.get("/{request_id}/history", response_model=list[AuditEventRead])
 async def get_request_history(
     request_id: int,
     current_user: DispatcherUser,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: ReadDB,
+    response: Response,
+    archived: Annotated[bool, Query()] = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    """Get audit history for a request. Dispatcher only."""
+    """Get audit history for a request. Dispatcher only. Conditional like /requests.
+
+    archived=true also returns events already moved to the audit archive.
+    """
     service = _requests_service(db)
+    etag = await service.history_etag(request_id, include_archived=archived)
+    if etag is not None:
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
     req = await service.get_request(request_id)
     if not req:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
-    events = await service.get_request_history(request_id)
-    return [
-        {
-            "id": e.id,
-            "action": e.action,
-            "actorUsername": e.actor_username,
-            "oldStatus": e.old_status,
-            "newStatus": e.new_status,
-            "createdAt": e.created_at.isoformat(),
-        }
-        for e in events
-    ]
+    return await service.get_request_history(request_id, include_archived=archived)
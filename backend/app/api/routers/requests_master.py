@@ -1,30 +1,86 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import InstrumentedRoute
+from app.core.etag import etag_matches, not_modified, set_etag
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import IDEMPOTENT_REPLAYED_HEADER, JSONBytesResponse
 from app.deps.auth import MasterUser
+from app.deps.db import ReadDB
 from app.db import get_db
-from app.repositories import AuditRepository, RequestsRepository
-from app.schemas import RequestRead
-from app.services import RequestsService
+from app.repositories import (
+    AuditRepository,
+    ChangeFeed,
+    CountersRepository,
+    IdempotencyRepository,
+    RequestsRepository,
+)
+from app.schemas import AuditEventRead, RequestRead, dump_request_list
+from app.services import IdempotencyService, RequestsService
+from app.services.idempotency import fingerprint
 
-router = APIRouter(tags=["requests-master"])
+router = APIRouter(tags=["requests-master"], route_class=InstrumentedRoute)
 
 
 def _requests_service(db: AsyncSession) -> RequestsService:
-    return RequestsService(RequestsRepository(db), AuditRepository(db))
+    return RequestsService(
+        RequestsRepository(db),
+        AuditRepository(db),
+        ChangeFeed(db),
+        CountersRepository(db),
+    )
 
 
 @router.get("/master/requests", response_model=list[RequestRead])
 async def list_my_requests(
+    current_user: MasterUser,
+    db: ReadDB,
+    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
+    cursor: Annotated[Optional[str], Query(max_length=128)] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """List requests assigned to current master. Same pagination and ETag as /requests."""
+    service = _requests_service(db)
+    etag = await service.list_etag(
+        master_id=current_user.id, limit=limit, cursor=cursor
+    )
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    requests, next_cursor = await service.list_requests_page(
+        master_id=current_user.id, limit=limit, cursor=cursor
+    )
+    response = JSONBytesResponse(dump_request_list(requests))
+    if etag is not None:
+        set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@router.post(
+    "/master/requests/claim-next",
+    response_model=RequestRead,
+    responses={204: {"description": "No unassigned requests"}},
+)
+async def claim_next_request(
     current_user: MasterUser,
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> list[RequestRead]:
-    """List requests assigned to current master."""
+) -> Response:
+    """Take the oldest new request in work. 204 when the queue is empty.
+
+    Concurrent masters each get a different request: no 409 and no retries.
+    """
     service = _requests_service(db)
-    requests = await service.list_for_master(current_user.id)
-    return [RequestRead.model_validate(r) for r in requests]
+    req = await service.claim_next(
+        current_user.id, actor_username=current_user.username
+    )
+    if req is None:
+        return Response(status_code=204)
+    return JSONBytesResponse(
+        RequestRead.model_validate(req).model_dump_json(by_alias=True)
+    )
 
 
 @router.patch("/requests/{request_id}/take", response_model=RequestRead)
@@ -32,16 +88,30 @@ async def take_request(
     request_id: int,
     current_user: MasterUser,
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> RequestRead:
-    """Take request in work (atomic). Returns 409 if already taken."""
+    idempotency_key: Annotated[Optional[str], Header(max_length=128)] = None,
+) -> Response:
+    """Take request in work (atomic). Returns 409 if already taken.
+
+    With an Idempotency-Key header a retry of a take that succeeded gets the
+    same 200 again (Idempotent-Replayed: true) instead of a 409 / 400.
+    """
     service = _requests_service(db)
-    req = await service.take_in_work(
-        request_id,
-        current_user.id,
-        actor_username=current_user.username,
+
+    async def take() -> bytes:
+        req = await service.take_in_work(
+            request_id,
+            current_user.id,
+            actor_username=current_user.username,
+        )
+        return RequestRead.model_validate(req).model_dump_json(by_alias=True).encode()
+
+    if idempotency_key is None:
+        return JSONBytesResponse(await take())
+    result = await IdempotencyService(IdempotencyRepository(db)).run(
+        f"take:{current_user.id}", idempotency_key, fingerprint(request_id), take
     )
-    await db.refresh(req, attribute_names=["master"])
-    return RequestRead.model_validate(req)
+    headers = {IDEMPOTENT_REPLAYED_HEADER: "true"} if result.replayed else None
+    return JSONBytesResponse(result.body, result.status_code, headers=headers)
 
 
 @router.patch("/requests/{request_id}/done", response_model=RequestRead)
@@ -57,32 +127,26 @@ async def mark_request_done(
         actor_id=current_user.id,
         actor_username=current_user.username,
     )
-    await db.refresh(req, attribute_names=["master"])
     return RequestRead.model_validate(req)
 
 
-@router.get("/master/requests/{request_id}/history")
+@router.get(
+    "/master/requests/{request_id}/history", response_model=list[AuditEventRead]
+)
 async def get_master_request_history(
     request_id: int,
     current_user: MasterUser,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: ReadDB,
+    archived: Annotated[bool, Query()] = False,
 ):
-    """Get audit history for a request assigned to current master."""
+    """Get audit history for a request assigned to current master.
+
+    archived=true also returns events already moved to the audit archive.
+    """
     service = _requests_service(db)
     req = await service.get_request(request_id)
     if not req:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
     if req.master_id != current_user.id:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
-    events = await service.get_request_history(request_id)
-    return [
-        {
-            "id": e.id,
-            "action": e.action,
-            "actorUsername": e.actor_username,
-            "oldStatus": e.old_status,
-            "newStatus": e.new_status,
-            "createdAt": e.created_at.isoformat(),
-        }
-        for e in events
-    ]
+    return await service.get_request_history(request_id, include_archived=archived)
@@ -1,29 +1,92 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routing import InstrumentedRoute
+from app.core.ratelimit import client_ip, intake_limiter
+from app.core.responses import IDEMPOTENT_REPLAYED_HEADER, JSONBytesResponse
 from app.db import get_db
-from app.repositories import AuditRepository, RequestsRepository
+from app.repositories import (
+    AuditRepository,
+    ChangeFeed,
+    CountersRepository,
+    IdempotencyRepository,
+    RequestsRepository,
+)
 from app.schemas import RequestCreate, RequestRead
-from app.services import RequestsService
+from app.services import IdempotencyService, RequestsService
+from app.services.idempotency import fingerprint
 
-router = APIRouter(prefix="/requests", tags=["requests-public"])
+router = APIRouter(
+    prefix="/requests", tags=["requests-public"], route_class=InstrumentedRoute
+)
 
 
-@router.post("", response_model=RequestRead)
+async def limit_intake(
+    request: Request,
+    idempotency_key: Annotated[Optional[str], Header(max_length=128)] = None,
+) -> None:
+    """429 when the caller's IP or phone is over its limit.
+
+    Runs before get_db (path operation dependencies come first), so rejected
+    calls never open a DB session. The JSON body is already parsed and cached
+    on the request by then. Calls with an Idempotency-Key are checked in
+    create_request instead, once the key is known not to be a replay: a
+    retry of an accepted submission must not spend (or be refused) a token.
+    """
+    if idempotency_key is not None:
+        return
+    try:
+        body = await request.json()
+    except ValueError:
+        # Not JSON: the body validation after this dependency rejects it.
+        body = None
+    phone = body.get("clientPhone") if isinstance(body, dict) else None
+    await intake_limiter.check(
+        client_ip(request), phone if isinstance(phone, str) else None
+    )
+
+
+@router.post("", response_model=RequestRead, dependencies=[Depends(limit_intake)])
 async def create_request(
+    request: Request,
     body: RequestCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> RequestRead:
-    """Create repair request (public, no JWT)."""
+    idempotency_key: Annotated[Optional[str], Header(max_length=128)] = None,
+) -> Response:
+    """Create repair request (public, no JWT). Rate limited per IP and phone.
+
+    With an Idempotency-Key header a retry gets the stored response of the
+    first call (Idempotent-Replayed: true) instead of a duplicate request;
+    replays are not rate limited.
+    """
     repo = RequestsRepository(db)
     audit_repo = AuditRepository(db)
-    service = RequestsService(repo, audit_repo)
-    req = await service.create_request_public(
-        client_name=body.client_name,
-        client_phone=body.client_phone,
-        description=body.description,
-        address=body.address,
+    service = RequestsService(repo, audit_repo, ChangeFeed(db), CountersRepository(db))
+
+    async def create() -> bytes:
+        req = await service.create_request_public(
+            client_name=body.client_name,
+            client_phone=body.client_phone,
+            description=body.description,
+            address=body.address,
+        )
+        return RequestRead.model_validate(req).model_dump_json(by_alias=True).encode()
+
+    if idempotency_key is None:
+        return JSONBytesResponse(await create())
+
+    async def limited_create() -> bytes:
+        # Not a replay: this call takes its intake token (429 rolls the key back).
+        await intake_limiter.check(client_ip(request), body.client_phone)
+        return await create()
+
+    result = await IdempotencyService(IdempotencyRepository(db)).run(
+        "POST /requests",
+        idempotency_key,
+        fingerprint(body.model_dump()),
+        limited_create,
     )
-    return RequestRead.model_validate(req)
+    headers = {IDEMPOTENT_REPLAYED_HEADER: "true"} if result.replayed else None
+    return JSONBytesResponse(result.body, result.status_code, headers=headers)
@@ -1,19 +1,17 @@
-from typing import Annotated
-
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter
 
+from app.api.routing import InstrumentedRoute
 from app.deps.auth import DispatcherUser
-from app.db import get_db
+from app.deps.db import ReadDB
 from app.repositories import UsersRepository
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=InstrumentedRoute)
 
 
 @router.get("/masters")
 async def list_masters(
     current_user: DispatcherUser,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: ReadDB,
 ) -> list[dict]:
     """List masters (id, username). Dispatcher only."""
     repo = UsersRepository(db)
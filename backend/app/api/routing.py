@@ -0,0 +1,49 @@
+import time
+
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    db_statements_per_request,
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+)
+from app.db.statements import count_statements
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that records latency, in-flight count and SQL statements per route.
+
+    Labelled with the path template (/requests/{request_id}/take), so ids do
+    not multiply series. Covers dependencies, including get_db's commit.
+    """
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        labels = (scope["method"], self.path_format)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels(*labels)
+        in_flight.inc()
+        started = time.perf_counter()
+        with count_statements() as statements:
+            try:
+                await super().handle(scope, receive, send_with_status)
+            except StarletteHTTPException as exc:
+                # Rendered by the app's exception handlers after we return.
+                status = exc.status_code
+                raise
+            finally:
+                in_flight.dec()
+                http_request_duration.labels(*labels).observe(
+                    time.perf_counter() - started
+                )
+                http_requests.labels(*labels, str(status)).inc()
+                db_statements_per_request.labels(*labels).observe(statements.count)
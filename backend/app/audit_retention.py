@@ -0,0 +1,59 @@
+"""Audit partition maintenance. Run: python -m app.audit_retention [--keep-months N].
+
+PostgreSQL only (request_audit_events is range-partitioned by month, migration
+0007). Creates the next AUDIT_PARTITIONS_AHEAD monthly partitions, then writes
+every partition that ends before the retention cutoff to AUDIT_ARCHIVE_DIR
+and drops it. Safe to re-run: a partition is dropped only after its archive
+(data and index) is complete, and an interrupted archive is rewritten.
+"""
+
+import argparse
+import asyncio
+
+from app.core.settings import settings
+from app.db.session import async_session_factory
+from app.repositories.audit_archive import AuditArchive
+from app.repositories.audit_partitions import AuditPartitions, month_start, utc_today
+
+
+async def run_retention(keep_months: int, archive_dir: str) -> None:
+    today = utc_today()
+    cutoff = month_start(today, -keep_months)
+    archive = AuditArchive(archive_dir)
+    async with async_session_factory() as session:
+        if session.get_bind().dialect.name != "postgresql":
+            print("Audit partitions need PostgreSQL; nothing to do")
+            return
+        partitions = AuditPartitions(session)
+        created = await partitions.ensure_months(
+            month_start(today), settings.AUDIT_PARTITIONS_AHEAD + 1
+        )
+        await session.commit()
+        for name in created:
+            print(f"Created partition {name}")
+
+        for name, upper in await partitions.list_partitions():
+            # DEFAULT has no bound; a partition is old once all of it is < cutoff.
+            if upper is None or upper.date() > cutoff:
+                continue
+            rows = await archive.write(
+                name, partitions.stream_rows(name), upper_bound=upper
+            )
+            await partitions.drop(name)
+            await session.commit()
+            print(f"Archived {name}: {rows} events")
+    print(f"Audit retention done: events before {cutoff} are in {archive_dir}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--keep-months", type=int, default=settings.AUDIT_RETENTION_MONTHS
+    )
+    parser.add_argument("--dir", default=settings.AUDIT_ARCHIVE_DIR)
+    args = parser.parse_args()
+    asyncio.run(run_retention(args.keep_months, args.dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sent to subscribers whenever events may have been missed (slow consumer,
+# LISTEN connection lost); clients should refetch instead of applying deltas.
+RESYNC_MESSAGE = json.dumps({"type": "resync"})
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_BYTES = 7900
+
+
+class Subscription:
+    """Bounded mailbox of one stream consumer.
+
+    A consumer that falls max_size messages behind is not allowed to hold
+    memory: its backlog is replaced by a single resync message.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._queue: asyncio.Queue[str] = asyncio.Queue(max_size)
+
+    def push(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC_MESSAGE)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """Next message, or None when nothing arrived within timeout."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """Fan-out of change messages to subscribers of this process.
+
+    transactional=False: the session hooks deliver messages after commit.
+    Enough for a single worker and for tests.
+    """
+
+    transactional = False
+
+    def __init__(self, queue_size: int = 256) -> None:
+        self._queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[Subscription]:
+        subscription = Subscription(self._queue_size)
+        self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers.discard(subscription)
+
+    def deliver(self, message: str) -> None:
+        for subscription in self._subscribers:
+            subscription.push(message)
+
+
+class PostgresBroker(InProcessBroker):
+    """LISTEN/NOTIFY fan-out across workers.
+
+    transactional=True: messages are sent with pg_notify inside the writing
+    transaction, so Postgres delivers them only on commit, to every worker
+    (this one included) via one dedicated LISTEN connection per process.
+    """
+
+    transactional = True
+
+    def __init__(self, dsn: str, channel: str, queue_size: int = 256) -> None:
+        super().__init__(queue_size)
+        self.channel = channel
+        self._dsn = dsn
+        self._conn: Any = None
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self._connect()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        self._conn = await asyncpg.connect(self._dsn)
+        self._conn.add_termination_listener(self._on_terminated)
+        await self._conn.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        self.deliver(payload)
+
+    def _on_terminated(self, conn: Any) -> None:
+        if self._stopping or self._reconnect_task is not None:
+            return
+        logger.warning("LISTEN connection lost, reconnecting")
+        self._conn = None
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 0.5
+        while not self._stopping:
+            try:
+                await self._connect()
+            except Exception:
+                logger.exception("LISTEN reconnect failed, retry in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            self._reconnect_task = None
+            # Anything notified while disconnected is gone.
+            self.deliver(RESYNC_MESSAGE)
+            return
+
+
+_broker: InProcessBroker = InProcessBroker()
+
+
+def get_broker() -> InProcessBroker:
+    return _broker
+
+
+def set_broker(broker: InProcessBroker) -> None:
+    global _broker
+    _broker = broker
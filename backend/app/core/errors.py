@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import Request
 from fastapi import HTTPException
@@ -16,10 +16,12 @@ class DomainError(HTTPException):
         code: str,
         message: str,
         details: Any = None,
+        headers: Optional[dict[str, str]] = None,
     ) -> None:
         super().__init__(
             status_code=status_code,
             detail={"code": code, "message": message, "details": details},
+            headers=headers,
         )
 
 
@@ -28,11 +30,12 @@ def error_response(
     message: str,
     details: Any = None,
     status_code: int = 400,
+    headers: Optional[dict[str, str]] = None,
 ) -> JSONResponse:
     body: dict[str, Any] = {"code": code, "message": message}
     if details is not None:
         body["details"] = details
-    return JSONResponse(status_code=status_code, content=body)
+    return JSONResponse(status_code=status_code, content=body, headers=headers)
 
 
 async def http_exception_handler(
@@ -54,7 +57,11 @@ async def http_exception_handler(
         details = None
 
     return error_response(
-        code=code, message=message, details=details, status_code=exc.status_code
+        code=code,
+        message=message,
+        details=details,
+        status_code=exc.status_code,
+        headers=exc.headers,
     )
 
 
@@ -70,3 +77,16 @@ async def validation_exception_handler(
         details=details,
         status_code=422,
     )
+
+
+async def pool_timeout_handler(
+    request: Request,
+    exc: Exception,
+) -> JSONResponse:
+    """No free DB connection within DB_POOL_TIMEOUT: tell the client to retry."""
+    return error_response(
+        code="db_unavailable",
+        message="Сервер перегружен, повторите запрос позже",
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
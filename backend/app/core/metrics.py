@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Served by GET /metrics from prometheus_client's default registry, which also
+# carries the process_* and python_* collectors.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from routing to the end of the response body.",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+http_requests = Counter(
+    "http_requests_total",
+    "Responses by route and status code.",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Requests being handled right now.",
+    ("method", "route"),
+)
+db_statements_per_request = Histogram(
+    "db_statements_per_request",
+    "SQL statements sent to the database while handling one request.",
+    ("method", "route"),
+    buckets=STATEMENT_BUCKETS,
+)
+request_transitions = Counter(
+    "repair_request_transitions_total",
+    "Successful request status changes by action.",
+    ("action",),
+)
+intake_duplicates = Counter(
+    "repair_request_intake_duplicates_total",
+    "Public submissions that repeated a recent active request, by outcome.",
+    ("outcome",),
+)
+read_sessions = Counter(
+    "db_read_sessions_total",
+    "Sessions of read-only handlers by database (replica, or primary when"
+    " none is configured or the user wrote recently).",
+    ("target",),
+)
+take_conflicts = Counter(
+    "repair_request_take_conflicts_total",
+    "Takes that lost the race for a request (409 request_already_taken).",
+)
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop lag probe woke up: time the loop was blocked.",
+    buckets=LOOP_LAG_BUCKETS,
+)
+event_loop_tasks = Gauge("event_loop_tasks", "asyncio tasks alive in this process.")
+# Read at scrape time; /metrics is async, so there is a running loop.
+event_loop_tasks.set_function(lambda: len(asyncio.all_tasks()))
+
+
+class LoopLagMonitor:
+    """Sleeps interval_seconds in a loop and records how late each wakeup is.
+
+    A busy loop (CPU work, blocking calls) shows up as lag for every request
+    of this worker, so this is the first thing to check when all routes slow down.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        self._interval = interval_seconds
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self._interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            lag = time.perf_counter() - started - self._interval
+            event_loop_lag.observe(max(lag, 0.0))
@@ -0,0 +1,27 @@
+import base64
+import binascii
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_CURSOR_PREFIX = "r:"
+
+
+def encode_cursor(request_id: int) -> str:
+    """Encode the last row of a page as an opaque, URL-safe cursor."""
+    raw = f"{_CURSOR_PREFIX}{request_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode cursor back to the anchor request id. Raises ValueError if malformed."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+    except (binascii.Error, UnicodeError) as exc:
+        raise ValueError("malformed cursor") from exc
+    if not raw.startswith(_CURSOR_PREFIX):
+        raise ValueError("malformed cursor")
+    request_id = int(raw[len(_CURSOR_PREFIX) :])
+    if request_id <= 0:
+        raise ValueError("malformed cursor")
+    return request_id
@@ -0,0 +1,136 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import bcrypt
+
+from app.core.errors import DomainError
+from app.core.settings import settings
+
+# bcrypt releases the GIL, so hashing in worker threads keeps the event loop
+# free; the pool size caps how many CPU cores logins can occupy at once.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt",
+)
+
+
+def _hash(password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except Exception:
+        return False
+
+
+async def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """bcrypt hash with BCRYPT_ROUNDS (or rounds), computed off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, _hash, password, rounds or settings.BCRYPT_ROUNDS
+    )
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    """Constant-time bcrypt check off the event loop. False on malformed hashes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _verify, password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when the hash cost differs from BCRYPT_ROUNDS ($2b$<cost>$...)."""
+    try:
+        return int(password_hash.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+class LoginLimiter:
+    """Admission control for password checks.
+
+    At most max_concurrent logins hash at once; up to max_waiting more queue
+    (FIFO) for wait_timeout_seconds. Anything beyond that is shed with 503 and
+    Retry-After instead of piling up behind the thread pool.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_waiting: int,
+        wait_timeout_seconds: float,
+        retry_after_seconds: int,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _busy(self) -> DomainError:
+        return DomainError(
+            503,
+            "login_busy",
+            "Сервер занят, повторите вход через несколько секунд",
+            headers={"Retry-After": str(self.retry_after_seconds)},
+        )
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            raise self._busy()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.wait_timeout_seconds)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before we gave up: pass it on.
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.TimeoutError):
+                raise self._busy() from None
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter so _active never dips and
+        # a newcomer cannot overtake the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+
+login_limiter = LoginLimiter(
+    max_concurrent=settings.LOGIN_MAX_CONCURRENT,
+    max_waiting=settings.LOGIN_MAX_WAITING,
+    wait_timeout_seconds=settings.LOGIN_WAIT_TIMEOUT_SECONDS,
+    retry_after_seconds=settings.LOGIN_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,35 @@
+import re
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def phone_digits(phone: str) -> str:
+    return _NON_DIGITS.sub("", phone)
+
+
+def normalize_phone(phone: str) -> str:
+    """Digits of a phone without the +7 / 8 trunk prefix of an 11-digit number.
+
+    "+7 (999) 123-45-67", "8 999 123 45 67" and "9991234567" all give
+    "9991234567". Stored in repair_requests.client_phone_normalized; must
+    match the backfill in migration 0011.
+    """
+    digits = phone_digits(phone)
+    if len(digits) == 11 and digits[0] in "78":
+        return digits[1:]
+    return digits
+
+
+def phone_search_prefixes(query: str) -> list[str]:
+    """Normalized phone prefixes a search query can stand for.
+
+    A full number or an explicit +7 is normalized like stored phones. A
+    shorter query starting with 7 or 8 may be the trunk prefix or the first
+    digit of the number itself, so both readings are returned.
+    """
+    digits = phone_digits(query)
+    if query.lstrip().startswith("+7"):
+        return [digits[1:]]
+    if len(digits) >= 11 or digits[:1] not in ("7", "8"):
+        return [normalize_phone(digits)]
+    return [digits, digits[1:]]
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from app.core.settings import settings
+
+
+class Principal:
+    """Authenticated caller as seen by handlers: id, username, role.
+
+    created_at is only known when the principal was built from the user row.
+    """
+
+    __slots__ = ("id", "username", "role", "created_at")
+
+    def __init__(
+        self,
+        id: int,
+        username: str,
+        role: str,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        self.id = id
+        self.username = username
+        self.role = role
+        self.created_at = created_at
+
+
+def token_key(token: str) -> str:
+    """Cache key for a bearer token; the raw token is never stored."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PrincipalCache:
+    """Bounded LRU of verified tokens -> Principal with per-entry expiry.
+
+    An entry lives until min(now + ttl, token exp). invalidate_user() drops
+    every cached token of a user (role change, deletion). Per-process only:
+    other workers see the change once their entries expire (at most ttl).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+
+    def get(self, key: str) -> Optional[Principal]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(
+        self,
+        key: str,
+        principal: Principal,
+        token_exp: Optional[float] = None,
+    ) -> None:
+        """Cache principal; token_exp is the JWT exp claim (unix seconds)."""
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, principal)
+        self._keys_by_user.setdefault(principal.id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        for key in self._keys_by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].id]
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,167 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+from fastapi import Request
+
+from app.core.errors import DomainError
+from app.core.settings import settings
+
+MSG_RATE_LIMITED = "Слишком много заявок, попробуйте позже"
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Take one token from key's bucket; 0.0 if allowed, else seconds to wait."""
+        ...
+
+
+class MemoryRateLimitBackend:
+    """Token buckets in this process: `limit` hits per window, bursts up to `limit`.
+
+    O(1) per hit: one dict lookup, a refill computed from the elapsed time,
+    and an LRU bump. At most max_keys buckets are kept; evicting the least
+    recently seen key only ever forgets a limit, it never blocks anyone.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        # key -> [tokens, monotonic time of the last update]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        return self.take(key, limit, window_seconds, time.monotonic())
+
+    def take(self, key: str, limit: int, window_seconds: float, now: float) -> float:
+        rate = limit / window_seconds
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[key] = [float(limit), now]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+# Same token bucket as MemoryRateLimitBackend, atomically in Redis; the
+# clock is Redis' own so workers on different hosts agree.
+_REDIS_TOKEN_BUCKET = """
+local limit = tonumber(ARGV[1])
+local rate = limit / tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or limit
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2]) * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by all workers: one EVALSHA round trip per hit.
+
+    Needs the optional redis package (pip install -e ".[redis]").
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:") -> None:
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        wait = await self._script(
+            keys=[self._prefix + key], args=[limit, window_seconds]
+        )
+        return float(wait)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Caller address; the proxy-appended X-Forwarded-For hop when trusted."""
+    if settings.TRUST_X_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else None
+
+
+def phone_key(phone: str) -> str:
+    """Digits of a phone; +7 / 8 prefixes of 11-digit numbers count as the same."""
+    digits = re.sub(r"\D", "", phone)
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+class IntakeRateLimiter:
+    """Limits for the public POST /requests: per client IP and per client phone.
+
+    0 disables a limit. A rejection raises 429 with Retry-After; it is checked
+    in a dependency that runs before get_db, so a rejected call never gets a
+    DB session.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        per_ip: int,
+        per_phone: int,
+        window_seconds: float,
+    ) -> None:
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_phone = per_phone
+        self.window_seconds = window_seconds
+
+    async def check(self, client_ip: Optional[str], phone: Optional[str]) -> None:
+        wait = 0.0
+        if self.per_ip and client_ip:
+            wait = await self.backend.hit(
+                f"intake:ip:{client_ip}", self.per_ip, self.window_seconds
+            )
+        if not wait and self.per_phone and phone:
+            key = phone_key(phone)
+            if key:
+                wait = await self.backend.hit(
+                    f"intake:phone:{key}", self.per_phone, self.window_seconds
+                )
+        if wait:
+            raise DomainError(
+                429,
+                "rate_limited",
+                MSG_RATE_LIMITED,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+
+def _intake_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+intake_limiter = IntakeRateLimiter(
+    _intake_backend(),
+    per_ip=settings.INTAKE_LIMIT_PER_IP,
+    per_phone=settings.INTAKE_LIMIT_PER_PHONE,
+    window_seconds=settings.INTAKE_LIMIT_WINDOW_SECONDS,
+)
@@ -0,0 +1,14 @@
+from starlette.responses import Response
+
+# Set on a response replayed for a repeated Idempotency-Key.
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class JSONBytesResponse(Response):
+    """Response for a body already serialized to JSON bytes (e.g. TypeAdapter.dump_json).
+
+    Skips FastAPI's response_model validation and json.dumps entirely; the
+    route's response_model still documents the shape in OpenAPI.
+    """
+
+    media_type = "application/json"
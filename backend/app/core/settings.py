@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,11 +7,107 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     DATABASE_URL: str
+    # Optional read replica: dispatcher/master lists, history and the masters
+    # list read from it. After a write a user's reads stay on the primary for
+    # READ_YOUR_WRITES_SECONDS (should exceed the replica's usual lag).
+    DATABASE_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
 
+    # Connection pool (PostgreSQL only). DB_POOL_TIMEOUT is how long a request
+    # waits for a free connection before 503; checkouts slower than
+    # DB_POOL_SLOW_CHECKOUT_MS are logged. DB_PGBOUNCER disables prepared
+    # statement caching for a transaction-pooling PgBouncer in front of Postgres.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER: bool = False
+
+    # Verified-token cache in get_current_user (0 disables). With
+    # AUTH_TRUST_TOKEN_CLAIMS the principal is built from the sub/username/role
+    # claims and the user row is only loaded by handlers that need it.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Password hashing runs in a thread pool of PASSWORD_HASH_WORKERS threads.
+    # Changing BCRYPT_ROUNDS rehashes each password on its next successful login.
+    # /auth/token admits LOGIN_MAX_CONCURRENT checks at once, queues up to
+    # LOGIN_MAX_WAITING more and answers 503 + Retry-After beyond that.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    LOGIN_MAX_CONCURRENT: int = 8
+    LOGIN_MAX_WAITING: int = 64
+    LOGIN_WAIT_TIMEOUT_SECONDS: float = 5.0
+    LOGIN_RETRY_AFTER_SECONDS: int = 2
+
+    # Audit events: "commit" writes them in one INSERT at commit time;
+    # "background" hands them to an in-process write-behind queue after commit
+    # (fewer round trips on write endpoints, rows in the queue are lost on crash).
+    # On PostgreSQL single-request transitions and claim-next insert their row
+    # inside the transition CTE at no extra round trip, so neither mode applies
+    # to them; the mode covers create, bulk and the other staged events.
+    AUDIT_WRITE_MODE: str = "commit"
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_QUEUE_SIZE: int = 10000
+
+    # Audit retention (PostgreSQL, python -m app.audit_retention): monthly
+    # partitions older than AUDIT_RETENTION_MONTHS are written to gzip NDJSON
+    # in AUDIT_ARCHIVE_DIR and dropped; AUDIT_PARTITIONS_AHEAD future months
+    # are created in advance. History endpoints read archives with ?archived=true.
+    AUDIT_RETENTION_MONTHS: int = 12
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+    AUDIT_PARTITIONS_AHEAD: int = 3
+
+    # Live request feed (GET /requests/stream): "memory" delivers within this
+    # process only; "postgres" fans out through LISTEN/NOTIFY on CHANGES_CHANNEL
+    # so every worker sees every change.
+    CHANGES_BROKER: str = "memory"
+    CHANGES_CHANNEL: str = "repair_requests_changes"
+    CHANGES_QUEUE_SIZE: int = 256
+    CHANGES_HEARTBEAT_SECONDS: float = 15.0
+
+    # Public POST /requests: token buckets of INTAKE_LIMIT_PER_IP /
+    # INTAKE_LIMIT_PER_PHONE requests per INTAKE_LIMIT_WINDOW_SECONDS (0 = no
+    # limit), over the limit -> 429 + Retry-After. RATE_LIMIT_BACKEND "memory"
+    # counts per process; "redis" shares buckets between workers (REDIS_URL).
+    # TRUST_X_FORWARDED_FOR: take the client IP from the last X-Forwarded-For
+    # hop (only behind a proxy that sets it, e.g. the frontend nginx). Without
+    # it every proxied caller shares the proxy's bucket; docker-compose turns
+    # it on and keeps port 8000 off the public interface.
+    INTAKE_LIMIT_PER_IP: int = 10
+    INTAKE_LIMIT_PER_PHONE: int = 3
+    INTAKE_LIMIT_WINDOW_SECONDS: float = 60.0
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    TRUST_X_FORWARDED_FOR: bool = False
+
+    # Idempotency-Key on POST /requests and PATCH /requests/{id}/take: the
+    # response is kept IDEMPOTENCY_TTL_SECONDS and replayed to retries with the
+    # same key; expired keys are purged every IDEMPOTENCY_PURGE_INTERVAL_SECONDS.
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Public POST /requests: a submission with the same phone and the same
+    # words as an active request created in the last DUPLICATE_WINDOW_SECONDS
+    # (0 = no check, the default) is a duplicate. DUPLICATE_MODE "flag" creates
+    # a new one with duplicateOf set; "merge" answers with the existing request
+    # and adds a "repeat" event to its history.
+    DUPLICATE_WINDOW_SECONDS: int = 0
+    DUPLICATE_MODE: str = "flag"
+
+    # GET /metrics: event loop lag is probed every this many seconds (0 = off).
+    METRICS_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
     @property
     def cors_origins_list(self) -> list[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
@@ -0,0 +1,23 @@
+"""Rebuild request_counters from repair_requests. Run: python -m app.counters.
+
+Counters are maintained by RequestsService; run this after writes that bypass
+it (manual SQL, restores) or whenever /requests/stats looks off.
+"""
+
+import asyncio
+
+from app.db.session import async_session_factory
+from app.repositories import CountersRepository
+
+
+async def run_reconcile() -> None:
+    async with async_session_factory() as session:
+        drift = await CountersRepository(session).rebuild()
+        await session.commit()
+    for master_id, status, stored, actual in drift:
+        print(f"master_id={master_id} status={status}: {stored} -> {actual}")
+    print(f"Counters rebuilt: {len(drift)} drifted")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_reconcile())
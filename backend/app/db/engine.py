@@ -1,6 +1,10 @@
+from typing import Any, Optional
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from app.core.settings import settings
+from app.db.pool import TimedQueuePool
 
 
 def _make_async_url(url: str) -> str:
@@ -11,7 +15,51 @@ def _make_async_url(url: str) -> str:
     return url
 
 
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def _engine_kwargs(url: str) -> dict[str, Any]:
+    """Pool and driver options from settings; only applied to PostgreSQL URLs."""
+    if not url.startswith("postgresql+asyncpg://"):
+        return {}
+    connect_args: dict[str, Any] = {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER:
+        # Transaction pooling hands each transaction to any server connection:
+        # named prepared statements must be unique and never reused.
+        connect_args = {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+_url = _make_async_url(settings.DATABASE_URL)
+
 engine: AsyncEngine = create_async_engine(
-    _make_async_url(settings.DATABASE_URL),
+    _url,
     echo=False,
+    **_engine_kwargs(_url),
 )
+
+# Read replica for read-only endpoints (app.deps.db.get_read_db); same pool
+# settings as the primary. None: everything is read from the primary.
+replica_engine: Optional[AsyncEngine] = None
+if settings.DATABASE_REPLICA_URL:
+    _replica_url = _make_async_url(settings.DATABASE_REPLICA_URL)
+    replica_engine = create_async_engine(
+        _replica_url,
+        echo=False,
+        **_engine_kwargs(_replica_url),
+    )
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolCheckoutStats:
+    """Running totals of connection checkout waits, for sizing the pool.
+
+    A checkout includes waiting for a free connection, opening an overflow
+    connection and the pre-ping, i.e. everything a request waits for before
+    its first query. Timeouts are checkouts that hit DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total_seconds = 0.0
+            self.wait_max_seconds = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total_seconds += wait_seconds
+            self.wait_max_seconds = max(self.wait_max_seconds, wait_seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "waitAvgMs": round(
+                    self.wait_total_seconds / attempts * 1000 if attempts else 0.0, 3
+                ),
+                "waitMaxMs": round(self.wait_max_seconds * 1000, 3),
+            }
+
+    def totals(self) -> tuple[int, int, float, float]:
+        """(checkouts, timeouts, wait total seconds, wait max seconds), unrounded."""
+        with self._lock:
+            return (
+                self.checkouts,
+                self.timeouts,
+                self.wait_total_seconds,
+                self.wait_max_seconds,
+            )
+
+
+checkout_stats = PoolCheckoutStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time in checkout_stats."""
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            checkout_stats.record(time.perf_counter() - started, timed_out=True)
+            logger.warning("Connection pool exhausted: %s", pool_status(self))
+            raise
+        waited = time.perf_counter() - started
+        checkout_stats.record(waited)
+        if waited * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning(
+                "Slow connection checkout: %.1f ms (%s)",
+                waited * 1000,
+                pool_status(self),
+            )
+        return connection
+
+
+def pool_status(pool: Pool) -> dict[str, Any]:
+    """Current occupancy of a queue pool plus cumulative checkout stats."""
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checkedIn=pool.checkedin(),
+            checkedOut=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    status.update(checkout_stats.snapshot())
+    return status
+
+
+class PoolCollector(Collector):
+    """pool_status as Prometheus metrics; registered in app.main.
+
+    get_pool is called per scrape: engine.dispose() replaces the pool object.
+    """
+
+    def __init__(self, get_pool: Callable[[], Pool]) -> None:
+        self._get_pool = get_pool
+
+    def collect(self) -> Iterator[Metric]:
+        pool = self._get_pool()
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            for name, help_text, value in (
+                ("db_pool_size", "Connections kept open by the pool.", pool.size()),
+                (
+                    "db_pool_checked_in",
+                    "Idle connections in the pool.",
+                    pool.checkedin(),
+                ),
+                ("db_pool_checked_out", "Connections in use.", pool.checkedout()),
+                (
+                    "db_pool_overflow",
+                    "Connections open above pool size.",
+                    pool.overflow(),
+                ),
+            ):
+                yield GaugeMetricFamily(name, help_text, value=value)
+        checkouts, timeouts, wait_total, wait_max = checkout_stats.totals()
+        for name, help_text, value in (
+            ("db_pool_checkouts_total", "Successful connection checkouts.", checkouts),
+            (
+                "db_pool_checkout_timeouts_total",
+                "Checkouts that hit DB_POOL_TIMEOUT.",
+                timeouts,
+            ),
+            (
+                "db_pool_checkout_wait_seconds_total",
+                "Time spent waiting for connections, all checkouts.",
+                wait_total,
+            ),
+        ):
+            yield CounterMetricFamily(name, help_text, value=value)
+        yield GaugeMetricFamily(
+            "db_pool_checkout_wait_max_seconds",
+            "Longest checkout wait since start.",
+            value=wait_max,
+        )
@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+
+from app.core.settings import settings
+
+
+class PrimaryPins:
+    """Users whose reads stay on the primary until a deadline (read-your-writes).
+
+    An authenticated write pins its user for window_seconds, so the lists and
+    history they load right after it never come from a replica that has not
+    replayed the write yet. Bounded LRU; per-process, like PrincipalCache.
+    """
+
+    def __init__(self, window_seconds: float, max_entries: int = 100_000) -> None:
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._deadlines: OrderedDict[int, float] = OrderedDict()
+
+    def pin(self, user_id: int) -> None:
+        if self.window_seconds <= 0:
+            return
+        self._deadlines.pop(user_id, None)
+        self._deadlines[user_id] = time.monotonic() + self.window_seconds
+        while len(self._deadlines) > self.max_entries:
+            self._deadlines.popitem(last=False)
+
+    def is_pinned(self, user_id: int) -> bool:
+        deadline = self._deadlines.get(user_id)
+        if deadline is None:
+            return False
+        if deadline <= time.monotonic():
+            del self._deadlines[user_id]
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._deadlines.clear()
+
+
+primary_pins = PrimaryPins(settings.READ_YOUR_WRITES_SECONDS)
@@ -1,8 +1,9 @@
 from collections.abc import AsyncGenerator
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db.engine import engine
+from app.db.engine import engine, replica_engine
 
 async_session_factory = async_sessionmaker(
     engine,
@@ -12,6 +13,16 @@ async_session_factory = async_sessionmaker(
     autoflush=False,
 )
 
+replica_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+if replica_engine is not None:
+    replica_session_factory = async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
@@ -23,3 +34,11 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+def get_replica_session_factory() -> Optional[async_sessionmaker[AsyncSession]]:
+    """Sessions on the read replica, None without DATABASE_REPLICA_URL.
+
+    A dependency (not a module lookup) so tests can point it at another database.
+    """
+    return replica_session_factory
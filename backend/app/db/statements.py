@@ -0,0 +1,61 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementCount:
+    """SQL statements sent to the database inside count_statements().
+
+    statements holds their text when recording was asked for, else None.
+    """
+
+    __slots__ = ("count", "statements", "_parent")
+
+    def __init__(
+        self, parent: Optional["StatementCount"] = None, record: bool = False
+    ) -> None:
+        self.count = 0
+        self.statements: Optional[list[str]] = [] if record else None
+        self._parent = parent
+
+
+_current: ContextVar[Optional[StatementCount]] = ContextVar(
+    "statement_count", default=None
+)
+
+
+@contextmanager
+def count_statements(record: bool = False) -> Iterator[StatementCount]:
+    """Count statements executed in this context (and tasks started from it).
+
+    Nested counters all see the inner statements; any engine is counted.
+    One count is one cursor execute, i.e. one round trip; COMMIT / ROLLBACK
+    and driver-issued BEGIN are not included. record=True keeps the SQL.
+    """
+    counter = StatementCount(_current.get(), record)
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    counter = _current.get()
+    while counter is not None:
+        counter.count += 1
+        if counter.statements is not None:
+            counter.statements.append(statement)
+        counter = counter._parent
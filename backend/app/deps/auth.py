@@ -1,56 +1,77 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.principals import Principal, principal_cache, token_key
 from app.core.security import decode_access_token
+from app.core.settings import settings
 from app.db import get_db
-from app.models import User
+from app.db.replica import primary_pins
 from app.repositories import UsersRepository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=True)
 
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={"code": "invalid_token", "message": "Неверный логин или пароль"},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Extract and validate JWT, return current user. Safe 401 on failure."""
+) -> Principal:
+    """Extract and validate JWT, return current principal. Safe 401 on failure.
+
+    Verified tokens are cached (see PrincipalCache), so repeat calls skip both
+    JWT decoding and the users SELECT. Writes (non-GET calls) pin the user's
+    reads to the primary for a while, see get_read_db.
+    """
+    principal = await _authenticate(token, db)
+    if request.method not in _SAFE_METHODS:
+        primary_pins.pin(principal.id)
+    return principal
+
+
+async def _authenticate(token: str, db: AsyncSession) -> Principal:
+    key = token_key(token)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
     payload = decode_access_token(token)
     if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"code": "invalid_token", "message": "Неверный логин или пароль"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _invalid_token()
     user_id_str: str | None = payload.get("sub")
     if not user_id_str:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"code": "invalid_token", "message": "Неверный логин или пароль"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _invalid_token()
     try:
         user_id = int(user_id_str)
     except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"code": "invalid_token", "message": "Неверный логин или пароль"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    repo = UsersRepository(db)
-    user = await repo.get_by_id(user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"code": "invalid_token", "message": "Неверный логин или пароль"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return user
+        raise _invalid_token()
+    username = payload.get("username")
+    role = payload.get("role")
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and username and role:
+        principal = Principal(user_id, username, role)
+    else:
+        user = await UsersRepository(db).get_by_id(user_id)
+        if not user:
+            raise _invalid_token()
+        principal = Principal(user.id, user.username, user.role, user.created_at)
+    principal_cache.put(key, principal, payload.get("exp"))
+    return principal
 
 
-def require_dispatcher(user: Annotated[User, Depends(get_current_user)]) -> User:
+def require_dispatcher(
+    user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Require dispatcher or admin role."""
     if user.role not in ("dispatcher", "admin"):
         raise HTTPException(
@@ -60,7 +81,7 @@ def require_dispatcher(user: Annotated[User, Depends(get_current_user)]) -> User
     return user
 
 
-def require_master(user: Annotated[User, Depends(get_current_user)]) -> User:
+def require_master(user: Annotated[Principal, Depends(get_current_user)]) -> Principal:
     """Require master role."""
     if user.role != "master":
         raise HTTPException(
@@ -70,6 +91,6 @@ def require_master(user: Annotated[User, Depends(get_current_user)]) -> User:
     return user
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
-DispatcherUser = Annotated[User, Depends(require_dispatcher)]
-MasterUser = Annotated[User, Depends(require_master)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+DispatcherUser = Annotated[Principal, Depends(require_dispatcher)]
+MasterUser = Annotated[Principal, Depends(require_master)]
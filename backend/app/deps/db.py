@@ -0,0 +1,37 @@
+from collections.abc import AsyncGenerator
+from typing import Annotated, Optional
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import read_sessions
+from app.db import get_db
+from app.db.replica import primary_pins
+from app.db.session import get_replica_session_factory
+from app.deps.auth import CurrentUser
+
+
+async def get_read_db(
+    user: CurrentUser,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    replica: Annotated[
+        Optional[async_sessionmaker[AsyncSession]],
+        Depends(get_replica_session_factory),
+    ],
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only handlers: the replica when one is configured.
+
+    Falls back to the request's primary session (the one get_current_user
+    used) without a replica, or while the user is pinned after a write.
+    Nothing is committed on the replica session.
+    """
+    if replica is None or primary_pins.is_pinned(user.id):
+        read_sessions.labels("primary").inc()
+        yield db
+        return
+    read_sessions.labels("replica").inc()
+    async with replica() as session:
+        yield session
+
+
+ReadDB = Annotated[AsyncSession, Depends(get_read_db)]
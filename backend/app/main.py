@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.routers import (
@@ -10,13 +16,60 @@ from app.api.routers import (
     requests_public,
     users,
 )
+from app.api.routing import InstrumentedRoute
 from app.core.errors import (
     http_exception_handler,
+    pool_timeout_handler,
     validation_exception_handler,
 )
+from app.core.broker import InProcessBroker, PostgresBroker, set_broker
+from app.core.metrics import LoopLagMonitor
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import IDEMPOTENT_REPLAYED_HEADER
 from app.core.settings import settings
+from app.db import async_session_factory
+from app.db.engine import engine
+from app.db.pool import PoolCollector, pool_status
+from app.repositories import AuditWriter, IdempotencyKeyPurger
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    audit_writer = None
+    if settings.AUDIT_WRITE_MODE == "background":
+        audit_writer = AuditWriter(
+            async_session_factory,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+            max_queue=settings.AUDIT_QUEUE_SIZE,
+        )
+        await audit_writer.start()
+    if settings.CHANGES_BROKER == "postgres":
+        broker: InProcessBroker = PostgresBroker(
+            settings.DATABASE_URL.replace("+asyncpg", "", 1),
+            settings.CHANGES_CHANNEL,
+            settings.CHANGES_QUEUE_SIZE,
+        )
+    else:
+        broker = InProcessBroker(settings.CHANGES_QUEUE_SIZE)
+    await broker.start()
+    set_broker(broker)
+    loop_monitor = LoopLagMonitor(settings.METRICS_LOOP_LAG_INTERVAL_SECONDS)
+    await loop_monitor.start()
+    key_purger = IdempotencyKeyPurger(
+        async_session_factory, settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+    )
+    await key_purger.start()
+    yield
+    await key_purger.stop()
+    await loop_monitor.stop()
+    await broker.stop()
+    if audit_writer is not None:
+        await audit_writer.stop()
 
-app = FastAPI(title="RepairRequests")
+
+app = FastAPI(title="RepairRequests", lifespan=lifespan)
+app.router.route_class = InstrumentedRoute
 
 app.include_router(auth.router)
 app.include_router(requests_public.router)
@@ -30,12 +83,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", IDEMPOTENT_REPLAYED_HEADER],
 )
 
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+
+REGISTRY.register(PoolCollector(lambda: engine.pool))
 
 
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/health/pool")
+def health_pool() -> dict[str, Any]:
+    """DB pool occupancy and checkout wait totals, for sizing DB_POOL_*."""
+    return pool_status(engine.pool)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint: route latency, DB statements, pool, event loop.
+
+    async on purpose: event_loop_tasks is read on the loop thread.
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
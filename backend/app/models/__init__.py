@@ -1,5 +1,14 @@
 from app.models.audit import RequestAuditEvent
+from app.models.counter import ALL_MASTERS, RequestCounter
+from app.models.idempotency import IdempotencyKey
 from app.models.request import RepairRequest
 from app.models.user import User
 
-__all__ = ["User", "RepairRequest", "RequestAuditEvent"]
+__all__ = [
+    "User",
+    "RepairRequest",
+    "RequestAuditEvent",
+    "RequestCounter",
+    "ALL_MASTERS",
+    "IdempotencyKey",
+]
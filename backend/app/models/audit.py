@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -12,9 +12,21 @@ if TYPE_CHECKING:
 
 
 class RequestAuditEvent(Base):
-    """Audit log for repair request state changes."""
+    """Audit log for repair request state changes.
+
+    On PostgreSQL the table is range-partitioned by month on created_at
+    (migration 0007): the primary key there is (id, created_at) and only the
+    (request_id, created_at) index exists per partition.
+    """
 
     __tablename__ = "request_audit_events"
+    __table_args__ = (
+        Index(
+            "ix_request_audit_events_request_id_created_at",
+            "request_id",
+            "created_at",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     request_id: Mapped[int] = mapped_column(ForeignKey("repair_requests.id"), index=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+# master_id of the per-status totals rows (real user ids start at 1)
+ALL_MASTERS = 0
+
+
+class RequestCounter(Base):
+    """Number of repair_requests per (master_id, status), kept in step by
+    RequestsService in the same transaction as the change it counts.
+
+    master_id = ALL_MASTERS holds the total per status; unassigned requests
+    only appear there. version grows by one on every write to the row and is
+    never reset, so the sum over a set of rows only ever goes up: list ETags
+    are built from it (rows are kept at count 0 rather than deleted).
+    """
+
+    __tablename__ = "request_counters"
+
+    master_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
@@ -1,9 +1,11 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, String, Text, event, func, text
+from sqlalchemy.engine.default import DefaultExecutionContext
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.phones import normalize_phone
 from app.db.base import Base
 
 if TYPE_CHECKING:
@@ -11,8 +13,47 @@ if TYPE_CHECKING:
     from app.models.user import User
 
 
+# Statuses a request can still move out of; the partial index covers this work set.
+_ACTIVE_STATUSES_SQL = text("status IN ('new', 'assigned', 'in_progress')")
+
+
+def _normalized_phone(context: DefaultExecutionContext) -> str:
+    return normalize_phone(context.get_current_parameters()["client_phone"])
+
+
 class RepairRequest(Base):
     __tablename__ = "repair_requests"
+    # Composite indexes match "filter + ORDER BY created_at DESC, id DESC" lists
+    # (see migration 0003). List ETags come from request_counters.version.
+    __table_args__ = (
+        Index("ix_repair_requests_created_at_id", "created_at", "id"),
+        Index("ix_repair_requests_status_created_at_id", "status", "created_at", "id"),
+        Index(
+            "ix_repair_requests_master_id_created_at_id",
+            "master_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_repair_requests_active_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=_ACTIVE_STATUSES_SQL,
+            sqlite_where=_ACTIVE_STATUSES_SQL,
+        ),
+        # Duplicate check on intake: one range scan per fingerprint (migration 0009).
+        Index("ix_repair_requests_fingerprint_created_at", "fingerprint", "created_at"),
+        # Phone search is a prefix LIKE; pattern ops serve it under any collation
+        # (migration 0011).
+        Index(
+            "ix_repair_requests_client_phone_normalized",
+            "client_phone_normalized",
+            postgresql_ops={"client_phone_normalized": "varchar_pattern_ops"},
+        ),
+    )
+    # Fetch server defaults (created_at/updated_at) in the INSERT's RETURNING
+    # instead of a separate refresh SELECT.
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     description: Mapped[str] = mapped_column(Text)
@@ -21,12 +62,24 @@ class RepairRequest(Base):
     )
     client_name: Mapped[str] = mapped_column(String(255))
     client_phone: Mapped[str] = mapped_column(String(64))
+    # normalize_phone(client_phone), computed on every INSERT through SQLAlchemy
+    # (ORM and Core); nullable so migration 0011 could add it without a rewrite.
+    client_phone_normalized: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, default=_normalized_phone
+    )
     address: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     master_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("users.id"),
         nullable=True,
         index=True,
     )
+    # Normalized phone + description hash (duplicate_fingerprint()); NULL for
+    # requests created before migration 0009. duplicate_of_id points a flagged
+    # near-duplicate at the first request with the same fingerprint.
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("repair_requests.id"), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -47,3 +100,72 @@ class RepairRequest(Base):
         back_populates="request",
         foreign_keys="RequestAuditEvent.request_id",
     )
+
+
+# Search structures are not mapped columns: they are maintained by the database
+# and only used in WHERE clauses (RequestsRepository). Must match migration 0006
+# (its phone digits column was replaced by client_phone_normalized in 0011).
+#
+# Postgres: generated tsvector (Russian stemming) + GIN.
+_POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE repair_requests ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('russian', coalesce(client_name, '') || ' '
+            || coalesce(description, '') || ' ' || coalesce(address, ''))
+    ) STORED
+    """,
+    "CREATE INDEX ix_repair_requests_search_vector ON repair_requests "
+    "USING gin (search_vector)",
+]
+# SQLite (tests, local runs): external-content FTS5 table kept in sync by triggers.
+_SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE repair_requests_fts USING fts5(
+        client_name, description, address,
+        content='repair_requests', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER repair_requests_fts_ai AFTER INSERT ON repair_requests BEGIN
+        INSERT INTO repair_requests_fts (rowid, client_name, description, address)
+        VALUES (new.id, new.client_name, new.description, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER repair_requests_fts_ad AFTER DELETE ON repair_requests BEGIN
+        INSERT INTO repair_requests_fts
+            (repair_requests_fts, rowid, client_name, description, address)
+        VALUES ('delete', old.id, old.client_name, old.description, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER repair_requests_fts_au
+    AFTER UPDATE OF client_name, description, address ON repair_requests BEGIN
+        INSERT INTO repair_requests_fts
+            (repair_requests_fts, rowid, client_name, description, address)
+        VALUES ('delete', old.id, old.client_name, old.description, old.address);
+        INSERT INTO repair_requests_fts (rowid, client_name, description, address)
+        VALUES (new.id, new.client_name, new.description, new.address);
+    END
+    """,
+]
+
+for _statement in _POSTGRES_SEARCH_DDL:
+    event.listen(
+        RepairRequest.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+for _statement in _SQLITE_SEARCH_DDL:
+    event.listen(
+        RepairRequest.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    RepairRequest.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS repair_requests_fts").execute_if(dialect="sqlite"),
+)
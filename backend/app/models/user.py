@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 class User(Base):
     __tablename__ = "users"
+    # Server defaults come back in the INSERT's RETURNING, no refresh SELECT.
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     username: Mapped[str] = mapped_column(String(64), unique=True, index=True)
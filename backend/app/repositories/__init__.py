@@ -1,5 +1,18 @@
-from app.repositories.audit import AuditRepository
+from app.repositories.audit import AuditRepository, AuditWriter
+from app.repositories.changes import ChangeFeed
+from app.repositories.counters import CountersRepository
+from app.repositories.idempotency import IdempotencyKeyPurger, IdempotencyRepository
 from app.repositories.requests import RequestFilter, RequestsRepository
 from app.repositories.users import UsersRepository
 
-__all__ = ["AuditRepository", "UsersRepository", "RequestsRepository", "RequestFilter"]
+__all__ = [
+    "AuditRepository",
+    "AuditWriter",
+    "ChangeFeed",
+    "CountersRepository",
+    "IdempotencyKeyPurger",
+    "IdempotencyRepository",
+    "UsersRepository",
+    "RequestsRepository",
+    "RequestFilter",
+]
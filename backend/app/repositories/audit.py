@@ -1,9 +1,48 @@
-from typing import Optional
+import asyncio
+import logging
+from collections.abc import Collection
+from datetime import datetime, timezone
+from typing import Any, Optional
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
 
+from app.core.settings import settings
 from app.models import RequestAuditEvent
+from app.repositories.audit_archive import get_archive
+
+logger = logging.getLogger(__name__)
+
+_audit = RequestAuditEvent.__table__
+
+# session.info key holding audit rows staged in the current unit of work
+_PENDING_KEY = "audit_pending"
+# rows handed to the background writer once the transaction has committed
+_COMMITTED_KEY = "audit_committed"
+
+
+def stage_event(
+    session: AsyncSession,
+    request_id: int,
+    action: str,
+    *,
+    actor_id: Optional[int] = None,
+    actor_username: Optional[str] = None,
+    old_status: Optional[str] = None,
+    new_status: Optional[str] = None,
+) -> None:
+    """Queue an audit row; it is written when the session commits (hooks below)."""
+    session.info.setdefault(_PENDING_KEY, []).append(
+        {
+            "request_id": request_id,
+            "action": action,
+            "actor_id": actor_id,
+            "actor_username": actor_username,
+            "old_status": old_status,
+            "new_status": new_status,
+        }
+    )
 
 
 class AuditRepository:
@@ -19,19 +58,17 @@ class AuditRepository:
         actor_username: Optional[str] = None,
         old_status: Optional[str] = None,
         new_status: Optional[str] = None,
-    ) -> RequestAuditEvent:
-        event = RequestAuditEvent(
-            request_id=request_id,
-            action=action,
+    ) -> None:
+        """Stage an event for this unit of work. No round trip until commit."""
+        stage_event(
+            self._session,
+            request_id,
+            action,
             actor_id=actor_id,
             actor_username=actor_username,
             old_status=old_status,
             new_status=new_status,
         )
-        self._session.add(event)
-        await self._session.flush()
-        await self._session.refresh(event)
-        return event
 
     async def list_events(self, request_id: int) -> list[RequestAuditEvent]:
         stmt = (
@@ -41,3 +78,159 @@ class AuditRepository:
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
+
+    async def list_archived_events(self, request_id: int) -> list[dict[str, Any]]:
+        """Rows of the request moved to AUDIT_ARCHIVE_DIR by audit retention.
+
+        All of them are older than any row still in the table.
+        """
+        archive = get_archive(settings.AUDIT_ARCHIVE_DIR)
+        return await asyncio.to_thread(archive.events_for, request_id)
+
+    async def list_events_for(
+        self, request_ids: Collection[int]
+    ) -> list[RequestAuditEvent]:
+        """Events of many requests in one query, by request then time."""
+        stmt = (
+            select(RequestAuditEvent)
+            .where(RequestAuditEvent.request_id.in_(list(request_ids)))
+            .order_by(
+                RequestAuditEvent.request_id,
+                RequestAuditEvent.created_at.asc(),
+                RequestAuditEvent.id,
+            )
+        )
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def history_version(self, request_id: int) -> tuple[int, Optional[datetime]]:
+        """(event count, last created_at) from the (request_id, created_at) index.
+
+        The log is append-only, so this changes exactly when the history does.
+        """
+        stmt = select(func.count(), func.max(RequestAuditEvent.created_at)).where(
+            RequestAuditEvent.request_id == request_id
+        )
+        row = (await self._session.execute(stmt)).one()
+        return row[0], row[1]
+
+
+class AuditWriter:
+    """Write-behind for audit rows: batches of batch_size or every flush_interval_ms.
+
+    Rows are enqueued only after their transaction commits, so a crash can lose
+    at most the rows still in the queue. When the queue is full, sessions fall
+    back to writing inline at commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int = 500,
+        flush_interval_ms: int = 200,
+        max_queue: int = 10000,
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_ms / 1000
+        self._max_queue = max_queue
+        # Unbounded: capacity is checked before commit, submit must never fail after.
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def has_capacity(self, count: int) -> bool:
+        return self._max_queue - self._queue.qsize() >= count
+
+    def submit(self, rows: list[dict[str, Any]]) -> None:
+        for row in rows:
+            self._queue.put_nowait(row)
+        if self._queue.qsize() >= self._batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        global _writer
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        _writer = self
+
+    async def stop(self) -> None:
+        """Stop accepting rows, then write whatever is still queued."""
+        global _writer
+        if _writer is self:
+            _writer = None
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def _drain(self, limit: int) -> list[dict[str, Any]]:
+        rows = []
+        while len(rows) < limit and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def _run(self) -> None:
+        # Flush a full batch as soon as it is queued, otherwise every interval.
+        while True:
+            if self._queue.qsize() < self._batch_size and not self._stopping:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            rows = self._drain(self._batch_size)
+            if rows:
+                await self._write(rows)
+            elif self._stopping:
+                return
+
+    async def _write(self, rows: list[dict[str, Any]]) -> None:
+        try:
+            async with self._session_factory() as session:
+                await session.execute(insert(_audit).values(rows))
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to write %d audit events", len(rows))
+
+
+_writer: Optional[AuditWriter] = None
+
+
+# Audit sink: rows staged via stage_event() are written when the session commits,
+# either inline as one multi-row INSERT or, with a running AuditWriter, after
+# the commit from the write-behind queue.
+
+
+@event.listens_for(Session, "before_commit")
+def _write_staged_events(session: Session) -> None:
+    rows = session.info.pop(_PENDING_KEY, None)
+    if not rows:
+        return
+    writer = _writer
+    if writer is not None and writer.has_capacity(len(rows)):
+        session.info[_COMMITTED_KEY] = (writer, rows)
+        return
+    session.flush()
+    session.execute(insert(_audit).values(rows))
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_committed_events(session: Session) -> None:
+    staged = session.info.pop(_COMMITTED_KEY, None)
+    if not staged:
+        return
+    writer, rows = staged
+    created_at = datetime.now(timezone.utc)
+    for row in rows:
+        row["created_at"] = created_at
+    writer.submit(rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_staged_events(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+from collections.abc import AsyncIterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+# Uncompressed size of one gzip member; the unit read back for a lookup.
+_BLOCK_BYTES = 64 * 1024
+
+_DATA_SUFFIX = ".ndjson.gz"
+_INDEX_SUFFIX = ".idx.json"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+class AuditArchive:
+    """Archived audit partitions on local disk.
+
+    <name>.ndjson.gz is a sequence of independent gzip members of ~64 KiB of
+    NDJSON each (the file as a whole still reads with zcat). Rows are sorted
+    by request_id, and <name>.idx.json lists [min_request_id, max_request_id,
+    offset, length] per member, so one request's history costs one or two
+    small reads and decompressions per archive instead of a full scan. The
+    index is written last: an archive without it is incomplete and ignored.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._dir = Path(directory)
+        # name -> (index mtime, blocks)
+        self._indexes: dict[str, tuple[float, list[list[int]]]] = {}
+
+    def names(self) -> list[str]:
+        if not self._dir.is_dir():
+            return []
+        return sorted(
+            path.name[: -len(_INDEX_SUFFIX)]
+            for path in self._dir.glob(f"*{_INDEX_SUFFIX}")
+        )
+
+    async def write(
+        self,
+        name: str,
+        rows: AsyncIterator[dict[str, Any]],
+        **meta: Any,
+    ) -> int:
+        """Write rows (ordered by request_id) as archive name; returns the row count.
+
+        Overwrites a previous archive of the same name, so an interrupted
+        retention run can simply be repeated.
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+        data_path = self._dir / f"{name}{_DATA_SUFFIX}"
+        index_path = self._dir / f"{name}{_INDEX_SUFFIX}"
+        index_path.unlink(missing_ok=True)
+        blocks: list[list[int]] = []
+        count = 0
+        tmp_path = data_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as out:
+            pending: list[bytes] = []
+            size = 0
+            first_id = last_id = 0
+
+            def flush() -> None:
+                offset = out.tell()
+                out.write(gzip.compress(b"".join(pending), mtime=0))
+                blocks.append([first_id, last_id, offset, out.tell() - offset])
+
+            async for row in rows:
+                line = json.dumps(
+                    row,
+                    default=_json_default,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+                data = line.encode("utf-8") + b"\n"
+                if not pending:
+                    first_id = row["request_id"]
+                pending.append(data)
+                size += len(data)
+                last_id = row["request_id"]
+                count += 1
+                if size >= _BLOCK_BYTES:
+                    flush()
+                    pending.clear()
+                    size = 0
+            if pending:
+                flush()
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, data_path)
+        index = {"name": name, "rows": count, "blocks": blocks, **meta}
+        tmp_index = index_path.with_suffix(".tmp")
+        tmp_index.write_text(json.dumps(index, default=_json_default))
+        os.replace(tmp_index, index_path)
+        return count
+
+    def events_for(self, request_id: int) -> list[dict[str, Any]]:
+        """Archived rows of one request from every archive (blocking file IO)."""
+        events: list[dict[str, Any]] = []
+        for name in self.names():
+            blocks = self._blocks(name)
+            wanted = [b for b in blocks if b[0] <= request_id <= b[1]]
+            if not wanted:
+                continue
+            with open(self._dir / f"{name}{_DATA_SUFFIX}", "rb") as data:
+                for _first, _last, offset, length in wanted:
+                    data.seek(offset)
+                    for line in gzip.decompress(data.read(length)).splitlines():
+                        row = json.loads(line)
+                        if row["request_id"] == request_id:
+                            events.append(row)
+        return events
+
+    def _blocks(self, name: str) -> list[list[int]]:
+        path = self._dir / f"{name}{_INDEX_SUFFIX}"
+        mtime = path.stat().st_mtime
+        cached = self._indexes.get(name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, json.loads(path.read_text())["blocks"])
+            self._indexes[name] = cached
+        return cached[1]
+
+
+_archives: dict[str, AuditArchive] = {}
+
+
+def get_archive(directory: str) -> AuditArchive:
+    """Shared instance per directory, so block indexes are parsed once."""
+    archive = _archives.get(directory)
+    if archive is None:
+        archive = _archives[directory] = AuditArchive(directory)
+    return archive
@@ -0,0 +1,148 @@
+import re
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARENT = "request_audit_events"
+
+# Upper bound in pg_get_expr(relpartbound): FOR VALUES FROM (...) TO ('...')
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(day: date, months: int = 0) -> date:
+    """First day of the month `months` away from the month of day."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def _parse_bound(value: str) -> datetime:
+    # Postgres prints "2026-11-01 00:00:00+00"; fromisoformat wants "+00:00".
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+class AuditPartitions:
+    """Monthly range partitions of request_audit_events (PostgreSQL only).
+
+    The table is PARTITION BY RANGE (created_at) since migration 0007, so
+    every partition has its own small indexes and autovacuum works on the
+    current month only; old months are archived and dropped whole.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def ensure_months(self, first: date, count: int) -> list[str]:
+        """Create missing partitions for count months from first; returns new names.
+
+        Months below the highest existing upper bound are already covered
+        (migration 0007 attaches the legacy table FROM (MINVALUE) TO next
+        month), so creating them would overlap; only later months are added.
+        Events of a new month that already landed in DEFAULT are moved into
+        its partition. Caller commits.
+        """
+        partitions = await self.list_partitions()
+        existing = {name for name, _upper in partitions}
+        bounds = [upper.date() for _name, upper in partitions if upper is not None]
+        covered = max(bounds, default=None)
+        default = next((name for name, upper in partitions if upper is None), None)
+        created = []
+        for offset in range(count):
+            start = month_start(first, offset)
+            name = partition_name(start)
+            if name in existing or (covered is not None and start < covered):
+                continue
+            await self._create(name, start, month_start(start, 1), default)
+            created.append(name)
+        return created
+
+    async def _create(
+        self, name: str, start: date, end: date, default: Optional[str]
+    ) -> None:
+        bounds = (
+            f"FOR VALUES FROM ('{start:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{end:%Y-%m-%d} 00:00:00+00')"
+        )
+        in_range = (
+            f"created_at >= '{start:%Y-%m-%d} 00:00:00+00' "
+            f"AND created_at < '{end:%Y-%m-%d} 00:00:00+00'"
+        )
+        if default is not None:
+            # PARTITION OF fails if DEFAULT holds rows of the new range. New
+            # rows are kept out of DEFAULT (reads go on) until commit; the lock
+            # is no stronger than the one creating the partition takes anyway.
+            await self._session.execute(text(f"LOCK TABLE {default} IN EXCLUSIVE MODE"))
+            stranded = await self._session.scalar(
+                text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")
+            )
+            if stranded:
+                # Move them into a standalone table, then attach it: ATTACH
+                # checks DEFAULT no longer has rows in the range.
+                await self._session.execute(
+                    text(
+                        f"CREATE TABLE {name} "
+                        f"(LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                )
+                await self._session.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {default} WHERE {in_range} "
+                        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+                    )
+                )
+                await self._session.execute(
+                    text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}")
+                )
+                return
+        await self._session.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {PARENT} {bounds}")
+        )
+
+    async def list_partitions(self) -> list[tuple[str, Optional[datetime]]]:
+        """(name, exclusive upper bound) per partition; None for DEFAULT."""
+        result = await self._session.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+            ),
+            {"parent": PARENT},
+        )
+        partitions = []
+        for name, bound in result:
+            match = _UPPER_BOUND.search(bound or "")
+            partitions.append((name, _parse_bound(match.group(1)) if match else None))
+        return partitions
+
+    async def stream_rows(
+        self, name: str, *, batch_size: int = 5000
+    ) -> AsyncIterator[dict[str, Any]]:
+        """All rows of one partition by (request_id, created_at, id), server-side cursor."""
+        result = await self._session.stream(
+            text(
+                "SELECT id, request_id, action, actor_id, actor_username, "
+                f"old_status, new_status, created_at FROM {name} "
+                "ORDER BY request_id, created_at, id"
+            ).execution_options(yield_per=batch_size)
+        )
+        async for row in result.mappings():
+            yield dict(row)
+
+    async def drop(self, name: str) -> None:
+        """Detach and drop one partition. Caller commits."""
+        await self._session.execute(
+            text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        )
+        await self._session.execute(text(f"DROP TABLE {name}"))
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
@@ -0,0 +1,72 @@
+import json
+from typing import Any
+
+from sqlalchemy import Text, bindparam, event, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.broker import MAX_NOTIFY_BYTES, RESYNC_MESSAGE, get_broker
+
+# session.info keys: messages staged in the current unit of work, and the ones
+# to hand to an in-process broker once the transaction has committed
+_PENDING_KEY = "changes_pending"
+_COMMITTED_KEY = "changes_committed"
+
+
+class ChangeFeed:
+    """Publishes request change events when the session commits.
+
+    Nothing is sent for a rolled back transaction, and subscribers never see
+    a change before it is visible to their own reads.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    def publish(self, event_type: str, request: dict[str, Any]) -> None:
+        """Stage {"type": event_type, "request": request}; request is JSON-ready."""
+        message = json.dumps(
+            {"type": event_type, "request": request},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        if len(message.encode("utf-8")) > MAX_NOTIFY_BYTES:
+            # Oversized rows (long descriptions) do not fit a NOTIFY payload.
+            message = RESYNC_MESSAGE
+        self._session.info.setdefault(_PENDING_KEY, []).append(message)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_staged_changes(session: Session) -> None:
+    messages = session.info.pop(_PENDING_KEY, None)
+    if not messages:
+        return
+    broker = get_broker()
+    if not broker.transactional:
+        session.info[_COMMITTED_KEY] = (broker, messages)
+        return
+    # NOTIFY is queued by Postgres and only delivered if this transaction commits.
+    # One round trip for the whole unit of work; unnest keeps the array order.
+    staged = func.unnest(
+        bindparam("messages", messages, type_=ARRAY(Text))
+    ).table_valued("message")
+    session.execute(
+        select(func.pg_notify(broker.channel, staged.c.message)).select_from(staged)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed_changes(session: Session) -> None:
+    staged = session.info.pop(_COMMITTED_KEY, None)
+    if not staged:
+        return
+    broker, messages = staged
+    for message in messages:
+        broker.deliver(message)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_staged_changes(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
@@ -0,0 +1,161 @@
+from collections import Counter
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, literal, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ALL_MASTERS, RepairRequest, RequestCounter, User
+
+_counters = RequestCounter.__table__
+_requests = RepairRequest.__table__
+_users = User.__table__
+
+CounterKey = tuple[int, str]
+
+
+def counter_deltas(
+    old_status: Optional[str],
+    old_master_id: Optional[int],
+    new_status: str,
+    new_master_id: Optional[int],
+) -> dict[CounterKey, int]:
+    """Counter changes for a request moving between (status, master) states.
+
+    old_status None means the request is new. Keys that cancel out are dropped.
+    """
+    deltas: Counter[CounterKey] = Counter()
+    if old_status is not None:
+        deltas[(ALL_MASTERS, old_status)] -= 1
+        if old_master_id is not None:
+            deltas[(old_master_id, old_status)] -= 1
+    deltas[(ALL_MASTERS, new_status)] += 1
+    if new_master_id is not None:
+        deltas[(new_master_id, new_status)] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+class CountersRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def apply(self, deltas: dict[CounterKey, int]) -> None:
+        """Add deltas to the counters in one INSERT ... ON CONFLICT DO UPDATE.
+
+        Rows are written in key order, so two transactions touching the same
+        counters lock them in the same order and cannot deadlock. Each touched
+        row's version is bumped (see list_version).
+        """
+        if not deltas:
+            return
+        dialect = self._session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(_counters).values(
+            [
+                {
+                    "master_id": master_id,
+                    "status": status,
+                    "count": delta,
+                    "version": 1,
+                }
+                for (master_id, status), delta in sorted(deltas.items())
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_counters.c.master_id, _counters.c.status],
+            set_={
+                "count": _counters.c.count + stmt.excluded["count"],
+                "version": _counters.c.version + 1,
+            },
+        )
+        await self._session.execute(stmt)
+
+    async def list_counts(self) -> list[dict[str, Any]]:
+        """Non-zero counters with the master's username (None for totals)."""
+        stmt = (
+            select(
+                _counters.c.master_id,
+                _counters.c.status,
+                _counters.c.count,
+                _users.c.username,
+            )
+            .select_from(
+                _counters.outerjoin(_users, _users.c.id == _counters.c.master_id)
+            )
+            .where(_counters.c.count != 0)
+            .order_by(_counters.c.master_id, _counters.c.status)
+        )
+        result = await self._session.execute(stmt)
+        return [row._asdict() for row in result]
+
+    async def list_version(
+        self, master_id: Optional[int] = None, status: Optional[str] = None
+    ) -> int:
+        """Sum of versions of the counters covering a request list.
+
+        Every write to a request goes through apply() in its own transaction
+        and touches the (master, status) rows it leaves and enters, so the sum
+        grows with each committed change to the list, whatever the clock
+        resolution or commit order. master_id None: all requests (totals rows).
+        """
+        stmt = select(func.coalesce(func.sum(_counters.c.version), 0)).where(
+            _counters.c.master_id == (ALL_MASTERS if master_id is None else master_id)
+        )
+        if status is not None:
+            stmt = stmt.where(_counters.c.status == status)
+        return int((await self._session.execute(stmt)).scalar_one())
+
+    async def rebuild(self) -> list[tuple[int, str, int, int]]:
+        """Recount everything from repair_requests. Caller commits.
+
+        Returns the drifted counters as (master_id, status, stored, actual).
+        On Postgres request writes are blocked (reads are not) until commit,
+        so no transition can slip between the recount and the rewrite.
+        Versions carry over bumped and stale rows stay at count 0, so list
+        ETags still change.
+        """
+        if self._session.get_bind().dialect.name == "postgresql":
+            await self._session.execute(
+                text("LOCK TABLE repair_requests IN SHARE MODE")
+            )
+        recount = union_all(
+            select(
+                literal(ALL_MASTERS).label("master_id"),
+                _requests.c.status,
+                func.count().label("count"),
+            ).group_by(_requests.c.status),
+            select(_requests.c.master_id, _requests.c.status, func.count())
+            .where(_requests.c.master_id.is_not(None))
+            .group_by(_requests.c.master_id, _requests.c.status),
+        )
+        actual = {
+            (row.master_id, row.status): row.count
+            for row in await self._session.execute(recount)
+        }
+        stored = {}
+        versions = {}
+        for row in await self._session.execute(select(_counters)):
+            stored[(row.master_id, row.status)] = row.count
+            versions[(row.master_id, row.status)] = row.version
+        await self._session.execute(delete(_counters))
+        keys = sorted(stored.keys() | actual.keys())
+        if keys:
+            await self._session.execute(
+                _counters.insert(),
+                [
+                    {
+                        "master_id": master_id,
+                        "status": status,
+                        "count": actual.get((master_id, status), 0),
+                        "version": versions.get((master_id, status), 0) + 1,
+                    }
+                    for master_id, status in keys
+                ],
+            )
+        drift = []
+        for master_id, status in keys:
+            before = stored.get((master_id, status), 0)
+            after = actual.get((master_id, status), 0)
+            if before != after:
+                drift.append((master_id, status, before, after))
+        return drift
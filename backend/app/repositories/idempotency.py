@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.errors import DomainError
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+_keys = IdempotencyKey.__table__
+
+# Each miss means the row was purged between claim's two statements; several
+# in a row is a key being churned by other calls, not bad luck.
+_CLAIM_ATTEMPTS = 3
+
+MSG_KEY_BUSY = "Ключ идемпотентности занят, повторите запрос позже"
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: Optional[int]
+    body: Optional[bytes]
+
+
+class IdempotencyRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def claim(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        *,
+        now: datetime,
+        expires_at: datetime,
+    ) -> Optional[StoredResponse]:
+        """Insert the key for this transaction; None when it is ours to run.
+
+        Otherwise returns the row stored by the call that owns the key. A
+        concurrent call with the same key waits on the primary key until the
+        owner commits (then gets its row) or rolls back (then owns the key):
+        duplicates are collapsed by the constraint, not by reading first.
+        An expired row is taken over in the same statement. Raises 409 when
+        the row keeps disappearing between the insert and the lookup.
+        """
+        dialect = self._session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(_keys).values(
+            scope=scope, key=key, fingerprint=fingerprint, expires_at=expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_keys.c.scope, _keys.c.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "response_body": None,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=_keys.c.expires_at <= now,
+        ).returning(_keys.c.key)
+        lookup = select(
+            _keys.c.fingerprint, _keys.c.status_code, _keys.c.response_body
+        ).where(_keys.c.scope == scope, _keys.c.key == key)
+        for _attempt in range(_CLAIM_ATTEMPTS):
+            if (await self._session.execute(stmt)).first() is not None:
+                return None
+            row = (await self._session.execute(lookup)).first()
+            if row is not None:
+                return StoredResponse(*row)
+            # Purged between the two statements: try to insert it again.
+        raise DomainError(
+            409, "idempotency_key_busy", MSG_KEY_BUSY, headers={"Retry-After": "1"}
+        )
+
+    async def save(self, scope: str, key: str, status_code: int, body: bytes) -> None:
+        """Store the response of a claimed key; committed with the call itself."""
+        await self._session.execute(
+            update(_keys)
+            .where(_keys.c.scope == scope, _keys.c.key == key)
+            .values(status_code=status_code, response_body=body)
+        )
+
+    async def purge_expired(self, now: datetime) -> int:
+        result = await self._session.execute(
+            delete(_keys).where(_keys.c.expires_at <= now)
+        )
+        return result.rowcount or 0
+
+
+class IdempotencyKeyPurger:
+    """Deletes expired idempotency keys every interval_seconds (0 = never).
+
+    Expired rows are already ignored (claim() takes them over); this only
+    keeps the table small. Safe to run in every worker.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval_seconds: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval_seconds
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self._interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                async with self._session_factory() as session:
+                    deleted = await IdempotencyRepository(session).purge_expired(
+                        datetime.now(timezone.utc)
+                    )
+                    await session.commit()
+                if deleted:
+                    logger.info("Purged %d expired idempotency keys", deleted)
+            except Exception:
+                logger.exception("Failed to purge idempotency keys")
@@ -1,34 +1,220 @@
-from typing import Optional
+import re
+from collections.abc import AsyncIterator, Collection
+from datetime import datetime
+from typing import Any, Optional
 
-from sqlalchemy import select, update
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Integer,
+    RowMapping,
+    Select,
+    String,
+    cast,
+    exists,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.models import RepairRequest
+from app.core.phones import normalize_phone, phone_search_prefixes
+from app.models import RepairRequest, RequestAuditEvent, User
+from app.repositories.audit import stage_event
+
+_requests = RepairRequest.__table__
+_audit = RequestAuditEvent.__table__
+_users = User.__table__
+
+# Columns returned by transitions; keys match RequestRead field names.
+_READ_COLUMNS = (
+    "id",
+    "client_name",
+    "client_phone",
+    "description",
+    "address",
+    "status",
+    "master_id",
+    "duplicate_of_id",
+    "created_at",
+    "updated_at",
+)
 
 
 class RequestFilter:
-    """Filter for list_requests. All fields optional."""
+    """Filter for list_requests. All fields optional.
+
+    limit/after_id enable keyset pagination over (created_at, id) DESC:
+    after_id is the id of the last row of the previous page.
+    created_from/created_to bound created_at as [from, to).
+    q matches words (prefixes) in client_name/description/address; phone
+    matches requests whose normalized phone starts with the given digits
+    (+7 / 8 prefixes ignored, see phone_search_prefixes).
+    """
 
     def __init__(
         self,
         status: Optional[str] = None,
         master_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        q: Optional[str] = None,
+        phone: Optional[str] = None,
     ) -> None:
         self.status = status
         self.master_id = master_id
+        self.limit = limit
+        self.after_id = after_id
+        self.created_from = created_from
+        self.created_to = created_to
+        self.q = q
+        self.phone = phone
+
+
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def search_terms(q: str) -> list[str]:
+    """Words of a free-text query; punctuation and query syntax are dropped."""
+    return _SEARCH_TERM.findall(q.lower())
+
+
+def _text_search(terms: list[str], dialect: str) -> ColumnElement[bool]:
+    """All terms as word prefixes, served by the GIN / FTS5 index (migration 0006)."""
+    if dialect == "postgresql":
+        # Russian stemming of each prefix: "ленина" also finds "Ленину".
+        query = " & ".join(f"{term}:*" for term in terms)
+        return literal_column("repair_requests.search_vector").bool_op("@@")(
+            func.to_tsquery(literal_column("'russian'::regconfig"), query)
+        )
+    query = " ".join(f'"{term}"*' for term in terms)
+    matches = text(
+        "SELECT rowid FROM repair_requests_fts WHERE repair_requests_fts MATCH :fts"
+    ).bindparams(fts=query)
+    return _requests.c.id.in_(matches.columns(literal_column("rowid", Integer)))
+
+
+def _phone_search(query: str) -> ColumnElement[bool]:
+    """Prefix LIKE on client_phone_normalized (btree, varchar_pattern_ops)."""
+    column = _requests.c.client_phone_normalized
+    return or_(*(column.like(f"{prefix}%") for prefix in phone_search_prefixes(query)))
+
+
+def _apply_filter(
+    stmt: Select[Any], filter_: Optional[RequestFilter], dialect: str
+) -> Select[Any]:
+    """WHERE clauses of the filter; limit/after_id are left to the caller."""
+    if filter_ is None:
+        return stmt
+    if filter_.status is not None:
+        stmt = stmt.where(_requests.c.status == filter_.status)
+    if filter_.master_id is not None:
+        stmt = stmt.where(_requests.c.master_id == filter_.master_id)
+    if filter_.created_from is not None:
+        stmt = stmt.where(_requests.c.created_at >= filter_.created_from)
+    if filter_.created_to is not None:
+        stmt = stmt.where(_requests.c.created_at < filter_.created_to)
+    if filter_.q is not None:
+        terms = search_terms(filter_.q)
+        if terms:
+            stmt = stmt.where(_text_search(terms, dialect))
+    if filter_.phone is not None:
+        stmt = stmt.where(_phone_search(filter_.phone))
+    return stmt
+
+
+def _seek_after(after_id: int) -> ColumnElement[bool]:
+    """Keyset predicate: rows strictly after the anchor row in (created_at, id) DESC.
+
+    The anchor's created_at is read from the row itself (PK lookup in the same
+    statement), so the cursor never round-trips a timestamp through the client
+    and stays exact regardless of driver precision or timezone handling.
+    """
+    anchor = select(RepairRequest.created_at).where(RepairRequest.id == after_id)
+    return tuple_(RepairRequest.created_at, RepairRequest.id) < tuple_(
+        anchor.scalar_subquery(), after_id
+    )
+
+
+class TransitionResult:
+    """Outcome of RequestsRepository.transition.
+
+    current_status is None when the request does not exist. request is the
+    updated row (RequestRead field names) or None when the guarded UPDATE
+    matched nothing: either the transition is not allowed from current_status
+    or the row changed concurrently.
+    """
+
+    def __init__(
+        self,
+        current_status: Optional[str],
+        current_master_id: Optional[int],
+        request: Optional[dict[str, Any]],
+    ) -> None:
+        self.current_status = current_status
+        self.current_master_id = current_master_id
+        self.request = request
+
+
+def _transition_guard(
+    status: ColumnElement[Any],
+    master_id: ColumnElement[Any],
+    from_statuses: Collection[str],
+    owner_id: Optional[int],
+) -> ColumnElement[bool]:
+    """Allowed-source check; owner_id additionally requires unassigned or own row."""
+    guard = status.in_(list(from_statuses))
+    if owner_id is not None:
+        guard = guard & or_(master_id.is_(None), master_id == owner_id)
+    return guard
+
+
+_masters = _users.alias("masters")
+
+
+def _master_username() -> Any:
+    """Correlated lookup of the master's username, usable in UPDATE ... RETURNING.
+
+    Both sides are qualified by hand: SQLite renders RETURNING columns without
+    their table, which would compile the correlation to WHERE id = master_id.
+    """
+    return (
+        select(_masters.c.username)
+        .where(
+            literal_column(f"{_masters.name}.id", Integer)
+            == literal_column(f"{_requests.name}.master_id", Integer)
+        )
+        .scalar_subquery()
+        .label("assigned_to_username")
+    )
 
 
 class RequestsRepository:
     def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
+    @property
+    def _dialect(self) -> str:
+        return self._session.get_bind().dialect.name
+
     async def create_request_public(
         self,
         client_name: str,
         client_phone: str,
         description: str,
         address: Optional[str] = None,
+        *,
+        fingerprint: Optional[str] = None,
+        duplicate_of_id: Optional[int] = None,
     ) -> RepairRequest:
         req = RepairRequest(
             client_name=client_name,
@@ -36,97 +222,456 @@ class RequestsRepository:
             description=description,
             address=address,
             status="new",
+            fingerprint=fingerprint,
+            duplicate_of_id=duplicate_of_id,
         )
         self._session.add(req)
+        # eager_defaults: server defaults come back via INSERT ... RETURNING
         await self._session.flush()
-        await self._session.refresh(req)
         return req
 
+    async def exists_with_phones(self, phones: Collection[str]) -> bool:
+        """Whether any request has one of these phones (formatting ignored).
+
+        A single EXISTS over the client_phone_normalized index.
+        """
+        normalized = {normalize_phone(phone) for phone in phones}
+        stmt = select(
+            exists()
+            .select_from(_requests)
+            .where(_requests.c.client_phone_normalized.in_(normalized))
+        )
+        result = await self._session.execute(stmt)
+        return bool(result.scalar())
+
+    async def lock_fingerprint(self, fingerprint: str) -> None:
+        """Serialize duplicate checks of one fingerprint until commit (Postgres).
+
+        A transaction-level advisory lock on 64 bits of the hash: a concurrent
+        submission of the same fingerprint waits here until this one commits,
+        and its find_duplicate then sees the new row. No-op on SQLite (tests
+        and development, one process).
+        """
+        if self._dialect != "postgresql":
+            return
+        key = int.from_bytes(bytes.fromhex(fingerprint[:16]), "big", signed=True)
+        await self._session.execute(
+            select(func.pg_advisory_xact_lock(literal(key, BigInteger)))
+        )
+
+    async def find_duplicate(
+        self, fingerprint: str, *, since: datetime, statuses: Collection[str]
+    ) -> Optional[RepairRequest]:
+        """Latest request with this fingerprint created at or after since.
+
+        One range scan of ix_repair_requests_fingerprint_created_at; the master
+        is joined in the same SELECT so the result can be serialized as is.
+        """
+        stmt = (
+            select(RepairRequest)
+            .where(
+                RepairRequest.fingerprint == fingerprint,
+                RepairRequest.created_at >= since,
+                RepairRequest.status.in_(statuses),
+            )
+            .order_by(RepairRequest.created_at.desc(), RepairRequest.id.desc())
+            .limit(1)
+            .options(joinedload(RepairRequest.master))
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().first()
+
     async def list_requests(
         self,
         filter_: Optional[RequestFilter] = None,
-    ) -> list[RepairRequest]:
+    ) -> list[dict[str, Any]]:
+        """Rows as dicts keyed by RequestRead field names, master username joined.
+
+        Plain columns instead of ORM entities: no identity map, no selectinload
+        round trip, and the dicts go straight into the list serializer.
+        """
         stmt = (
-            select(RepairRequest)
-            .options(selectinload(RepairRequest.master))
-            .order_by(RepairRequest.created_at.desc())
+            select(
+                *(_requests.c[name] for name in _READ_COLUMNS),
+                _users.c.username.label("assigned_to_username"),
+            )
+            .select_from(
+                _requests.outerjoin(_users, _users.c.id == _requests.c.master_id)
+            )
+            .order_by(_requests.c.created_at.desc(), _requests.c.id.desc())
         )
+        stmt = _apply_filter(stmt, filter_, self._dialect)
         if filter_:
-            if filter_.status is not None:
-                stmt = stmt.where(RepairRequest.status == filter_.status)
-            if filter_.master_id is not None:
-                stmt = stmt.where(RepairRequest.master_id == filter_.master_id)
+            if filter_.after_id is not None:
+                stmt = stmt.where(_seek_after(filter_.after_id))
+            if filter_.limit is not None:
+                stmt = stmt.limit(filter_.limit)
         result = await self._session.execute(stmt)
-        return list(result.scalars().all())
+        return [row._asdict() for row in result]
+
+    async def stream_with_history(
+        self,
+        filter_: Optional[RequestFilter] = None,
+        *,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[RowMapping]:
+        """Requests LEFT JOIN their audit events, ordered by (request id, event id).
+
+        Read through a server-side cursor batch_size rows at a time, so memory
+        does not grow with the result. Audit columns are prefixed with event_
+        and are NULL for a request without events.
+        """
+        stmt = (
+            select(
+                *(_requests.c[name] for name in _READ_COLUMNS),
+                _users.c.username.label("assigned_to_username"),
+                _audit.c.id.label("event_id"),
+                _audit.c.action.label("event_action"),
+                _audit.c.actor_username.label("event_actor_username"),
+                _audit.c.old_status.label("event_old_status"),
+                _audit.c.new_status.label("event_new_status"),
+                _audit.c.created_at.label("event_created_at"),
+            )
+            .select_from(
+                _requests.outerjoin(
+                    _users, _users.c.id == _requests.c.master_id
+                ).outerjoin(_audit, _audit.c.request_id == _requests.c.id)
+            )
+            .order_by(_requests.c.id, _audit.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self._session.stream(_apply_filter(stmt, filter_, self._dialect))
+        async for row in result.mappings():
+            yield row
 
     async def get_by_id(self, request_id: int) -> Optional[RepairRequest]:
         stmt = select(RepairRequest).where(RepairRequest.id == request_id)
         result = await self._session.execute(stmt)
         return result.scalars().first()
 
-    async def assign_master(
+    async def get_detail(
+        self, request_id: int, *, with_history: bool = False
+    ) -> Optional[RepairRequest]:
+        """Request with its master joined; audit_events loaded by one extra
+        SELECT ... IN when with_history."""
+        stmt = (
+            select(RepairRequest)
+            .where(RepairRequest.id == request_id)
+            .options(joinedload(RepairRequest.master))
+        )
+        if with_history:
+            stmt = stmt.options(selectinload(RepairRequest.audit_events))
+        result = await self._session.execute(stmt)
+        return result.scalars().first()
+
+    async def transition(
         self,
         request_id: int,
-        master_id: int,
-    ) -> Optional[RepairRequest]:
-        req = await self.get_by_id(request_id)
-        if not req:
-            return None
-        req.master_id = master_id
-        req.status = "assigned"
-        await self._session.flush()
-        await self._session.refresh(req)
-        return req
+        *,
+        to_status: str,
+        from_statuses: Collection[str],
+        set_master_id: Optional[int] = None,
+        owner_id: Optional[int] = None,
+        audit_action: Optional[str] = None,
+        actor_id: Optional[int] = None,
+        actor_username: Optional[str] = None,
+    ) -> TransitionResult:
+        """Guarded status change + audit row + master username in one statement.
 
-    async def cancel(self, request_id: int) -> Optional[RepairRequest]:
-        req = await self.get_by_id(request_id)
-        if not req:
-            return None
-        req.status = "cancelled"
-        await self._session.flush()
-        await self._session.refresh(req)
-        return req
+        The UPDATE only matches when the current status is in from_statuses and
+        the row still equals the snapshot it was checked against, so concurrent
+        changes surface as "no row updated" instead of a lost update.
+        """
+        values: dict[str, Any] = {"status": to_status}
+        if set_master_id is not None:
+            values["master_id"] = set_master_id
+        if self._session.get_bind().dialect.name == "postgresql":
+            return await self._transition_cte(
+                request_id,
+                values,
+                from_statuses,
+                owner_id,
+                audit_action,
+                actor_id,
+                actor_username,
+            )
+        return await self._transition_sequential(
+            request_id,
+            values,
+            from_statuses,
+            owner_id,
+            audit_action,
+            actor_id,
+            actor_username,
+        )
 
-    async def list_for_master(self, master_id: int) -> list[RepairRequest]:
-        return await self.list_requests(RequestFilter(master_id=master_id))
+    async def _transition_cte(
+        self,
+        request_id: int,
+        values: dict[str, Any],
+        from_statuses: Collection[str],
+        owner_id: Optional[int],
+        audit_action: Optional[str],
+        actor_id: Optional[int],
+        actor_username: Optional[str],
+    ) -> TransitionResult:
+        """Postgres: WITH cur AS (SELECT), upd AS (UPDATE ... RETURNING),
+        ins AS (INSERT audit FROM upd) SELECT ... — a single round trip."""
+        cur = (
+            select(_requests.c.id, _requests.c.status, _requests.c.master_id)
+            .where(_requests.c.id == request_id)
+            .cte("cur")
+        )
+        upd = (
+            update(_requests)
+            .where(
+                _requests.c.id == cur.c.id,
+                _requests.c.status == cur.c.status,
+                _requests.c.master_id.is_not_distinct_from(cur.c.master_id),
+                _transition_guard(
+                    cur.c.status, cur.c.master_id, from_statuses, owner_id
+                ),
+            )
+            .values(**values)
+            .returning(
+                *(_requests.c[name] for name in _READ_COLUMNS),
+                _master_username(),
+                cur.c.status.label("old_status"),
+            )
+            .cte("upd")
+        )
+        stmt = select(
+            cur.c.status.label("current_status"),
+            cur.c.master_id.label("current_master_id"),
+            *(upd.c[name] for name in _READ_COLUMNS),
+            upd.c.assigned_to_username,
+        ).select_from(cur.outerjoin(upd, upd.c.id == cur.c.id))
+        if audit_action is not None:
+            audit_rows = select(
+                upd.c.id,
+                cast(literal(audit_action), String(32)),
+                cast(literal(actor_id), Integer),
+                cast(literal(actor_username), String(64)),
+                upd.c.old_status,
+                upd.c.status,
+            )
+            stmt = stmt.add_cte(
+                insert(_audit)
+                .from_select(
+                    [
+                        "request_id",
+                        "action",
+                        "actor_id",
+                        "actor_username",
+                        "old_status",
+                        "new_status",
+                    ],
+                    audit_rows,
+                )
+                .cte("ins")
+            )
+        row = (await self._session.execute(stmt)).mappings().first()
+        if row is None:
+            return TransitionResult(None, None, None)
+        request = None
+        if row["id"] is not None:
+            request = {name: row[name] for name in _READ_COLUMNS}
+            request["assigned_to_username"] = row["assigned_to_username"]
+        return TransitionResult(
+            row["current_status"], row["current_master_id"], request
+        )
 
-    async def take_in_work_atomic(
+    async def _transition_sequential(
         self,
         request_id: int,
-        master_id: int,
-    ) -> bool:
-        """One conditional UPDATE for 'new' requests. Returns True if succeeded."""
+        values: dict[str, Any],
+        from_statuses: Collection[str],
+        owner_id: Optional[int],
+        audit_action: Optional[str],
+        actor_id: Optional[int],
+        actor_username: Optional[str],
+    ) -> TransitionResult:
+        """Fallback for dialects without data-modifying CTEs (SQLite):
+        snapshot SELECT, guarded UPDATE ... RETURNING; audit row goes to the sink."""
+        snapshot = (
+            await self._session.execute(
+                select(_requests.c.status, _requests.c.master_id).where(
+                    _requests.c.id == request_id
+                )
+            )
+        ).first()
+        if snapshot is None:
+            return TransitionResult(None, None, None)
         stmt = (
-            update(RepairRequest)
+            update(_requests)
             .where(
-                RepairRequest.id == request_id,
-                RepairRequest.status == "new",
-                RepairRequest.master_id.is_(None),
+                _requests.c.id == request_id,
+                _requests.c.status == snapshot.status,
+                _requests.c.master_id.is_not_distinct_from(snapshot.master_id),
+                _transition_guard(
+                    _requests.c.status, _requests.c.master_id, from_statuses, owner_id
+                ),
+            )
+            .values(**values)
+            .returning(
+                *(_requests.c[name] for name in _READ_COLUMNS), _master_username()
             )
-            .values(master_id=master_id, status="in_progress")
         )
-        result = await self._session.execute(stmt)
-        return result.rowcount > 0
+        row = (await self._session.execute(stmt)).mappings().first()
+        if row is None:
+            return TransitionResult(snapshot.status, snapshot.master_id, None)
+        if audit_action is not None:
+            stage_event(
+                self._session,
+                request_id,
+                audit_action,
+                actor_id=actor_id,
+                actor_username=actor_username,
+                old_status=snapshot.status,
+                new_status=row["status"],
+            )
+        return TransitionResult(snapshot.status, snapshot.master_id, dict(row))
 
-    async def start_assigned_request(
+    async def claim_next(
         self,
-        request_id: int,
         master_id: int,
-    ) -> Optional[RepairRequest]:
-        """Transition 'assigned' to 'in_progress' when master_id matches."""
-        req = await self.get_by_id(request_id)
-        if not req or req.status != "assigned" or req.master_id != master_id:
-            return None
-        req.status = "in_progress"
-        await self._session.flush()
-        await self._session.refresh(req)
-        return req
+        *,
+        from_status: str,
+        to_status: str,
+        audit_action: Optional[str] = None,
+        actor_username: Optional[str] = None,
+    ) -> Optional[dict[str, Any]]:
+        """Oldest unassigned request in from_status, moved to to_status for master_id.
 
-    async def mark_done(self, request_id: int) -> Optional[RepairRequest]:
-        req = await self.get_by_id(request_id)
-        if not req:
+        Returns the updated row (RequestRead field names) or None when the queue
+        is empty. Concurrent claimers never wait on or fail over the same row.
+        """
+        values = {"status": to_status, "master_id": master_id}
+        oldest = (
+            select(_requests.c.id)
+            .where(_requests.c.status == from_status, _requests.c.master_id.is_(None))
+            .order_by(_requests.c.created_at, _requests.c.id)
+            .limit(1)
+        )
+        if self._dialect == "postgresql":
+            # FOR UPDATE SKIP LOCKED: a row being claimed by another transaction
+            # is skipped, so each claimer locks a different row in one round trip.
+            pick = oldest.with_for_update(skip_locked=True).cte("pick")
+            upd = (
+                update(_requests)
+                .where(_requests.c.id == pick.c.id)
+                .values(**values)
+                .returning(
+                    *(_requests.c[name] for name in _READ_COLUMNS), _master_username()
+                )
+                .cte("upd")
+            )
+            stmt = select(
+                *(upd.c[name] for name in _READ_COLUMNS), upd.c.assigned_to_username
+            )
+            if audit_action is not None:
+                audit_rows = select(
+                    upd.c.id,
+                    cast(literal(audit_action), String(32)),
+                    cast(literal(master_id), Integer),
+                    cast(literal(actor_username), String(64)),
+                    cast(literal(from_status), String(32)),
+                    upd.c.status,
+                )
+                stmt = stmt.add_cte(
+                    insert(_audit)
+                    .from_select(
+                        [
+                            "request_id",
+                            "action",
+                            "actor_id",
+                            "actor_username",
+                            "old_status",
+                            "new_status",
+                        ],
+                        audit_rows,
+                    )
+                    .cte("ins")
+                )
+            row = (await self._session.execute(stmt)).mappings().first()
+            return dict(row) if row is not None else None
+        # SQLite has no row locks, but one statement holds the database write
+        # lock, so pick + update in a single UPDATE cannot race.
+        stmt = (
+            update(_requests)
+            .where(
+                _requests.c.id == oldest.scalar_subquery(),
+                _requests.c.status == from_status,
+                _requests.c.master_id.is_(None),
+            )
+            .values(**values)
+            .returning(
+                *(_requests.c[name] for name in _READ_COLUMNS), _master_username()
+            )
+        )
+        row = (await self._session.execute(stmt)).mappings().first()
+        if row is None:
             return None
-        req.status = "done"
-        await self._session.flush()
-        await self._session.refresh(req)
-        return req
+        if audit_action is not None:
+            stage_event(
+                self._session,
+                row["id"],
+                audit_action,
+                actor_id=master_id,
+                actor_username=actor_username,
+                old_status=from_status,
+                new_status=row["status"],
+            )
+        return dict(row)
+
+    async def lock_states(
+        self, request_ids: Collection[int]
+    ) -> dict[int, tuple[str, Optional[int]]]:
+        """(status, master_id) by id for the existing requests among request_ids.
+
+        SELECT ... FOR UPDATE in id order (Postgres): the rows cannot change
+        until commit, and concurrent batches lock overlapping rows in the same
+        order. SQLite ignores FOR UPDATE and another connection may commit
+        between this read and the write, so update_many guards on the status.
+        """
+        stmt = (
+            select(_requests.c.id, _requests.c.status, _requests.c.master_id)
+            .where(_requests.c.id.in_(list(request_ids)))
+            .order_by(_requests.c.id)
+            .with_for_update()
+        )
+        result = await self._session.execute(stmt)
+        return {row.id: (row.status, row.master_id) for row in result}
+
+    async def update_many(
+        self,
+        request_ids: Collection[int],
+        values: dict[str, Any],
+        from_status: str,
+    ) -> list[dict[str, Any]]:
+        """Guarded UPDATE of the requests still in from_status; returns changed rows."""
+        stmt = (
+            update(_requests)
+            .where(
+                _requests.c.id.in_(list(request_ids)),
+                _requests.c.status == from_status,
+            )
+            .values(**values)
+            .returning(
+                *(_requests.c[name] for name in _READ_COLUMNS), _master_username()
+            )
+        )
+        result = await self._session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+    async def master_ids(self, user_ids: Collection[int]) -> set[int]:
+        """The ids among user_ids that belong to masters."""
+        if not user_ids:
+            return set()
+        stmt = select(_users.c.id).where(
+            _users.c.id.in_(list(user_ids)), _users.c.role == "master"
+        )
+        return set((await self._session.execute(stmt)).scalars())
+
+    async def list_for_master(self, master_id: int) -> list[dict[str, Any]]:
+        return await self.list_requests(RequestFilter(master_id=master_id))
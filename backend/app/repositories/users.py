@@ -1,10 +1,16 @@
-from typing import Optional
+from collections.abc import Collection
+from typing import Any, Optional
 
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
+from app.core.principals import principal_cache
 from app.models import User
 
+# session.info key: user ids whose cached principals must go after commit
+_CHANGED_USERS_KEY = "principals_changed"
+
 
 def _user_to_master_dict(u: User) -> dict:
     return {"id": u.id, "username": u.username}
@@ -24,6 +30,12 @@ class UsersRepository:
         result = await self._session.execute(stmt)
         return result.scalars().first()
 
+    async def ids_by_username(self, usernames: Collection[str]) -> dict[str, int]:
+        """{username: id} of the given users that exist (one unique-index lookup)."""
+        stmt = select(User.username, User.id).where(User.username.in_(usernames))
+        result = await self._session.execute(stmt)
+        return {username: user_id for username, user_id in result.all()}
+
     async def create_if_missing(
         self,
         username: str,
@@ -36,12 +48,40 @@ class UsersRepository:
         user = User(username=username, password_hash=password_hash, role=role)
         self._session.add(user)
         await self._session.flush()
-        await self._session.refresh(user)
         return user
 
+    async def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password_hash = password_hash
+        await self._session.flush()
+
     async def list_masters(self) -> list[dict]:
         """Return list of masters: [{"id": 1, "username": "master1"}, ...]."""
         stmt = select(User).where(User.role == "master").order_by(User.username)
         result = await self._session.execute(stmt)
         users = result.scalars().all()
         return [_user_to_master_dict(u) for u in users]
+
+
+# Principal cache invalidation: any ORM update/delete of a user (role change,
+# removal) drops that user's cached tokens at flush and again after commit, so
+# a request racing the transaction cannot keep a stale principal cached.
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper: Any, connection: Any, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_users(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_CHANGED_USERS_KEY, None)
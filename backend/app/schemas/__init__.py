@@ -1,9 +1,19 @@
 from app.schemas.auth import Token, TokenPayload
 from app.schemas.requests import (
+    AuditEventRead,
+    BulkItem,
+    BulkItemResult,
+    BulkRequest,
+    BulkResult,
+    MasterStats,
     RequestAssign,
     RequestCreate,
+    RequestDetail,
+    RequestMaster,
     RequestRead,
+    RequestStats,
     RequestStatusUpdate,
+    dump_request_list,
 )
 from app.schemas.users import UserRead
 
@@ -13,6 +23,16 @@ __all__ = [
     "UserRead",
     "RequestCreate",
     "RequestRead",
+    "RequestDetail",
+    "RequestMaster",
+    "AuditEventRead",
     "RequestAssign",
     "RequestStatusUpdate",
+    "BulkItem",
+    "BulkRequest",
+    "BulkItemResult",
+    "BulkResult",
+    "RequestStats",
+    "MasterStats",
+    "dump_request_list",
 ]
@@ -1,7 +1,8 @@
+from collections.abc import Sequence
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
 
 
 class RequestCreate(BaseModel):
@@ -16,7 +17,7 @@ class RequestCreate(BaseModel):
 
 
 class RequestRead(BaseModel):
-    """Schema for reading a repair request. API: clientName, clientPhone, problemText, assignedTo, assignedToUsername, etc."""
+    """Schema for reading a repair request. API: clientName, clientPhone, problemText, assignedTo, assignedToUsername, duplicateOf, etc."""
 
     id: int = Field(..., alias="id")
     client_name: str = Field(..., alias="clientName")
@@ -26,6 +27,7 @@ class RequestRead(BaseModel):
     status: str = Field(..., alias="status")
     master_id: Optional[int] = Field(None, alias="assignedTo")
     assigned_to_username: Optional[str] = Field(None, alias="assignedToUsername")
+    duplicate_of_id: Optional[int] = Field(None, alias="duplicateOf")
     created_at: datetime = Field(..., alias="createdAt")
     updated_at: datetime = Field(..., alias="updatedAt")
 
@@ -50,6 +52,7 @@ class RequestRead(BaseModel):
                     "address",
                     "status",
                     "master_id",
+                    "duplicate_of_id",
                     "created_at",
                     "updated_at",
                 )
@@ -59,6 +62,53 @@ class RequestRead(BaseModel):
         return data
 
 
+class AuditEventRead(BaseModel):
+    """Audit event of a request. API: id, action, actorUsername, oldStatus, newStatus, createdAt."""
+
+    id: int = Field(..., alias="id")
+    action: str = Field(..., alias="action")
+    actor_username: Optional[str] = Field(None, alias="actorUsername")
+    old_status: Optional[str] = Field(None, alias="oldStatus")
+    new_status: Optional[str] = Field(None, alias="newStatus")
+    created_at: datetime = Field(..., alias="createdAt")
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        from_attributes=True,
+    )
+
+
+class RequestMaster(BaseModel):
+    """Assigned master as embedded in request detail. API: id, username."""
+
+    id: int = Field(..., alias="id")
+    username: str = Field(..., alias="username")
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        from_attributes=True,
+    )
+
+
+class RequestDetail(RequestRead):
+    """GET /requests/{id}: RequestRead plus history / master when included."""
+
+    history: Optional[list[AuditEventRead]] = Field(None, alias="history")
+    master: Optional[RequestMaster] = Field(None, alias="master")
+
+
+_request_list = TypeAdapter(list[RequestRead])
+
+
+def dump_request_list(rows: Sequence[Any]) -> bytes:
+    """Validate and serialize a whole list to camelCase JSON bytes.
+
+    Two calls into pydantic-core instead of a Python loop of model_validate plus
+    a second validation through response_model. Fastest with dict rows.
+    """
+    return _request_list.dump_json(_request_list.validate_python(rows), by_alias=True)
+
+
 class RequestAssign(BaseModel):
     """Schema for assigning a request to a master (take in work). API: masterId."""
 
@@ -67,9 +117,73 @@ class RequestAssign(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class BulkItem(BaseModel):
+    """One operation of POST /requests/bulk. API: id, action, masterId (assign only)."""
+
+    id: int = Field(..., alias="id")
+    action: Literal["assign", "cancel"] = Field(..., alias="action")
+    master_id: Optional[int] = Field(None, alias="masterId")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def check_master_id(self) -> "BulkItem":
+        if self.action == "assign" and self.master_id is None:
+            raise ValueError("masterId is required for assign")
+        return self
+
+
+class BulkRequest(BaseModel):
+    """Body of POST /requests/bulk. API: items (1..500)."""
+
+    items: list[BulkItem] = Field(..., min_length=1, max_length=500, alias="items")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one bulk item, in request order. API: id, ok, code, message, request."""
+
+    id: int = Field(..., alias="id")
+    ok: bool = Field(..., alias="ok")
+    code: Optional[str] = Field(None, alias="code")
+    message: Optional[str] = Field(None, alias="message")
+    request: Optional[RequestRead] = Field(None, alias="request")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class BulkResult(BaseModel):
+    """Response of POST /requests/bulk. API: results."""
+
+    results: list[BulkItemResult] = Field(..., alias="results")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class RequestStatusUpdate(BaseModel):
     """Schema for updating request status."""
 
     status: str = Field(..., min_length=1, max_length=32, alias="status")
 
     model_config = ConfigDict(populate_by_name=True)
+
+
+class MasterStats(BaseModel):
+    """Request counts of one master. API: masterId, username, byStatus."""
+
+    master_id: int = Field(..., alias="masterId")
+    username: Optional[str] = Field(None, alias="username")
+    by_status: dict[str, int] = Field(default_factory=dict, alias="byStatus")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class RequestStats(BaseModel):
+    """Request counts. API: total, byStatus (every status, zeros included), byMaster."""
+
+    total: int = Field(..., alias="total")
+    by_status: dict[str, int] = Field(..., alias="byStatus")
+    by_master: list[MasterStats] = Field(default_factory=list, alias="byMaster")
+
+    model_config = ConfigDict(populate_by_name=True)
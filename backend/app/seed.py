@@ -2,11 +2,11 @@
 
 import asyncio
 
-import bcrypt
-
+from app.core.passwords import hash_password
 from app.db.session import async_session_factory
 from app.models import RepairRequest
-from app.repositories import RequestsRepository, UsersRepository
+from app.repositories import CountersRepository, RequestsRepository, UsersRepository
+from app.services.requests import duplicate_fingerprint
 
 # Dev users: username, plain_password (for hashing), role. Only in README for dev.
 _DEV_USERS = [
@@ -23,34 +23,31 @@ _DEV_REQUESTS = [
 ]
 
 
-def _hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-
 async def run_seed() -> None:
+    """Idempotent and cheap on every boot: a few indexed lookups once seeded."""
     async with async_session_factory() as session:
         users_repo = UsersRepository(session)
         requests_repo = RequestsRepository(session)
 
-        # 1. Users
-        for username, plain_password, role in _DEV_USERS:
-            password_hash = _hash_password(plain_password)
-            await users_repo.create_if_missing(username, password_hash, role)
-        await session.flush()
+        # 1. Users: bcrypt only for the ones that do not exist yet
+        user_ids = await users_repo.ids_by_username(
+            [username for username, _password, _role in _DEV_USERS]
+        )
+        missing = [user for user in _DEV_USERS if user[0] not in user_ids]
+        hashes = await asyncio.gather(
+            *(hash_password(plain_password) for _name, plain_password, _role in missing)
+        )
+        for (username, _password, role), password_hash in zip(missing, hashes):
+            user = await users_repo.create_if_missing(username, password_hash, role)
+            user_ids[username] = user.id
 
         # 2. Masters for assignment
-        master1 = await users_repo.get_by_username("master1")
-        master2 = await users_repo.get_by_username("master2")
-        master1_id = master1.id if master1 else None
-        master2_id = master2.id if master2 else None
+        master1_id = user_ids.get("master1")
+        master2_id = user_ids.get("master2")
 
         # 3. Sample requests (only if our test requests don't exist — idempotent)
-        _TEST_PHONES = {"+7 999 111-22-33", "+7 999 222-33-44", "+7 999 333-44-55"}
-        existing = await requests_repo.list_requests(None)
-        has_test_requests = any(
-            r.client_phone in _TEST_PHONES for r in existing
-        )
-        if not has_test_requests:
+        phones = [phone for _name, phone, _desc, _addr in _DEV_REQUESTS]
+        if not await requests_repo.exists_with_phones(phones):
             for i, (name, phone, desc, addr) in enumerate(_DEV_REQUESTS):
                 status = "new"
                 master_id = None
@@ -67,9 +64,12 @@ async def run_seed() -> None:
                     address=addr,
                     status=status,
                     master_id=master_id,
+                    fingerprint=duplicate_fingerprint(phone, desc),
                 )
                 session.add(req)
             await session.flush()
+            # Rows above bypass RequestsService, so recount them.
+            await CountersRepository(session).rebuild()
 
         await session.commit()
     print("Seed completed: dev users and sample requests created if missing")
@@ -1,4 +1,11 @@
 from app.services.auth import AuthService
+from app.services.export import ExportService
+from app.services.idempotency import IdempotencyService
 from app.services.requests import RequestsService
 
-__all__ = ["AuthService", "RequestsService"]
+__all__ = [
+    "AuthService",
+    "ExportService",
+    "IdempotencyService",
+    "RequestsService",
+]
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-import bcrypt
 from jose import jwt
 
+from app.core import passwords
 from app.core.settings import settings
 from app.models import User
 from app.repositories import UsersRepository
@@ -13,14 +13,8 @@ class AuthService:
     def __init__(self, users_repo: UsersRepository) -> None:
         self._users_repo = users_repo
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        try:
-            return bcrypt.checkpw(
-                plain_password.encode("utf-8"),
-                hashed_password.encode("utf-8"),
-            )
-        except Exception:
-            return False
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await passwords.verify_password(plain_password, hashed_password)
 
     def create_access_token(self, user: User) -> str:
         expire = datetime.now(timezone.utc) + timedelta(
@@ -28,6 +22,7 @@ class AuthService:
         )
         to_encode = {
             "sub": str(user.id),
+            "username": user.username,
             "role": user.role,
             "exp": expire,
         }
@@ -42,10 +37,17 @@ class AuthService:
         username: str,
         password: str,
     ) -> Optional[User]:
-        """Returns User if credentials valid, None otherwise. Safe: no error details."""
+        """Returns User if credentials valid, None otherwise. Safe: no error details.
+
+        A hash made with a different bcrypt cost than BCRYPT_ROUNDS is replaced
+        while the plain password is at hand (committed with the request).
+        """
         user = await self._users_repo.get_by_username(username)
         if not user:
             return None
-        if not self.verify_password(password, user.password_hash):
+        if not await self.verify_password(password, user.password_hash):
             return None
+        if passwords.needs_rehash(user.password_hash):
+            new_hash = await passwords.hash_password(password)
+            await self._users_repo.update_password_hash(user, new_hash)
         return user
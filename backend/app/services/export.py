@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Optional
+
+from app.repositories import RequestFilter, RequestsRepository
+
+# Output is flushed in chunks of about this size; the first chunk goes out at once.
+_CHUNK_BYTES = 64 * 1024
+
+# (CSV header / JSON key, row key): request columns in RequestRead naming
+_REQUEST_FIELDS = [
+    ("id", "id"),
+    ("clientName", "client_name"),
+    ("clientPhone", "client_phone"),
+    ("problemText", "description"),
+    ("address", "address"),
+    ("status", "status"),
+    ("assignedTo", "master_id"),
+    ("assignedToUsername", "assigned_to_username"),
+    ("createdAt", "created_at"),
+    ("updatedAt", "updated_at"),
+]
+# Same for audit events; keys match GET /requests/{id}/history
+_EVENT_FIELDS = [
+    ("id", "event_id"),
+    ("action", "event_action"),
+    ("actorUsername", "event_actor_username"),
+    ("oldStatus", "event_old_status"),
+    ("newStatus", "event_new_status"),
+    ("createdAt", "event_created_at"),
+]
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class ExportService:
+    """Requests with their audit trail as NDJSON or CSV, streamed row by row.
+
+    NDJSON: one request per line with a "history" array. CSV: one line per
+    audit event with the request columns repeated (event_* empty when a
+    request has no events).
+    """
+
+    def __init__(self, requests_repo: RequestsRepository) -> None:
+        self._repo = requests_repo
+
+    async def ndjson_lines(
+        self, filter_: Optional[RequestFilter] = None
+    ) -> AsyncIterator[str]:
+        # Rows arrive grouped by request id; only the current request is held.
+        current: Optional[dict[str, Any]] = None
+        async for row in self._repo.stream_with_history(filter_):
+            if current is None or current["id"] != row["id"]:
+                if current is not None:
+                    yield _json_line(current)
+                current = {key: _value(row[col]) for key, col in _REQUEST_FIELDS}
+                current["history"] = []
+            if row["event_id"] is not None:
+                current["history"].append(
+                    {key: _value(row[col]) for key, col in _EVENT_FIELDS}
+                )
+        if current is not None:
+            yield _json_line(current)
+
+    async def csv_lines(
+        self, filter_: Optional[RequestFilter] = None
+    ) -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(
+            [key for key, _col in _REQUEST_FIELDS]
+            + [f"event_{key}" for key, _col in _EVENT_FIELDS]
+        )
+        async for row in self._repo.stream_with_history(filter_):
+            writer.writerow(
+                [_value(row[col]) for _key, col in _REQUEST_FIELDS + _EVENT_FIELDS]
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+def _json_line(obj: dict[str, Any]) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def encode_chunks(
+    lines: AsyncIterator[str],
+    *,
+    gzip: bool = False,
+) -> AsyncIterator[bytes]:
+    """UTF-8 encode lines into ~64 KiB chunks, optionally as one gzip stream.
+
+    The first line is flushed immediately so clients see the first byte
+    without waiting for a full chunk.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    pending: list[bytes] = []
+    size = 0
+    first = True
+    async for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if first or size >= _CHUNK_BYTES:
+            chunk = b"".join(pending)
+            if compressor is not None:
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield chunk
+            pending.clear()
+            size = 0
+            first = False
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
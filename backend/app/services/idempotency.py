@@ -0,0 +1,62 @@
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from app.core.errors import DomainError
+from app.core.settings import settings
+from app.repositories import IdempotencyRepository
+
+MSG_KEY_REUSED = "Ключ идемпотентности уже использован для другого запроса"
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of a call's input (path ids, request body)."""
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class IdempotentResult(NamedTuple):
+    status_code: int
+    body: bytes
+    replayed: bool
+
+
+class IdempotencyService:
+    """Runs a call once per (scope, Idempotency-Key); retries get its response.
+
+    The key row is inserted first and the response stored in the same
+    transaction as the call, so a key is only ever "used" by a committed call.
+    Failed calls (4xx/5xx) roll back with their key and may be retried.
+    """
+
+    def __init__(
+        self,
+        repo: IdempotencyRepository,
+        ttl_seconds: float = settings.IDEMPOTENCY_TTL_SECONDS,
+    ) -> None:
+        self._repo = repo
+        self._ttl = timedelta(seconds=ttl_seconds)
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        input_fingerprint: str,
+        call: Callable[[], Awaitable[bytes]],
+        status_code: int = 200,
+    ) -> IdempotentResult:
+        now = datetime.now(timezone.utc)
+        stored = await self._repo.claim(
+            scope, key, input_fingerprint, now=now, expires_at=now + self._ttl
+        )
+        if stored is not None:
+            if stored.fingerprint != input_fingerprint:
+                raise DomainError(422, "idempotency_key_reused", MSG_KEY_REUSED)
+            return IdempotentResult(
+                stored.status_code or status_code, stored.body or b"", True
+            )
+        body = await call()
+        await self._repo.save(scope, key, status_code, body)
+        return IdempotentResult(status_code, body, False)
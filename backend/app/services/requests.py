@@ -1,8 +1,36 @@
-from typing import Optional
+import hashlib
+import re
+from collections.abc import Collection
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
 from app.core.errors import DomainError
-from app.models import RepairRequest
-from app.repositories import AuditRepository, RequestFilter, RequestsRepository
+from app.core.etag import make_etag
+from app.core.metrics import intake_duplicates, request_transitions, take_conflicts
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.phones import phone_digits
+from app.core.ratelimit import phone_key
+from app.core.settings import settings
+from app.models import ALL_MASTERS, RepairRequest
+from app.repositories import (
+    AuditRepository,
+    ChangeFeed,
+    CountersRepository,
+    RequestFilter,
+    RequestsRepository,
+)
+from app.repositories.counters import CounterKey, counter_deltas
+from app.repositories.requests import TransitionResult
+from app.schemas import (
+    AuditEventRead,
+    BulkItem,
+    BulkItemResult,
+    MasterStats,
+    RequestDetail,
+    RequestMaster,
+    RequestRead,
+    RequestStats,
+)
 
 # Allowed status transitions: from_status -> [to_statuses]
 # assigned = dispatcher assigned to master; in_progress = master working
@@ -14,9 +42,50 @@ _ALLOWED_TRANSITIONS: dict[str, set[str]] = {
     "done": set(),
 }
 
+
+def _sources_for(to_status: str) -> frozenset[str]:
+    """Statuses from which _ALLOWED_TRANSITIONS permits moving to to_status."""
+    return frozenset(
+        from_status
+        for from_status, targets in _ALLOWED_TRANSITIONS.items()
+        if to_status in targets
+    )
+
+
+# Statuses that can still change: a repeat submission only matches these.
+_ACTIVE_STATUSES = frozenset(
+    status for status, targets in _ALLOWED_TRANSITIONS.items() if targets
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def duplicate_fingerprint(client_phone: str, description: str) -> str:
+    """Hash of the phone and the set of words of the description.
+
+    Formatting of the phone, case, ё/е, punctuation, word order and repeated
+    words do not change it, so "Течёт кран!" and "кран течет" from the same
+    number collide.
+    """
+    words = sorted(set(_WORD.findall(description.lower().replace("ё", "е"))))
+    data = phone_key(client_phone) + "\n" + " ".join(words)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
 MSG_REQUEST_NOT_FOUND = "Заявка не найдена"
 MSG_INVALID_TRANSITION = "Недопустимый переход статуса"
 MSG_ALREADY_TAKEN = "Заявка уже взята в работу"
+MSG_CONFLICT = "Заявка была изменена, обновите список"
+MSG_INVALID_CURSOR = "Некорректный курсор страницы"
+MSG_MASTER_NOT_FOUND = "Мастер не найден"
+MSG_DUPLICATE_ITEM = "Заявка уже есть в этом пакете"
+MSG_PHONE_TOO_SHORT = "Для поиска по телефону нужно не меньше 3 цифр"
+
+# Bulk action -> target status; the audit action is the bulk action itself.
+_BULK_ACTIONS: dict[str, str] = {"assign": "assigned", "cancel": "cancelled"}
+
+# Fewer digits than a trigram cannot use the phone index.
+_MIN_PHONE_DIGITS = 3
 
 
 class RequestsService:
@@ -24,9 +93,13 @@ class RequestsService:
         self,
         requests_repo: RequestsRepository,
         audit_repo: Optional[AuditRepository] = None,
+        changes: Optional[ChangeFeed] = None,
+        counters: Optional[CountersRepository] = None,
     ) -> None:
         self._repo = requests_repo
         self._audit = audit_repo
+        self._changes = changes
+        self._counters = counters
 
     def _check_transition(self, from_status: str, to_status: str) -> None:
         allowed = _ALLOWED_TRANSITIONS.get(from_status, set())
@@ -40,71 +113,258 @@ class RequestsService:
         description: str,
         address: Optional[str] = None,
     ) -> RepairRequest:
+        """Create a new request, unless it repeats a recent active one.
+
+        Off unless DUPLICATE_WINDOW_SECONDS > 0. Then a request with the same
+        duplicate_fingerprint() created within the window and not yet
+        done/cancelled is found with one indexed SELECT, under an advisory
+        lock on the fingerprint so concurrent repeats cannot both miss it.
+        DUPLICATE_MODE "flag" creates the request with duplicate_of_id set;
+        "merge" returns the existing one and records a "repeat" audit event
+        on it.
+        """
+        fingerprint = duplicate_fingerprint(client_phone, description)
+        duplicate = None
+        if settings.DUPLICATE_WINDOW_SECONDS > 0:
+            since = datetime.now(timezone.utc) - timedelta(
+                seconds=settings.DUPLICATE_WINDOW_SECONDS
+            )
+            await self._repo.lock_fingerprint(fingerprint)
+            duplicate = await self._repo.find_duplicate(
+                fingerprint, since=since, statuses=_ACTIVE_STATUSES
+            )
+        if duplicate is not None and settings.DUPLICATE_MODE == "merge":
+            intake_duplicates.labels("merged").inc()
+            if self._audit:
+                await self._audit.add_event(
+                    duplicate.id,
+                    "repeat",
+                    old_status=duplicate.status,
+                    new_status=duplicate.status,
+                )
+            return duplicate
         req = await self._repo.create_request_public(
             client_name=client_name,
             client_phone=client_phone,
             description=description,
             address=address,
+            fingerprint=fingerprint,
+            duplicate_of_id=(
+                (duplicate.duplicate_of_id or duplicate.id) if duplicate else None
+            ),
         )
+        if duplicate is not None:
+            intake_duplicates.labels("flagged").inc()
         if self._audit:
             await self._audit.add_event(
                 req.id,
                 "create",
                 new_status="new",
             )
+        if self._counters:
+            await self._counters.apply(counter_deltas(None, None, "new", None))
+        request_transitions.labels("create").inc()
+        self._publish("created", req)
         return req
 
     async def list_requests(
         self,
         status: Optional[str] = None,
         master_id: Optional[int] = None,
-    ) -> list[RepairRequest]:
+    ) -> list[dict[str, Any]]:
         filter_ = RequestFilter(status=status, master_id=master_id)
         return await self._repo.list_requests(filter_)
 
+    async def list_requests_page(
+        self,
+        status: Optional[str] = None,
+        master_id: Optional[int] = None,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+        phone: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """Keyset page over (created_at, id) DESC. Returns (items, next_cursor).
+
+        Without limit the whole filtered list is returned and next_cursor is None.
+        q / phone narrow the list by text and phone search (see RequestFilter).
+        """
+        after_id = None
+        if cursor:
+            try:
+                after_id = decode_cursor(cursor)
+            except ValueError:
+                raise DomainError(400, "invalid_cursor", MSG_INVALID_CURSOR)
+        self._check_phone(phone)
+        filter_ = RequestFilter(
+            status=status,
+            master_id=master_id,
+            q=q,
+            phone=phone,
+            # One extra row tells whether there is a next page without a COUNT.
+            limit=limit + 1 if limit is not None else None,
+            after_id=after_id,
+        )
+        items = await self._repo.list_requests(filter_)
+        if limit is None or len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_cursor(items[-1]["id"])
+
+    async def list_etag(
+        self,
+        status: Optional[str] = None,
+        master_id: Optional[int] = None,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+        phone: Optional[str] = None,
+    ) -> Optional[str]:
+        """Validator for list_requests_page with the same arguments; None
+        without a counters repo.
+
+        One read of the counters covering the list (CountersRepository.
+        list_version): text and phone filters match fields that never change,
+        so the version of their status/master scope covers them too.
+        """
+        self._check_phone(phone)
+        if not self._counters:
+            return None
+        version = await self._counters.list_version(master_id, status)
+        return make_etag(
+            "requests", status, master_id, limit, cursor, q, phone, version
+        )
+
+    async def history_etag(
+        self, request_id: int, *, include_archived: bool = False
+    ) -> Optional[str]:
+        """Validator for get_request_history; None without an audit repo.
+
+        Archiving deletes rows from the table, so the count covers that too.
+        """
+        if not self._audit:
+            return None
+        count, last_created = await self._audit.history_version(request_id)
+        return make_etag("history", request_id, include_archived, count, last_created)
+
+    def _check_phone(self, phone: Optional[str]) -> None:
+        if phone is not None and len(phone_digits(phone)) < _MIN_PHONE_DIGITS:
+            raise DomainError(400, "phone_query_too_short", MSG_PHONE_TOO_SHORT)
+
+    async def get_stats(self) -> RequestStats:
+        """Counts per status and per (master, status) from the counters table."""
+        by_status = dict.fromkeys(_ALLOWED_TRANSITIONS, 0)
+        masters: dict[int, MasterStats] = {}
+        rows = await self._counters.list_counts() if self._counters else []
+        for row in rows:
+            if row["master_id"] == ALL_MASTERS:
+                by_status[row["status"]] = row["count"]
+                continue
+            master = masters.get(row["master_id"])
+            if master is None:
+                master = masters[row["master_id"]] = MasterStats(
+                    master_id=row["master_id"], username=row["username"]
+                )
+            master.by_status[row["status"]] = row["count"]
+        return RequestStats(
+            total=sum(by_status.values()),
+            by_status=by_status,
+            by_master=list(masters.values()),
+        )
+
     async def get_request(self, request_id: int) -> Optional[RepairRequest]:
         return await self._repo.get_by_id(request_id)
 
+    async def get_request_detail(
+        self, request_id: int, *, include: Collection[str] = ()
+    ) -> RequestDetail:
+        """Request with optional "history" and "master" parts: at most two queries."""
+        req = await self._repo.get_detail(request_id, with_history="history" in include)
+        if req is None:
+            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
+        extra: dict[str, Any] = {}
+        if "history" in include:
+            events = sorted(req.audit_events, key=lambda e: (e.created_at, e.id))
+            extra["history"] = [AuditEventRead.model_validate(e) for e in events]
+        if "master" in include:
+            extra["master"] = (
+                RequestMaster.model_validate(req.master) if req.master else None
+            )
+        # Only the parts asked for are set, so the response can omit the rest.
+        return RequestDetail(**RequestRead.model_validate(req).model_dump(), **extra)
+
+    async def get_histories(
+        self, request_ids: Collection[int]
+    ) -> dict[int, list[AuditEventRead]]:
+        """Audit events of several requests from one query; [] for ids without any."""
+        histories: dict[int, list[AuditEventRead]] = {
+            request_id: [] for request_id in request_ids
+        }
+        if not self._audit or not histories:
+            return histories
+        for event in await self._audit.list_events_for(histories):
+            histories[event.request_id].append(AuditEventRead.model_validate(event))
+        return histories
+
     async def take_in_work(
         self,
         request_id: int,
         master_id: int,
         *,
         actor_username: Optional[str] = None,
-    ) -> RepairRequest:
+    ) -> dict[str, Any]:
         """Take request: either atomic take from 'new' pool, or start 'assigned' request."""
-        req = await self._repo.get_by_id(request_id)
-        if not req:
+        result = await self._repo.transition(
+            request_id,
+            to_status="in_progress",
+            from_statuses=_sources_for("in_progress"),
+            set_master_id=master_id,
+            owner_id=master_id,
+            **self._audit_args("take", master_id, actor_username),
+        )
+        if result.request is not None:
+            await self._count_transition(result, "take")
+            self._publish("updated", result.request)
+            return result.request
+        if result.current_status is None:
             raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        old_status = req.status
-        if req.status == "assigned" and req.master_id == master_id:
-            updated = await self._repo.start_assigned_request(request_id, master_id)
-            if self._audit and updated:
-                await self._audit.add_event(
-                    request_id,
-                    "take",
-                    actor_id=master_id,
-                    actor_username=actor_username,
-                    old_status=old_status,
-                    new_status="in_progress",
-                )
-            return updated
-        if req.status == "new":
-            ok = await self._repo.take_in_work_atomic(request_id, master_id)
-            if not ok:
-                raise DomainError(409, "request_already_taken", MSG_ALREADY_TAKEN)
-            req = await self._repo.get_by_id(request_id)
-            if self._audit and req:
-                await self._audit.add_event(
-                    request_id,
-                    "take",
-                    actor_id=master_id,
-                    actor_username=actor_username,
-                    old_status=old_status,
-                    new_status="in_progress",
-                )
-            return req
-        raise DomainError(400, "invalid_transition", MSG_INVALID_TRANSITION)
+        if result.current_master_id not in (None, master_id):
+            raise DomainError(400, "invalid_transition", MSG_INVALID_TRANSITION)
+        self._check_transition(result.current_status, "in_progress")
+        # Status allowed the take, but another master won the row first.
+        take_conflicts.inc()
+        raise DomainError(409, "request_already_taken", MSG_ALREADY_TAKEN)
+
+    async def claim_next(
+        self,
+        master_id: int,
+        *,
+        actor_username: Optional[str] = None,
+    ) -> Optional[dict[str, Any]]:
+        """Take the oldest 'new' request in work; None when there is nothing to take.
+
+        Unlike take_in_work the request is picked by the database, so masters
+        claiming at the same time each get a different request instead of a 409.
+        """
+        self._check_transition("new", "in_progress")
+        request = await self._repo.claim_next(
+            master_id,
+            from_status="new",
+            to_status="in_progress",
+            audit_action="take" if self._audit else None,
+            actor_username=actor_username,
+        )
+        if request is None:
+            return None
+        if self._counters:
+            await self._counters.apply(
+                counter_deltas("new", None, request["status"], request["master_id"])
+            )
+        request_transitions.labels("claim").inc()
+        self._publish("updated", request)
+        return request
 
     async def assign_master(
         self,
@@ -113,25 +373,14 @@ class RequestsService:
         *,
         actor_id: Optional[int] = None,
         actor_username: Optional[str] = None,
-    ) -> RepairRequest:
-        req = await self._repo.get_by_id(request_id)
-        if not req:
-            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        self._check_transition(req.status, "assigned")
-        old_status = req.status
-        updated = await self._repo.assign_master(request_id, master_id)
-        if not updated:
-            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        if self._audit:
-            await self._audit.add_event(
-                request_id,
-                "assign",
-                actor_id=actor_id,
-                actor_username=actor_username,
-                old_status=old_status,
-                new_status="assigned",
-            )
-        return updated
+    ) -> dict[str, Any]:
+        return await self._transition(
+            request_id,
+            "assigned",
+            "assign",
+            set_master_id=master_id,
+            **self._audit_args("assign", actor_id, actor_username),
+        )
 
     async def cancel(
         self,
@@ -139,34 +388,115 @@ class RequestsService:
         *,
         actor_id: Optional[int] = None,
         actor_username: Optional[str] = None,
-    ) -> RepairRequest:
-        req = await self._repo.get_by_id(request_id)
-        if not req:
-            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        self._check_transition(req.status, "cancelled")
-        old_status = req.status
-        updated = await self._repo.cancel(request_id)
-        if not updated:
-            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        if self._audit:
-            await self._audit.add_event(
-                request_id,
-                "cancel",
-                actor_id=actor_id,
-                actor_username=actor_username,
-                old_status=old_status,
-                new_status="cancelled",
+    ) -> dict[str, Any]:
+        return await self._transition(
+            request_id,
+            "cancelled",
+            "cancel",
+            **self._audit_args("cancel", actor_id, actor_username),
+        )
+
+    async def apply_bulk(
+        self,
+        items: list[BulkItem],
+        *,
+        actor_id: Optional[int] = None,
+        actor_username: Optional[str] = None,
+    ) -> list[BulkItemResult]:
+        """Assign / cancel many requests in this transaction; one result per item.
+
+        Rows are locked and checked against _ALLOWED_TRANSITIONS up front, then
+        changed with one UPDATE per (current status, target status, master),
+        guarded on the status that was read: a row changed in between (SQLite
+        takes no row locks) is reported as a conflict instead of being audited
+        with a stale old status. Audit rows and counters are written as one
+        statement each. A failed item does not affect the others.
+        """
+        results: list[Optional[BulkItemResult]] = [None] * len(items)
+
+        def fail(index: int, code: str, message: str) -> None:
+            results[index] = BulkItemResult(
+                id=items[index].id, ok=False, code=code, message=message
             )
-        return updated
 
-    async def list_for_master(self, master_id: int) -> list[RepairRequest]:
+        states = await self._repo.lock_states({item.id for item in items})
+        masters = await self._repo.master_ids(
+            {item.master_id for item in items if item.master_id is not None}
+        )
+        # (from_status, to_status, master_id) -> {request id: item index}
+        groups: dict[tuple[str, str, Optional[int]], dict[int, int]] = {}
+        seen: set[int] = set()
+        for index, item in enumerate(items):
+            to_status = _BULK_ACTIONS[item.action]
+            master_id = item.master_id if item.action == "assign" else None
+            if item.id in seen:
+                fail(index, "duplicate_item", MSG_DUPLICATE_ITEM)
+                continue
+            seen.add(item.id)
+            if item.id not in states:
+                fail(index, "not_found", MSG_REQUEST_NOT_FOUND)
+            elif to_status not in _ALLOWED_TRANSITIONS.get(states[item.id][0], set()):
+                fail(index, "invalid_transition", MSG_INVALID_TRANSITION)
+            elif master_id is not None and master_id not in masters:
+                fail(index, "master_not_found", MSG_MASTER_NOT_FOUND)
+            else:
+                key = (states[item.id][0], to_status, master_id)
+                groups.setdefault(key, {})[item.id] = index
+
+        deltas: dict[CounterKey, int] = {}
+        for (from_status, to_status, master_id), indexes in groups.items():
+            values: dict[str, Any] = {"status": to_status}
+            if master_id is not None:
+                values["master_id"] = master_id
+            rows = await self._repo.update_many(indexes, values, from_status)
+            for row in rows:
+                index = indexes.pop(row["id"])
+                old_status, old_master_id = states[row["id"]]
+                if self._audit:
+                    await self._audit.add_event(
+                        row["id"],
+                        items[index].action,
+                        actor_id=actor_id,
+                        actor_username=actor_username,
+                        old_status=old_status,
+                        new_status=row["status"],
+                    )
+                request_transitions.labels(items[index].action).inc()
+                for key, delta in counter_deltas(
+                    old_status, old_master_id, row["status"], row["master_id"]
+                ).items():
+                    deltas[key] = deltas.get(key, 0) + delta
+                self._publish("updated", row)
+                results[index] = BulkItemResult(
+                    id=row["id"], ok=True, request=RequestRead.model_validate(row)
+                )
+            # Not returned by the guarded UPDATE: changed since it was checked.
+            for index in indexes.values():
+                fail(index, "request_conflict", MSG_CONFLICT)
+        if self._counters:
+            await self._counters.apply(deltas)
+        return [result for result in results if result is not None]
+
+    async def list_for_master(self, master_id: int) -> list[dict[str, Any]]:
         return await self._repo.list_for_master(master_id)
 
-    async def get_request_history(self, request_id: int) -> list:
-        """Return audit events for a request. Requires audit_repo."""
+    async def get_request_history(
+        self, request_id: int, *, include_archived: bool = False
+    ) -> list[AuditEventRead]:
+        """Return audit events for a request. Requires audit_repo.
+
+        include_archived prepends events already moved to the on-disk archive.
+        """
         if not self._audit:
             return []
-        return await self._audit.list_events(request_id)
+        events = [
+            AuditEventRead.model_validate(e)
+            for e in await self._audit.list_events(request_id)
+        ]
+        if include_archived:
+            archived = await self._audit.list_archived_events(request_id)
+            events = [AuditEventRead.model_validate(row) for row in archived] + events
+        return events
 
     async def mark_done(
         self,
@@ -174,22 +504,69 @@ class RequestsService:
         *,
         actor_id: Optional[int] = None,
         actor_username: Optional[str] = None,
-    ) -> RepairRequest:
-        req = await self._repo.get_by_id(request_id)
-        if not req:
-            raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        self._check_transition(req.status, "done")
-        old_status = req.status
-        updated = await self._repo.mark_done(request_id)
-        if not updated:
+    ) -> dict[str, Any]:
+        return await self._transition(
+            request_id,
+            "done",
+            "done",
+            **self._audit_args("done", actor_id, actor_username),
+        )
+
+    async def _transition(
+        self,
+        request_id: int,
+        to_status: str,
+        action: str,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Run a guarded transition; map a miss to 404 / 400 / 409."""
+        result = await self._repo.transition(
+            request_id,
+            to_status=to_status,
+            from_statuses=_sources_for(to_status),
+            **kwargs,
+        )
+        if result.request is not None:
+            await self._count_transition(result, action)
+            self._publish("updated", result.request)
+            return result.request
+        if result.current_status is None:
             raise DomainError(404, "not_found", MSG_REQUEST_NOT_FOUND)
-        if self._audit:
-            await self._audit.add_event(
-                request_id,
-                "done",
-                actor_id=actor_id,
-                actor_username=actor_username,
-                old_status=old_status,
-                new_status="done",
+        self._check_transition(result.current_status, to_status)
+        # Allowed from the status we saw, but the row changed before our UPDATE.
+        raise DomainError(409, "request_conflict", MSG_CONFLICT)
+
+    async def _count_transition(self, result: TransitionResult, action: str) -> None:
+        """Move the request between counters in the transition's transaction."""
+        request_transitions.labels(action).inc()
+        if not self._counters:
+            return
+        await self._counters.apply(
+            counter_deltas(
+                result.current_status,
+                result.current_master_id,
+                result.request["status"],
+                result.request["master_id"],
             )
-        return updated
+        )
+
+    def _publish(self, event_type: str, request: Any) -> None:
+        """Stage a change event with the row as the API returns it."""
+        if self._changes is None:
+            return
+        payload = RequestRead.model_validate(request).model_dump(
+            mode="json", by_alias=True
+        )
+        self._changes.publish(event_type, payload)
+
+    def _audit_args(
+        self,
+        action: str,
+        actor_id: Optional[int],
+        actor_username: Optional[str],
+    ) -> dict[str, Any]:
+        return {
+            "audit_action": action if self._audit else None,
+            "actor_id": actor_id,
+            "actor_username": actor_username,
+        }
@@ -0,0 +1,85 @@
+"""Per-request authentication cost: get_current_user with and without the principal cache.
+
+Run from backend/ (in-memory SQLite, no server needed):
+
+    DATABASE_URL=sqlite+aiosqlite:///:memory: JWT_SECRET_KEY=bench \
+        python -m benchmarks.auth_cost [--iterations 5000]
+
+Prints JSON with microseconds per call for each mode.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import bcrypt
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.principals import principal_cache
+from app.core.settings import settings
+from app.db.base import Base
+from app.deps.auth import get_current_user
+from app.repositories import UsersRepository
+from app.services import AuthService
+
+# A read: GET does not pin the user to the primary, so only auth is timed.
+_REQUEST = Request({"type": "http", "method": "GET", "headers": []})
+
+
+async def _measure(
+    session_factory: async_sessionmaker[AsyncSession], token: str, iterations: int
+) -> float:
+    """Mean microseconds per get_current_user call, one session per call."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        async with session_factory() as session:
+            await get_current_user(_REQUEST, token, session)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def run(iterations: int) -> dict[str, float]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        repo = UsersRepository(session)
+        password_hash = bcrypt.hashpw(b"bench", bcrypt.gensalt(4)).decode("utf-8")
+        user = await repo.create_if_missing("bench", password_hash, "dispatcher")
+        await session.commit()
+    token = AuthService(UsersRepository(session)).create_access_token(user)
+
+    ttl = principal_cache.ttl_seconds
+    results = {}
+    try:
+        principal_cache.ttl_seconds = 0
+        principal_cache.clear()
+        results["no_cache_us"] = await _measure(session_factory, token, iterations)
+
+        settings.AUTH_TRUST_TOKEN_CLAIMS = True
+        results["trusted_claims_no_cache_us"] = await _measure(
+            session_factory, token, iterations
+        )
+        settings.AUTH_TRUST_TOKEN_CLAIMS = False
+
+        principal_cache.ttl_seconds = 60
+        principal_cache.clear()
+        results["cache_hit_us"] = await _measure(session_factory, token, iterations)
+    finally:
+        principal_cache.ttl_seconds = ttl
+        principal_cache.clear()
+        await engine.dispose()
+    return {key: round(value, 2) for key, value in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
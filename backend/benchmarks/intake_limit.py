@@ -0,0 +1,88 @@
+"""Cost of a rejected public POST /requests: limiter check and full request.
+
+Run from backend/ (in-memory SQLite, no server needed):
+
+    DATABASE_URL=sqlite+aiosqlite:///:memory: JWT_SECRET_KEY=bench \\
+        python -m benchmarks.intake_limit [--iterations 2000]
+
+"check_*" time IntakeRateLimiter.check alone with the in-memory backend
+(allowed, and rejected with the 429 raised). "post_*" time the whole request
+through the ASGI app in-process: accepted (session, INSERTs, commit) vs
+rejected by the limit, which never opens a DB session.
+
+Prints JSON with microseconds per call.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.errors import DomainError
+from app.core.ratelimit import IntakeRateLimiter, MemoryRateLimitBackend, intake_limiter
+from app.db.base import Base
+from app.db.engine import engine
+from app.main import app
+
+_BODY = {"clientName": "Bench", "clientPhone": "+7 999 000-00-00", "problemText": "P"}
+
+
+async def _check_us(limiter: IntakeRateLimiter, iterations: int) -> float:
+    started = time.perf_counter()
+    for n in range(iterations):
+        try:
+            await limiter.check("10.0.0.1", f"+7 999 {n:07d}")
+        except DomainError:
+            pass
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def _post_us(client: AsyncClient, iterations: int, status: int) -> float:
+    started = time.perf_counter()
+    for n in range(iterations):
+        # Distinct texts: repeats would be merged by the duplicate check.
+        body = {**_BODY, "problemText": f"P{n}"}
+        response = await client.post("/requests", json=body)
+        assert response.status_code == status, response.text
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def run(iterations: int) -> dict[str, Any]:
+    results = {}
+    allowing = IntakeRateLimiter(MemoryRateLimitBackend(), 10**9, 10**9, 60.0)
+    results["check_allowed_us"] = await _check_us(allowing, iterations)
+    rejecting = IntakeRateLimiter(MemoryRateLimitBackend(), 1, 0, 3600.0)
+    await rejecting.check("10.0.0.1", None)
+    results["check_rejected_us"] = await _check_us(rejecting, iterations)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    saved = intake_limiter.backend, intake_limiter.per_ip, intake_limiter.per_phone
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            intake_limiter.per_ip = intake_limiter.per_phone = 0
+            results["post_accepted_us"] = await _post_us(client, iterations, 200)
+            intake_limiter.backend = MemoryRateLimitBackend()
+            intake_limiter.per_ip = 1
+            await client.post("/requests", json=_BODY)
+            results["post_rejected_us"] = await _post_us(client, iterations, 429)
+    finally:
+        intake_limiter.backend, intake_limiter.per_ip, intake_limiter.per_phone = saved
+        await engine.dispose()
+    return {key: round(value, 2) for key, value in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""List endpoint cost for 10k rows: ORM + per-row model_validate vs columns + TypeAdapter.
+
+Run from backend/ (in-memory SQLite, no server needed):
+
+    DATABASE_URL=sqlite+aiosqlite:///:memory: JWT_SECRET_KEY=bench \\
+        python -m benchmarks.serialize_requests [--rows 10000] [--repeat 5]
+
+"before" reproduces the old handler: select(RepairRequest) + selectinload(master),
+a model_validate loop, then what FastAPI does with the returned list
+(re-validation through response_model, dump to JSON-able Python, json.dumps).
+"after" is RequestsRepository.list_requests + dump_request_list.
+
+Prints JSON: best CPU ms per call (process_time) and tracemalloc peak KiB.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.db.base import Base
+from app.models import RepairRequest, User
+from app.repositories import RequestsRepository
+from app.schemas import RequestRead, dump_request_list
+
+_response_field = TypeAdapter(list[RequestRead])
+
+
+async def _before(session: AsyncSession) -> bytes:
+    stmt = (
+        select(RepairRequest)
+        .options(selectinload(RepairRequest.master))
+        .order_by(RepairRequest.created_at.desc(), RepairRequest.id.desc())
+    )
+    rows = (await session.execute(stmt)).scalars().all()
+    models = [RequestRead.model_validate(r) for r in rows]
+    validated = _response_field.validate_python(models)
+    content = _response_field.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def _after(session: AsyncSession) -> bytes:
+    rows = await RequestsRepository(session).list_requests()
+    return dump_request_list(rows)
+
+
+async def _measure(
+    session_factory: async_sessionmaker[AsyncSession],
+    path: Callable[[AsyncSession], Awaitable[bytes]],
+    repeat: int,
+) -> dict[str, Any]:
+    cpu_ms = []
+    for _ in range(repeat):
+        async with session_factory() as session:
+            started = time.process_time()
+            body = await path(session)
+            cpu_ms.append((time.process_time() - started) * 1000)
+    async with session_factory() as session:
+        tracemalloc.start()
+        await path(session)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "cpu_ms": round(min(cpu_ms), 1),
+        "peak_kib": round(peak / 1024),
+        "body_bytes": len(body),
+    }
+
+
+async def run(rows: int, repeat: int) -> dict[str, Any]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {"username": f"master{i}", "password_hash": "x", "role": "master"}
+                for i in range(1, 11)
+            ],
+        )
+        await conn.execute(
+            insert(RepairRequest),
+            [
+                {
+                    "client_name": f"Клиент {i}",
+                    "client_phone": "+7 999 000-00-00",
+                    "description": "Не работает розетка в кухне, искрит при включении",
+                    "address": "ул. Ленина, 1",
+                    "status": "assigned" if i % 2 else "new",
+                    "master_id": i % 10 + 1 if i % 2 else None,
+                }
+                for i in range(rows)
+            ],
+        )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        before = await _measure(session_factory, _before, repeat)
+        after = await _measure(session_factory, _after, repeat)
+    finally:
+        await engine.dispose()
+    return {"rows": rows, "before": before, "after": after}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows, args.repeat)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,43 @@
 """Pytest fixtures for RepairRequests backend tests."""
 
 import asyncio
-from collections.abc import AsyncGenerator
+import os
+from collections.abc import AsyncGenerator, Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
 
 import bcrypt
 import pytest
 import pytest_asyncio
+from alembic import command
+from alembic.config import Config
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.principals import principal_cache
+from app.core.ratelimit import intake_limiter
 from app.db import get_db
 from app.db.base import Base
+from app.db.replica import primary_pins
+from app.db.statements import StatementCount, count_statements
 from app.main import app
 from app.repositories import UsersRepository
 
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# Tests marked postgres run against this database (postgresql://...); it is
+# wiped and migrated from scratch, so never point it at real data.
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -26,23 +47,10 @@ def event_loop():
     loop.close()
 
 
-@pytest_asyncio.fixture(scope="function")
-async def test_db():
-    """Create in-memory SQLite DB, tables, and seed test user."""
-    engine = create_async_engine(
-        TEST_DATABASE_URL,
-        echo=False,
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    session_factory = async_sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autocommit=False,
-        autoflush=False,
-    )
+async def _serve(
+    session_factory: async_sessionmaker[AsyncSession], monkeypatch
+) -> None:
+    """Point get_db at session_factory, reset process state, seed test users."""
 
     async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
         async with session_factory() as session:
@@ -56,14 +64,45 @@ async def test_db():
                 await session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    principal_cache.clear()
+    primary_pins.clear()
+    # Tests create many requests from one client; the limit test enables it.
+    monkeypatch.setattr(intake_limiter, "per_ip", 0)
+    monkeypatch.setattr(intake_limiter, "per_phone", 0)
 
-    # Seed test user (master1 / dev123)
+    # Seed test users (master1, master2, dispatcher1 / dev123)
     async with session_factory() as session:
         repo = UsersRepository(session)
         password_hash = bcrypt.hashpw(b"dev123", bcrypt.gensalt()).decode("utf-8")
         await repo.create_if_missing("master1", password_hash, "master")
+        await repo.create_if_missing("master2", password_hash, "master")
+        await repo.create_if_missing("dispatcher1", password_hash, "dispatcher")
         await session.commit()
 
+
+def _session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+@pytest_asyncio.fixture(scope="function")
+async def test_db(monkeypatch):
+    """Create in-memory SQLite DB, tables, and seed test user."""
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        echo=False,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = _session_factory(engine)
+    await _serve(session_factory, monkeypatch)
+
     yield session_factory
 
     app.dependency_overrides.pop(get_db, None)
@@ -78,3 +117,83 @@ async def async_client(test_db):
         base_url="http://test",
     ) as client:
         yield client
+
+
+async def _login(client: AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post(
+        "/auth/token",
+        data={"username": username, "password": "dev123"},
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+
+@pytest_asyncio.fixture
+async def dispatcher_headers(async_client: AsyncClient) -> dict[str, str]:
+    """Authorization header for dispatcher1."""
+    return await _login(async_client, "dispatcher1")
+
+
+@pytest_asyncio.fixture
+async def master_headers(async_client: AsyncClient) -> dict[str, str]:
+    """Authorization header for master1."""
+    return await _login(async_client, "master1")
+
+
+@pytest.fixture
+def query_budget() -> Callable[[int], AbstractContextManager[StatementCount]]:
+    """query_budget(n): fail when the block sends more than n SQL statements.
+
+    with query_budget(2): await client.patch(...)  # the failure lists the SQL
+    """
+
+    @contextmanager
+    def budget(limit: int) -> Iterator[StatementCount]:
+        with count_statements(record=True) as counter:
+            yield counter
+        statements = "\n".join(counter.statements or [])
+        assert (
+            counter.count <= limit
+        ), f"{counter.count} SQL statements, budget {limit}:\n{statements}"
+
+    return budget
+
+
+@pytest_asyncio.fixture
+async def pg_db(monkeypatch):
+    """Like test_db, on TEST_POSTGRES_URL after alembic upgrade head.
+
+    Skips without TEST_POSTGRES_URL. The public schema is dropped first, so
+    every test starts from an empty database migrated the way production is.
+    """
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_async_engine(
+        TEST_POSTGRES_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+
+    # alembic/env.py takes DATABASE_URL from the environment first. No ini
+    # file: its logging section would reconfigure pytest's loggers.
+    monkeypatch.setenv("DATABASE_URL", TEST_POSTGRES_URL)
+    config = Config()
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    await asyncio.to_thread(command.upgrade, config, "head")
+
+    session_factory = _session_factory(engine)
+    await _serve(session_factory, monkeypatch)
+    yield session_factory
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def pg_client(pg_db):
+    """HTTP client for the app on TEST_POSTGRES_URL."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        yield client
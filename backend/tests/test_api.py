@@ -1,7 +1,44 @@
 """API endpoint tests."""
 
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import Select, false, func, select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import audit_retention
+from app.core.broker import get_broker
+from app.core.errors import DomainError
+from app.core.passwords import login_limiter
+from app.core.ratelimit import MemoryRateLimitBackend, intake_limiter
+from app.core.settings import settings
+from app.db import get_db
+from app.db.base import Base
+from app.db.pool import TimedQueuePool, checkout_stats
+from app.db.replica import primary_pins
+from app.db.session import get_replica_session_factory
+from app.main import app
+from app.models import IdempotencyKey, RepairRequest, RequestAuditEvent, User
+from app.repositories import (
+    AuditWriter,
+    CountersRepository,
+    IdempotencyRepository,
+    RequestsRepository,
+)
+from app.repositories.audit_archive import AuditArchive
+from app.repositories.audit_partitions import (
+    AuditPartitions,
+    month_start,
+    partition_name,
+    utc_today,
+)
 
 
 @pytest.mark.asyncio
@@ -49,3 +86,1320 @@ async def test_auth_token_invalid(async_client: AsyncClient):
         data={"username": "master1", "password": "wrong"},
     )
     assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+@pytest.mark.asyncio
+async def test_auth_token_rehashes_on_cost_change(
+    async_client: AsyncClient, test_db, monkeypatch
+):
+    """Login with a changed BCRYPT_ROUNDS stores a hash with the new cost."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    data = {"username": "master1", "password": "dev123"}
+    assert (await async_client.post("/auth/token", data=data)).status_code == 200
+    async with test_db() as session:
+        password_hash = await session.scalar(
+            select(User.password_hash).where(User.username == "master1")
+        )
+    assert password_hash.startswith("$2b$04$")
+    assert (await async_client.post("/auth/token", data=data)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_auth_token_sheds_load(async_client: AsyncClient, monkeypatch):
+    """Logins beyond the limiter's capacity get 503 with Retry-After."""
+    monkeypatch.setattr(login_limiter, "max_concurrent", 0)
+    monkeypatch.setattr(login_limiter, "max_waiting", 0)
+    response = await async_client.post(
+        "/auth/token",
+        data={"username": "master1", "password": "dev123"},
+    )
+    assert response.status_code == 503
+    assert response.json()["code"] == "login_busy"
+    assert response.headers["Retry-After"] == str(login_limiter.retry_after_seconds)
+
+
+@pytest.mark.asyncio
+async def test_create_request_rate_limited(
+    async_client: AsyncClient, monkeypatch, query_budget
+):
+    """Public intake over the IP / phone limit gets 429 without touching the DB."""
+    monkeypatch.setattr(intake_limiter, "backend", MemoryRateLimitBackend())
+    monkeypatch.setattr(intake_limiter, "per_ip", 3)
+    body = {"clientName": "C", "clientPhone": "+7 999 123-45-67", "problemText": "P"}
+    for phone in ("+7 900 000-00-01", "+7 900 000-00-02", "+7 900 000-00-03"):
+        response = await async_client.post(
+            "/requests", json={**body, "clientPhone": phone}
+        )
+        assert response.status_code == 200
+    with query_budget(0):
+        response = await async_client.post("/requests", json=body)
+    assert response.status_code == 429
+    assert response.json()["code"] == "rate_limited"
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Same phone in another format counts against the same bucket.
+    monkeypatch.setattr(intake_limiter, "per_ip", 0)
+    monkeypatch.setattr(intake_limiter, "per_phone", 1)
+    response = await async_client.post("/requests", json=body)
+    assert response.status_code == 200
+    response = await async_client.post(
+        "/requests", json={**body, "clientPhone": "8 (999) 1234567"}
+    )
+    assert response.status_code == 429
+    response = await async_client.post(
+        "/requests", json={**body, "clientPhone": "+7 999 765-43-21"}
+    )
+    assert response.status_code == 200
+
+    # A retry of an accepted keyed call is replayed even when over the limit;
+    # a new key is a new submission and is limited.
+    monkeypatch.setattr(intake_limiter, "per_phone", 0)
+    monkeypatch.setattr(intake_limiter, "per_ip", 1)
+    monkeypatch.setattr(intake_limiter, "backend", MemoryRateLimitBackend())
+    keyed = {**body, "clientPhone": "+7 900 111-11-11"}
+    for _ in range(2):
+        response = await async_client.post(
+            "/requests", json=keyed, headers={"Idempotency-Key": "intake-1"}
+        )
+        assert response.status_code == 200
+    assert response.headers["Idempotent-Replayed"] == "true"
+    response = await async_client.post(
+        "/requests",
+        json={**keyed, "clientPhone": "+7 900 222-22-22"},
+        headers={"Idempotency-Key": "intake-2"},
+    )
+    assert response.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_replays_create_and_take(
+    async_client: AsyncClient, master_headers: dict, test_db
+):
+    """Retries with the same Idempotency-Key get the first response, no new work."""
+    body = {"clientName": "Retry", "clientPhone": "+7 999", "problemText": "P"}
+    key = {"Idempotency-Key": "create-1"}
+    first = await async_client.post("/requests", json=body, headers=key)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    retry = await async_client.post("/requests", json=body, headers=key)
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    async with test_db() as session:
+        created = await session.scalar(
+            select(func.count())
+            .select_from(RepairRequest)
+            .where(RepairRequest.client_name == "Retry")
+        )
+    assert created == 1
+
+    # Same key, different body: rejected rather than replayed.
+    response = await async_client.post(
+        "/requests", json={**body, "problemText": "Other"}, headers=key
+    )
+    assert response.status_code == 422
+    assert response.json()["code"] == "idempotency_key_reused"
+
+    request_id = first.json()["id"]
+    take_key = {**master_headers, "Idempotency-Key": "take-1"}
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=take_key
+    )
+    assert response.status_code == 200
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=take_key
+    )
+    assert response.status_code == 200
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert response.json()["status"] == "in_progress"
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=master_headers
+    )
+    assert response.status_code == 400
+
+    # A failed call does not keep its key: the retry runs again.
+    response = await async_client.patch(
+        "/requests/999999/take", headers={**master_headers, "Idempotency-Key": "k"}
+    )
+    assert response.status_code == 404
+    async with test_db() as session:
+        keys = set(await session.scalars(select(IdempotencyKey.key)))
+        assert keys == {"create-1", "take-1"}
+        # Once expired, the key is free for a new call.
+        await session.execute(
+            update(IdempotencyKey).values(
+                expires_at=datetime(2000, 1, 1, tzinfo=timezone.utc)
+            )
+        )
+        await session.commit()
+    response = await async_client.post(
+        "/requests", json={**body, "problemText": "Other"}, headers=key
+    )
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert response.json()["id"] != request_id
+
+
+@pytest.mark.asyncio
+async def test_idempotency_claim_gives_up_on_a_churned_key(test_db, monkeypatch):
+    """A key that vanishes before every lookup ends in 409, not an endless loop."""
+    now = datetime.now(timezone.utc)
+    async with test_db() as session:
+        repo = IdempotencyRepository(session)
+        args = ("scope", "key", "fingerprint")
+        expires_at = now + timedelta(hours=1)
+        assert await repo.claim(*args, now=now, expires_at=expires_at) is None
+
+        execute = session.execute
+
+        async def purged_before_lookup(stmt, *rest, **kwargs):
+            if isinstance(stmt, Select):
+                stmt = stmt.where(false())
+            return await execute(stmt, *rest, **kwargs)
+
+        monkeypatch.setattr(session, "execute", purged_before_lookup)
+        with pytest.raises(DomainError) as excinfo:
+            await repo.claim(*args, now=now, expires_at=expires_at)
+    assert excinfo.value.status_code == 409
+    assert excinfo.value.detail["code"] == "idempotency_key_busy"
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submission_merged_or_flagged(
+    async_client: AsyncClient, dispatcher_headers: dict, monkeypatch
+):
+    """A repeat of a recent active request is merged into it, or flagged."""
+    monkeypatch.setattr(settings, "DUPLICATE_WINDOW_SECONDS", 900)
+    monkeypatch.setattr(settings, "DUPLICATE_MODE", "merge")
+    body = {
+        "clientName": "Dup",
+        "clientPhone": "+7 (999) 111-22-33",
+        "problemText": "Течёт кран на кухне!",
+    }
+    first = await async_client.post("/requests", json=body)
+    assert first.status_code == 200
+    assert first.json()["duplicateOf"] is None
+    request_id = first.json()["id"]
+
+    # Other phone formatting, case, punctuation and word order: same request.
+    repeat = {
+        **body,
+        "clientPhone": "89991112233",
+        "problemText": "на кухне течет КРАН",
+    }
+    response = await async_client.post("/requests", json=repeat)
+    assert response.status_code == 200
+    assert response.json()["id"] == request_id
+    # The merge is visible in the request's history.
+    history = await async_client.get(
+        f"/requests/{request_id}/history", headers=dispatcher_headers
+    )
+    assert [(e["action"], e["newStatus"]) for e in history.json()] == [
+        ("create", "new"),
+        ("repeat", "new"),
+    ]
+    # Different words or another phone are a new request.
+    response = await async_client.post(
+        "/requests", json={**body, "problemText": "Не работает розетка"}
+    )
+    assert response.json()["id"] != request_id
+    response = await async_client.post(
+        "/requests", json={**body, "clientPhone": "+7 999 111-22-34"}
+    )
+    assert response.json()["id"] != request_id
+
+    monkeypatch.setattr(settings, "DUPLICATE_MODE", "flag")
+    flagged = await async_client.post("/requests", json=repeat)
+    assert flagged.json()["id"] != request_id
+    assert flagged.json()["duplicateOf"] == request_id
+    # A duplicate of a duplicate points at the first request.
+    again = await async_client.post("/requests", json=body)
+    assert again.json()["duplicateOf"] == request_id
+    listed = await async_client.get("/requests", headers=dispatcher_headers)
+    by_id = {item["id"]: item for item in listed.json()}
+    assert by_id[flagged.json()["id"]]["duplicateOf"] == request_id
+
+    # Finished requests never match: the latest active one is returned.
+    for cancelled in (request_id, again.json()["id"]):
+        response = await async_client.patch(
+            f"/requests/{cancelled}/cancel", headers=dispatcher_headers
+        )
+        assert response.status_code == 200
+    monkeypatch.setattr(settings, "DUPLICATE_MODE", "merge")
+    response = await async_client.post("/requests", json=body)
+    assert response.json()["id"] == flagged.json()["id"]
+    monkeypatch.setattr(settings, "DUPLICATE_WINDOW_SECONDS", 0)
+    response = await async_client.post("/requests", json=body)
+    assert response.json()["duplicateOf"] is None
+    assert response.json()["id"] not in by_id
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_on_postgres(pg_client: AsyncClient, monkeypatch):
+    """Simultaneous repeats wait on the fingerprint lock: one request, not two."""
+    monkeypatch.setattr(settings, "DUPLICATE_WINDOW_SECONDS", 900)
+    monkeypatch.setattr(settings, "DUPLICATE_MODE", "merge")
+    body = {"clientName": "Dup", "clientPhone": "+7 999 1", "problemText": "Кран"}
+    responses = await asyncio.gather(
+        *(pg_client.post("/requests", json=body) for _ in range(5))
+    )
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["id"] for r in responses}) == 1
+
+
+def _sample(name: str, **labels: str) -> float:
+    """Current value of one series in the default registry (0 before first use)."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def _create_requests(client: AsyncClient, count: int) -> list[int]:
+    ids = []
+    for i in range(count):
+        body = {"clientName": f"C{i}", "clientPhone": "+7", "problemText": f"P{i}"}
+        response = await client.post("/requests", json=body)
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_list_requests_keyset_pagination(
+    async_client: AsyncClient, dispatcher_headers: dict
+):
+    """GET /requests?limit= walks all rows newest first via X-Next-Cursor."""
+    ids = await _create_requests(async_client, 5)
+    seen: list[int] = []
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await async_client.get(
+            "/requests", params=params, headers=dispatcher_headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(r["id"] for r in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_list_requests_invalid_cursor(
+    async_client: AsyncClient, dispatcher_headers: dict
+):
+    """GET /requests with a malformed cursor returns 400 invalid_cursor."""
+    response = await async_client.get(
+        "/requests",
+        params={"limit": 2, "cursor": "not-a-cursor"},
+        headers=dispatcher_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["code"] == "invalid_cursor"
+
+
+@pytest.mark.asyncio
+async def test_list_requests_search(
+    async_client: AsyncClient, dispatcher_headers: dict
+):
+    """q= finds words and word beginnings; phone= is a prefix of the number.
+
+    Formatting and the +7 / 8 trunk prefix are ignored on both sides.
+    """
+    bodies = [
+        ("Петрова Мария", "+7 (999) 222-33-44", "Течёт кран в ванной", "ул. Ленина, 1"),
+        ("Иванов Иван", "+7 999 111-22-33", "Не работает розетка", "пр. Мира, 15"),
+    ]
+    ids = []
+    for name, phone, problem, address in bodies:
+        response = await async_client.post(
+            "/requests",
+            json={
+                "clientName": name,
+                "clientPhone": phone,
+                "problemText": problem,
+                "address": address,
+            },
+        )
+        ids.append(response.json()["id"])
+
+    async def search(**params) -> list[int]:
+        response = await async_client.get(
+            "/requests", params=params, headers=dispatcher_headers
+        )
+        assert response.status_code == 200
+        return [r["id"] for r in response.json()]
+
+    assert await search(q="ленина кран") == [ids[0]]
+    assert await search(q="Лен КРАН!") == [ids[0]]
+    assert await search(q="ленина розетка") == []
+    assert await search(q="иван") == [ids[1]]
+    assert await search(phone="999 222") == [ids[0]]
+    assert await search(phone="+7 (999) 222") == [ids[0]]
+    assert await search(phone="89992223344") == [ids[0]]
+    assert await search(phone="7999") == [ids[1], ids[0]]
+    assert await search(phone="8 999 111", q="мира") == [ids[1]]
+    assert await search(phone="8 999 111", q="ленина") == []
+    # A prefix, not a substring: the middle of the number does not match.
+    assert await search(phone="222-33") == []
+
+    response = await async_client.get(
+        "/requests", params={"phone": "+7"}, headers=dispatcher_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["code"] == "phone_query_too_short"
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_phone_search_on_postgres(pg_client: AsyncClient):
+    """Prefix LIKE on client_phone_normalized (migration 0011), 8 / +7 forms."""
+    response = await pg_client.post(
+        "/auth/token", data={"username": "dispatcher1", "password": "dev123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['accessToken']}"}
+    ids = []
+    for phone in ("+7 (999) 222-33-44", "8 812 555-00-11"):
+        body = {"clientName": "C", "clientPhone": phone, "problemText": "P"}
+        ids.append((await pg_client.post("/requests", json=body)).json()["id"])
+
+    async def search(phone: str) -> list[int]:
+        response = await pg_client.get(
+            "/requests", params={"phone": phone}, headers=headers
+        )
+        return [r["id"] for r in response.json()]
+
+    assert await search("8 999 222") == [ids[0]]
+    assert await search("+7 812") == [ids[1]]
+    assert await search("812 555") == [ids[1]]
+    assert await search("222-33") == []
+
+
+@pytest.mark.asyncio
+async def test_status_transitions_and_history(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """assign -> take -> done returns the updated row and records audit events."""
+    (request_id,) = await _create_requests(async_client, 1)
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+
+    response = await async_client.patch(
+        f"/requests/{request_id}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "assigned"
+    assert response.json()["assignedToUsername"] == "master1"
+
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=master_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "in_progress"
+
+    response = await async_client.patch(
+        f"/requests/{request_id}/done", headers=master_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+
+    response = await async_client.get(
+        f"/requests/{request_id}/history", headers=dispatcher_headers
+    )
+    assert [(e["action"], e["oldStatus"], e["newStatus"]) for e in response.json()] == [
+        ("create", None, "new"),
+        ("assign", "new", "assigned"),
+        ("take", "assigned", "in_progress"),
+        ("done", "in_progress", "done"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_next_request(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """claim-next hands out the oldest unassigned new requests, then 204."""
+    first, second, third = await _create_requests(async_client, 3)
+    await async_client.patch(f"/requests/{first}/cancel", headers=dispatcher_headers)
+    response = await async_client.post(
+        "/auth/token", data={"username": "master2", "password": "dev123"}
+    )
+    other_headers = {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+    response = await async_client.post(
+        "/master/requests/claim-next", headers=master_headers
+    )
+    assert response.status_code == 200
+    claimed = response.json()
+    assert (claimed["id"], claimed["status"]) == (second, "in_progress")
+    assert claimed["assignedToUsername"] == "master1"
+
+    response = await async_client.post(
+        "/master/requests/claim-next", headers=other_headers
+    )
+    assert (response.json()["id"], response.json()["assignedToUsername"]) == (
+        third,
+        "master2",
+    )
+    response = await async_client.post(
+        "/master/requests/claim-next", headers=other_headers
+    )
+    assert response.status_code == 204
+
+    response = await async_client.get(
+        f"/requests/{second}/history", headers=dispatcher_headers
+    )
+    assert [(e["action"], e["newStatus"]) for e in response.json()] == [
+        ("create", "new"),
+        ("take", "in_progress"),
+    ]
+    response = await async_client.get("/requests/stats", headers=dispatcher_headers)
+    assert response.json()["byStatus"]["in_progress"] == 2
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_transitions_and_claim_next_on_postgres(
+    pg_client: AsyncClient, query_budget
+):
+    """The single-statement CTE paths: transition + audit, SKIP LOCKED claim."""
+    headers = {}
+    users = {}
+    for username in ("dispatcher1", "master1", "master2"):
+        response = await pg_client.post(
+            "/auth/token", data={"username": username, "password": "dev123"}
+        )
+        token = response.json()["accessToken"]
+        headers[username] = {"Authorization": f"Bearer {token}"}
+        # Warms the principal cache, as in test_query_budgets.
+        users[username] = (
+            await pg_client.get("/auth/me", headers=headers[username])
+        ).json()
+    first, second, third = await _create_requests(pg_client, 3)
+
+    with query_budget(PG_QUERY_BUDGETS["list"]):
+        response = await pg_client.get(
+            "/requests?limit=2", headers=headers["dispatcher1"]
+        )
+    assert response.status_code == 200
+    with query_budget(PG_QUERY_BUDGETS["assign"]):
+        response = await pg_client.patch(
+            f"/requests/{first}/assign",
+            json={"masterId": users["master1"]["id"]},
+            headers=headers["dispatcher1"],
+        )
+    assert response.json()["assignedToUsername"] == "master1"
+    with query_budget(PG_QUERY_BUDGETS["take"]):
+        response = await pg_client.patch(
+            f"/requests/{first}/take", headers=headers["master1"]
+        )
+    assert (response.json()["status"], response.json()["assignedToUsername"]) == (
+        "in_progress",
+        "master1",
+    )
+    with query_budget(PG_QUERY_BUDGETS["refused"]):
+        response = await pg_client.patch(
+            f"/requests/{first}/take", headers=headers["master2"]
+        )
+    # Nothing updated: the CTE still reports the current status and owner.
+    assert response.json()["code"] == "invalid_transition"
+    with query_budget(PG_QUERY_BUDGETS["done"]):
+        response = await pg_client.patch(
+            f"/requests/{first}/done", headers=headers["master1"]
+        )
+    assert response.json()["status"] == "done"
+
+    # Two claimers at once get different rows, then the queue is empty.
+    with query_budget(2 * PG_QUERY_BUDGETS["claim_next"]):
+        claims = await asyncio.gather(
+            *(
+                pg_client.post("/master/requests/claim-next", headers=headers[name])
+                for name in ("master1", "master2")
+            )
+        )
+    claimed = {r.json()["id"]: r.json()["assignedToUsername"] for r in claims}
+    assert set(claimed) == {second, third}
+    assert set(claimed.values()) == {"master1", "master2"}
+    response = await pg_client.post(
+        "/master/requests/claim-next", headers=headers["master1"]
+    )
+    assert response.status_code == 204
+
+    for request_id, actions in (
+        (first, ["create", "assign", "take", "done"]),
+        (second, ["create", "take"]),
+    ):
+        response = await pg_client.get(
+            f"/requests/{request_id}/history", headers=headers["dispatcher1"]
+        )
+        assert [e["action"] for e in response.json()] == actions
+
+
+@pytest.mark.asyncio
+async def test_bulk_assign_and_cancel(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """POST /requests/bulk applies valid items and reports the rest per item."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    dispatcher = (await async_client.get("/auth/me", headers=dispatcher_headers)).json()
+    first, second, third, fourth = await _create_requests(async_client, 4)
+    await async_client.patch(f"/requests/{first}/cancel", headers=dispatcher_headers)
+
+    items = [
+        {"id": second, "action": "assign", "masterId": me["id"]},
+        {"id": third, "action": "assign", "masterId": me["id"]},
+        {"id": fourth, "action": "cancel"},
+        {"id": first, "action": "cancel"},
+        {"id": 999_999, "action": "cancel"},
+        {"id": second, "action": "cancel"},
+        {"id": 888_888, "action": "assign", "masterId": dispatcher["id"]},
+    ]
+    response = await async_client.post(
+        "/requests/bulk", json={"items": items}, headers=dispatcher_headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["id"], r["ok"], r["code"]) for r in results] == [
+        (second, True, None),
+        (third, True, None),
+        (fourth, True, None),
+        (first, False, "invalid_transition"),
+        (999_999, False, "not_found"),
+        (second, False, "duplicate_item"),
+        (888_888, False, "not_found"),
+    ]
+    assert results[0]["request"]["assignedToUsername"] == "master1"
+    assert results[2]["request"]["status"] == "cancelled"
+
+    (fifth,) = await _create_requests(async_client, 1)
+    response = await async_client.post(
+        "/requests/bulk",
+        json={
+            "items": [{"id": fifth, "action": "assign", "masterId": dispatcher["id"]}]
+        },
+        headers=dispatcher_headers,
+    )
+    assert response.json()["results"][0]["code"] == "master_not_found"
+    response = await async_client.post(
+        "/requests/bulk",
+        json={"items": [{"id": fifth, "action": "assign"}]},
+        headers=dispatcher_headers,
+    )
+    assert response.status_code == 422
+
+    response = await async_client.get(
+        f"/requests/{second}/history", headers=dispatcher_headers
+    )
+    assert [e["action"] for e in response.json()] == ["create", "assign"]
+    stats = (
+        await async_client.get("/requests/stats", headers=dispatcher_headers)
+    ).json()
+    assert stats["byStatus"] == {
+        "new": 1,
+        "assigned": 2,
+        "in_progress": 0,
+        "cancelled": 2,
+        "done": 0,
+    }
+    assert stats["byMaster"][0]["byStatus"] == {"assigned": 2}
+
+
+@pytest.mark.asyncio
+async def test_bulk_conflict_when_status_changed_after_read(
+    async_client: AsyncClient,
+    dispatcher_headers: dict,
+    master_headers: dict,
+    monkeypatch,
+):
+    """A row that left the status bulk read is a conflict, not audited as that status."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    (request_id,) = await _create_requests(async_client, 1)
+    await async_client.patch(
+        f"/requests/{request_id}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+
+    # What SQLite can hand back: the state before another writer committed.
+    async def stale_states(self, request_ids):
+        return {request_id: ("new", None)}
+
+    monkeypatch.setattr(RequestsRepository, "lock_states", stale_states)
+    response = await async_client.post(
+        "/requests/bulk",
+        json={"items": [{"id": request_id, "action": "cancel"}]},
+        headers=dispatcher_headers,
+    )
+    assert response.json()["results"][0]["code"] == "request_conflict"
+    response = await async_client.get(
+        f"/requests/{request_id}/history", headers=dispatcher_headers
+    )
+    assert [e["action"] for e in response.json()] == ["create", "assign"]
+
+
+@pytest.mark.asyncio
+async def test_request_detail_and_batched_history(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """GET /requests/{id}?include= embeds parts; /requests/history groups by id."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    first, second = await _create_requests(async_client, 2)
+    await async_client.patch(
+        f"/requests/{first}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+
+    response = await async_client.get(f"/requests/{first}", headers=dispatcher_headers)
+    assert response.status_code == 200
+    detail = response.json()
+    assert (detail["id"], detail["assignedToUsername"]) == (first, "master1")
+    assert "history" not in detail and "master" not in detail
+
+    response = await async_client.get(
+        f"/requests/{first}",
+        params={"include": "history,master"},
+        headers=dispatcher_headers,
+    )
+    detail = response.json()
+    assert [e["action"] for e in detail["history"]] == ["create", "assign"]
+    assert detail["master"] == {"id": me["id"], "username": "master1"}
+    response = await async_client.get(
+        f"/requests/{second}", params={"include": "master"}, headers=dispatcher_headers
+    )
+    assert response.json()["master"] is None
+    response = await async_client.get(
+        "/requests/999999", params={"include": "owner"}, headers=dispatcher_headers
+    )
+    assert response.status_code == 422
+    response = await async_client.get("/requests/999999", headers=dispatcher_headers)
+    assert response.status_code == 404
+
+    response = await async_client.get(
+        "/requests/history",
+        params={"ids": f"{first},{second},999999"},
+        headers=dispatcher_headers,
+    )
+    assert response.status_code == 200
+    histories = response.json()
+    assert [e["action"] for e in histories[str(first)]] == ["create", "assign"]
+    assert [e["action"] for e in histories[str(second)]] == ["create"]
+    assert histories["999999"] == []
+    # Same events, same shape as the per-request endpoints.
+    single = await async_client.get(
+        f"/requests/{first}/history", headers=dispatcher_headers
+    )
+    assert histories[str(first)] == single.json()
+    response = await async_client.get(
+        "/requests/history", params={"ids": "1,x"}, headers=dispatcher_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_list_and_history(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """Unchanged list/history answer 304 to If-None-Match; a change yields 200."""
+    (request_id,) = await _create_requests(async_client, 1)
+    response = await async_client.get(
+        "/requests", params={"status": "new"}, headers=dispatcher_headers
+    )
+    etag = response.headers["ETag"]
+    history = await async_client.get(
+        f"/requests/{request_id}/history", headers=dispatcher_headers
+    )
+    history_etag = history.headers["ETag"]
+
+    for path, params, tag in [
+        ("/requests", {"status": "new"}, etag),
+        (f"/requests/{request_id}/history", {}, history_etag),
+    ]:
+        response = await async_client.get(
+            path, params=params, headers={**dispatcher_headers, "If-None-Match": tag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == tag
+
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    await async_client.patch(
+        f"/requests/{request_id}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+    response = await async_client.get(
+        "/requests",
+        params={"status": "new"},
+        headers={**dispatcher_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    response = await async_client.get(
+        f"/requests/{request_id}/history",
+        headers={**dispatcher_headers, "If-None-Match": history_etag},
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_etag_changes_on_transition_within_the_same_second(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """Unfiltered list: a transition keeps the row count, the ETag still changes."""
+    first, _second = await _create_requests(async_client, 2)
+    response = await async_client.get("/requests", headers=dispatcher_headers)
+    etag = response.headers["ETag"]
+    mine = await async_client.get("/master/requests", headers=master_headers)
+    master_etag = mine.headers["ETag"]
+
+    # Well within SQLite's one-second CURRENT_TIMESTAMP resolution.
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    response = await async_client.patch(
+        f"/requests/{first}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+    assert response.status_code == 200
+    response = await async_client.get(
+        "/requests", headers={**dispatcher_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert {item["status"] for item in response.json()} == {"new", "assigned"}
+    mine = await async_client.get(
+        "/master/requests", headers={**master_headers, "If-None-Match": master_etag}
+    )
+    assert mine.status_code == 200
+    assert [item["id"] for item in mine.json()] == [first]
+
+
+@pytest.mark.asyncio
+async def test_transition_errors(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """Missing request -> 404, disallowed transition -> 400."""
+    response = await async_client.patch(
+        "/requests/999999/cancel", headers=dispatcher_headers
+    )
+    assert response.status_code == 404
+
+    (request_id,) = await _create_requests(async_client, 1)
+    response = await async_client.patch(
+        f"/requests/{request_id}/done", headers=master_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["code"] == "invalid_transition"
+
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=master_headers
+    )
+    assert response.status_code == 200
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=master_headers
+    )
+    assert response.status_code == 400
+
+
+# SQL statements per endpoint on the SQLite test database, auth served from
+# the principal cache. Postgres budgets are in PG_QUERY_BUDGETS.
+QUERY_BUDGETS = {
+    "create": 3,  # INSERT request, counters upsert, audit INSERT
+    "list": 2,  # ETag (counters versions), page
+    "assign": 4,  # status check, guarded UPDATE, counters, audit
+    "take": 4,
+    "done": 4,
+    "cancel": 4,
+    "claim_next": 3,  # UPDATE ... WHERE id = (oldest), counters, audit
+    "history": 3,  # ETag aggregate, request, events
+    "detail": 2,  # request joined with master, events
+    "history_batch": 1,
+    "stats": 1,
+}
+
+# The same on Postgres (test_transitions_and_claim_next_on_postgres): status
+# check, UPDATE and audit INSERT are one CTE, SKIP LOCKED pick + UPDATE too.
+PG_QUERY_BUDGETS = {
+    "list": 2,  # ETag (counters versions), page
+    "assign": 2,  # transition CTE, counters
+    "take": 2,
+    "done": 2,
+    "refused": 1,  # transition CTE only, nothing to count
+    "claim_next": 2,  # claim CTE, counters
+}
+
+
+@pytest.mark.asyncio
+async def test_query_budgets(
+    async_client: AsyncClient,
+    dispatcher_headers: dict,
+    master_headers: dict,
+    query_budget,
+):
+    """Each endpoint stays within its SQL statement budget (catches N+1s)."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    await async_client.get("/auth/me", headers=dispatcher_headers)
+    first, second, third = await _create_requests(async_client, 3)
+
+    body = {"clientName": "C", "clientPhone": "+7", "problemText": "P"}
+    with query_budget(QUERY_BUDGETS["create"]):
+        response = await async_client.post("/requests", json=body)
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["list"]):
+        response = await async_client.get(
+            "/requests?limit=2", headers=dispatcher_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["assign"]):
+        response = await async_client.patch(
+            f"/requests/{first}/assign",
+            json={"masterId": me["id"]},
+            headers=dispatcher_headers,
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["take"]):
+        response = await async_client.patch(
+            f"/requests/{first}/take", headers=master_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["done"]):
+        response = await async_client.patch(
+            f"/requests/{first}/done", headers=master_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["cancel"]):
+        response = await async_client.patch(
+            f"/requests/{second}/cancel", headers=dispatcher_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["claim_next"]):
+        response = await async_client.post(
+            "/master/requests/claim-next", headers=master_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["history"]):
+        response = await async_client.get(
+            f"/requests/{first}/history", headers=dispatcher_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["detail"]):
+        response = await async_client.get(
+            f"/requests/{first}?include=history,master", headers=dispatcher_headers
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["history_batch"]):
+        response = await async_client.get(
+            f"/requests/history?ids={first},{second},{third}",
+            headers=dispatcher_headers,
+        )
+    assert response.status_code == 200
+    with query_budget(QUERY_BUDGETS["stats"]):
+        response = await async_client.get("/requests/stats", headers=dispatcher_headers)
+    assert response.status_code == 200
+
+    with pytest.raises(AssertionError, match="budget 0"):
+        with query_budget(0):
+            await async_client.get("/requests/stats", headers=dispatcher_headers)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """/metrics exposes per-route latency, statements per request and transitions."""
+    route = {"method": "PATCH", "route": "/requests/{request_id}/take"}
+    takes_before = _sample("repair_request_transitions_total", action="take")
+    observed_before = _sample("http_request_duration_seconds_count", **route)
+
+    (request_id,) = await _create_requests(async_client, 1)
+    response = await async_client.patch(
+        f"/requests/{request_id}/take", headers=master_headers
+    )
+    assert response.status_code == 200
+    assert _sample("repair_request_transitions_total", action="take") == (
+        takes_before + 1
+    )
+    assert _sample("http_request_duration_seconds_count", **route) == (
+        observed_before + 1
+    )
+    assert _sample("db_statements_per_request_count", **route) == observed_before + 1
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert (
+        'http_requests_total{method="PATCH",route="/requests/{request_id}/take",'
+        'status="200"}' in body
+    )
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="PATCH",' in body
+    assert 'repair_request_transitions_total{action="take"}' in body
+    assert "db_statements_per_request_sum" in body
+    assert "event_loop_tasks " in body
+    # Statements of the take request were counted (transition + commit at least).
+    sums = [
+        line
+        for line in body.splitlines()
+        if line.startswith('db_statements_per_request_sum{method="PATCH"')
+    ]
+    assert sums and float(sums[0].rsplit(" ", 1)[1]) > 0
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_csv_gzip(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """GET /requests/export streams every request with its audit trail."""
+    first, second = await _create_requests(async_client, 2)
+    await async_client.patch(f"/requests/{first}/cancel", headers=dispatcher_headers)
+
+    response = await async_client.get(
+        "/requests/export", params={"format": "ndjson"}, headers=dispatcher_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in lines] == [first, second]
+    assert [e["action"] for e in lines[0]["history"]] == ["create", "cancel"]
+    assert lines[0]["status"] == "cancelled"
+
+    response = await async_client.get(
+        "/requests/export",
+        params={"format": "csv", "gzip": "true"},
+        headers=dispatcher_headers,
+    )
+    assert response.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert [(int(r["id"]), r["event_action"]) for r in rows] == [
+        (first, "create"),
+        (first, "cancel"),
+        (second, "create"),
+    ]
+
+    response = await async_client.get(
+        "/requests/export", params={"format": "xml"}, headers=dispatcher_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_request_stats_counters_and_rebuild(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict, test_db
+):
+    """Counters follow creates and transitions; rebuild repairs drift."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    first, second, _third = await _create_requests(async_client, 3)
+    await async_client.patch(
+        f"/requests/{first}/assign",
+        json={"masterId": me["id"]},
+        headers=dispatcher_headers,
+    )
+    await async_client.patch(f"/requests/{first}/take", headers=master_headers)
+    await async_client.patch(f"/requests/{second}/cancel", headers=dispatcher_headers)
+    # Rejected transition: counters stay as they are.
+    await async_client.patch(f"/requests/{second}/cancel", headers=dispatcher_headers)
+
+    response = await async_client.get("/requests/stats", headers=dispatcher_headers)
+    assert response.status_code == 200
+    expected = {
+        "total": 3,
+        "byStatus": {
+            "new": 1,
+            "assigned": 0,
+            "in_progress": 1,
+            "cancelled": 1,
+            "done": 0,
+        },
+        "byMaster": [
+            {
+                "masterId": me["id"],
+                "username": "master1",
+                "byStatus": {"in_progress": 1},
+            }
+        ],
+    }
+    assert response.json() == expected
+    response = await async_client.get("/requests/stats", headers=master_headers)
+    assert response.status_code == 403
+
+    async with test_db() as session:
+        await session.execute(text("UPDATE request_counters SET count = 7"))
+        drift = await CountersRepository(session).rebuild()
+        await session.commit()
+    assert (0, "new", 7, 1) in drift
+    response = await async_client.get("/requests/stats", headers=dispatcher_headers)
+    assert response.json() == expected
+
+
+@pytest.mark.asyncio
+async def test_change_feed_publishes_committed_changes(
+    async_client: AsyncClient, dispatcher_headers: dict, master_headers: dict
+):
+    """Create and assign reach stream subscribers; a rejected transition does not."""
+    me = (await async_client.get("/auth/me", headers=master_headers)).json()
+    async with get_broker().subscribe() as subscription:
+        (request_id,) = await _create_requests(async_client, 1)
+        await async_client.patch(
+            f"/requests/{request_id}/assign",
+            json={"masterId": me["id"]},
+            headers=dispatcher_headers,
+        )
+        response = await async_client.patch(
+            f"/requests/{request_id}/done", headers=master_headers
+        )
+        assert response.status_code == 400
+        events = []
+        while (message := await subscription.get(timeout=0.01)) is not None:
+            events.append(json.loads(message))
+    assert [
+        (e["type"], e["request"]["id"], e["request"]["status"]) for e in events
+    ] == [
+        ("created", request_id, "new"),
+        ("updated", request_id, "assigned"),
+    ]
+    assert events[1]["request"]["assignedToUsername"] == "master1"
+
+
+@pytest.mark.asyncio
+async def test_audit_archive_read_back(
+    async_client: AsyncClient, dispatcher_headers: dict, tmp_path, monkeypatch
+):
+    """Archived events are found through the block index and merged into history."""
+    (request_id,) = await _create_requests(async_client, 1)
+
+    async def rows(request_ids):
+        event_id = 0
+        for rid in request_ids:
+            for n in range(3):
+                event_id += 1
+                yield {
+                    "id": event_id,
+                    "request_id": rid,
+                    "action": "assign",
+                    "actor_id": None,
+                    "actor_username": f"old-{n}",
+                    "old_status": "new",
+                    "new_status": "assigned",
+                    "created_at": "2020-01-01T00:00:00",
+                }
+
+    archive = AuditArchive(str(tmp_path))
+    # Enough rows for several 64 KiB blocks; the request sits in the middle.
+    ids = list(range(request_id - 2000, request_id + 2000))
+    assert await archive.write("request_audit_events_p202001", rows(ids)) == 3 * 4000
+    data = (tmp_path / "request_audit_events_p202001.ndjson.gz").read_bytes()
+    assert len(gzip.decompress(data).splitlines()) == 3 * 4000
+    assert len(archive._blocks("request_audit_events_p202001")) > 2
+    assert [e["actor_username"] for e in archive.events_for(request_id)] == [
+        "old-0",
+        "old-1",
+        "old-2",
+    ]
+
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    response = await async_client.get(
+        f"/requests/{request_id}/history",
+        params={"archived": "true"},
+        headers=dispatcher_headers,
+    )
+    assert [e["action"] for e in response.json()] == [
+        "assign",
+        "assign",
+        "assign",
+        "create",
+    ]
+    response = await async_client.get(
+        f"/requests/{request_id}/history", headers=dispatcher_headers
+    )
+    assert [e["action"] for e in response.json()] == ["create"]
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_audit_retention_after_migration(pg_db, tmp_path, monkeypatch):
+    """Right after 0007, retention adds no partition overlapping the legacy one."""
+    monkeypatch.setattr(audit_retention, "async_session_factory", pg_db)
+    today = utc_today()
+    for _ in range(2):
+        await audit_retention.run_retention(12, str(tmp_path))
+
+    async with pg_db() as session:
+        partitions = dict(await AuditPartitions(session).list_partitions())
+    assert partition_name(month_start(today)) not in partitions
+    assert partitions["request_audit_events_legacy"].date() == month_start(today, 1)
+    for offset in range(1, settings.AUDIT_PARTITIONS_AHEAD + 1):
+        assert partition_name(month_start(today, offset)) in partitions
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_audit_partition_takes_rows_from_default(pg_db):
+    """Events that reached DEFAULT before their month existed move to it."""
+    month = month_start(utc_today(), settings.AUDIT_PARTITIONS_AHEAD + 3)
+    async with pg_db() as session:
+        request = RepairRequest(
+            client_name="C", client_phone="+7", description="P", status="new"
+        )
+        session.add(request)
+        await session.flush()
+        for day in (1, 2):
+            session.add(
+                RequestAuditEvent(
+                    request_id=request.id,
+                    action="create",
+                    created_at=datetime(
+                        month.year, month.month, day, tzinfo=timezone.utc
+                    ),
+                )
+            )
+        await session.commit()
+
+        partitions = AuditPartitions(session)
+        assert await partitions.ensure_months(month, 1) == [partition_name(month)]
+        await session.commit()
+        moved = await session.scalar(
+            text(f"SELECT count(*) FROM {partition_name(month)}")
+        )
+        left = await session.scalar(
+            text("SELECT count(*) FROM request_audit_events_default")
+        )
+        total = await session.scalar(
+            select(func.count()).select_from(RequestAuditEvent)
+        )
+    assert (moved, left, total) == (2, 0, 2)
+
+
+@pytest.mark.asyncio
+async def test_audit_background_writer(async_client: AsyncClient, test_db):
+    """With a running AuditWriter, create events are batched after commit."""
+    writer = AuditWriter(test_db, batch_size=100, flush_interval_ms=10_000)
+    await writer.start()
+    try:
+        await _create_requests(async_client, 3)
+    finally:
+        await writer.stop()
+    async with test_db() as session:
+        count = await session.scalar(
+            select(func.count()).select_from(RequestAuditEvent)
+        )
+    assert count == 3
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_invalidated_on_role_change(
+    async_client: AsyncClient, master_headers: dict, test_db
+):
+    """A cached principal is dropped when the user's role changes."""
+    response = await async_client.get("/requests", headers=master_headers)
+    assert response.status_code == 403
+
+    async with test_db() as session:
+        user = await session.scalar(select(User).where(User.username == "master1"))
+        user.role = "dispatcher"
+        await session.commit()
+
+    response = await async_client.get("/requests", headers=master_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_returns_503(async_client: AsyncClient, tmp_path):
+    """Pool exhaustion is counted and surfaces as 503 + Retry-After."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    session_factory = async_sessionmaker(engine)
+
+    async def exhausted_get_db():
+        async with session_factory() as session:
+            await session.execute(text("SELECT 1"))
+            yield session
+
+    before = checkout_stats.snapshot()
+    async with engine.connect() as held:
+        await held.execute(text("SELECT 1"))
+        app.dependency_overrides[get_db] = exhausted_get_db
+        try:
+            response = await async_client.post(
+                "/requests",
+                json={"clientName": "A", "clientPhone": "+7", "problemText": "x"},
+            )
+        finally:
+            app.dependency_overrides.pop(get_db)
+    await engine.dispose()
+    assert response.status_code == 503
+    assert response.json()["code"] == "db_unavailable"
+    assert response.headers["Retry-After"] == "1"
+    assert checkout_stats.snapshot()["timeouts"] == before["timeouts"] + 1
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_the_user_writes(
+    async_client: AsyncClient,
+    dispatcher_headers: dict,
+    master_headers: dict,
+    monkeypatch,
+):
+    """With a replica, list/history/masters read from it; a write pins to the primary."""
+    # A second, empty database stands in for a replica that lags behind.
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    app.dependency_overrides[get_replica_session_factory] = lambda: (
+        async_sessionmaker(engine, expire_on_commit=False)
+    )
+    try:
+        created = await async_client.post(
+            "/requests",
+            json={"clientName": "R", "clientPhone": "+7", "problemText": "Replica"},
+        )
+        request_id = created.json()["id"]
+        for path, headers in (
+            ("/requests", dispatcher_headers),
+            ("/users/masters", dispatcher_headers),
+            ("/master/requests", master_headers),
+        ):
+            response = await async_client.get(path, headers=headers)
+            assert response.status_code == 200, path
+            assert response.json() == [], path
+        history = await async_client.get(
+            f"/requests/{request_id}/history", headers=dispatcher_headers
+        )
+        assert history.status_code == 404
+
+        # The dispatcher's own write is visible to their next reads...
+        response = await async_client.patch(
+            f"/requests/{request_id}/cancel", headers=dispatcher_headers
+        )
+        assert response.status_code == 200
+        listed = await async_client.get("/requests", headers=dispatcher_headers)
+        assert [item["id"] for item in listed.json()] == [request_id]
+        history = await async_client.get(
+            f"/requests/{request_id}/history", headers=dispatcher_headers
+        )
+        assert history.status_code == 200
+        # ...but other users keep reading the replica.
+        mine = await async_client.get("/master/requests", headers=master_headers)
+        assert mine.json() == []
+
+        # Once the window is over the dispatcher is back on the replica.
+        monkeypatch.setattr(primary_pins, "window_seconds", 0.0)
+        primary_pins.clear()
+        listed = await async_client.get("/requests", headers=dispatcher_headers)
+        assert listed.json() == []
+    finally:
+        app.dependency_overrides.pop(get_replica_session_factory)
+        await engine.dispose()
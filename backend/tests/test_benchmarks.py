@@ -0,0 +1,60 @@
+"""Smoke tests: every benchmark script still runs against the current app.
+
+One tiny iteration each on the in-memory database; the numbers are not
+checked, only that the scripts keep up with signature changes.
+"""
+
+import os
+
+import pytest
+
+from app.core.ratelimit import intake_limiter
+from app.core.settings import settings
+from benchmarks import auth_cost, dataset, intake_limit, load, serialize_requests
+
+
+@pytest.fixture(autouse=True)
+def _restore_process_state(monkeypatch):
+    # The scripts own their process: they set DATABASE_URL, limits and flags.
+    monkeypatch.setenv("DATABASE_URL", os.environ["DATABASE_URL"])
+    monkeypatch.setattr(intake_limiter, "per_ip", intake_limiter.per_ip)
+    monkeypatch.setattr(intake_limiter, "per_phone", intake_limiter.per_phone)
+    monkeypatch.setattr(
+        settings, "AUTH_TRUST_TOKEN_CLAIMS", settings.AUTH_TRUST_TOKEN_CLAIMS
+    )
+
+
+@pytest.mark.asyncio
+async def test_auth_cost():
+    result = await auth_cost.run(2)
+    assert set(result) == {"no_cache_us", "trusted_claims_no_cache_us", "cache_hit_us"}
+
+
+@pytest.mark.asyncio
+async def test_intake_limit():
+    result = await intake_limit.run(2)
+    assert "post_rejected_us" in result
+
+
+@pytest.mark.asyncio
+async def test_serialize_requests():
+    result = await serialize_requests.run(rows=20, repeat=1)
+    assert result["before"]["body_bytes"] == result["after"]["body_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_load():
+    args = load.parse_args(
+        ["--requests", "4", "--concurrency", "2", "--masters", "2", "--logins", "2"]
+    )
+    result = await load.run(args)
+    assert set(result["scenarios"]) == set(load.SCENARIOS)
+
+
+@pytest.mark.asyncio
+async def test_dataset():
+    args = dataset.parse_args(
+        ["--requests", "20", "--batch", "10", "--masters", "2", "--days", "30"]
+    )
+    result = await dataset.run(args)
+    assert result["requests"] == 20
@@ -106,3 +106,65 @@ export const api = {
       body: body ? JSON.stringify(body) : undefined,
     }),
 };
+
+export interface StreamHandlers {
+  /** Called on every (re)connect, once the server has subscribed us. */
+  onOpen?: (reconnect: boolean) => void;
+  /** Called with the `data:` payload of each event. */
+  onMessage: (data: string) => void;
+}
+
+/**
+ * Server-Sent Events over fetch (EventSource cannot send the Bearer header).
+ * Reconnects with backoff until `signal` is aborted; stops on 401/403.
+ */
+export async function streamEvents(
+  path: string,
+  handlers: StreamHandlers,
+  signal: AbortSignal
+): Promise<void> {
+  const url = path.startsWith("http") ? path : `${BASE_URL}${path}`;
+  let delay = 1000;
+  let connected = false;
+  while (!signal.aborted) {
+    try {
+      const token = getToken();
+      const headers: Record<string, string> = { Accept: "text/event-stream" };
+      if (token) {
+        headers["Authorization"] = `Bearer ${token}`;
+      }
+      const res = await fetch(url, { headers, signal });
+      if (res.status === 401 || res.status === 403) return;
+      if (!res.ok || !res.body) throw new Error(`stream: HTTP ${res.status}`);
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = "";
+      let opened = false;
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let end: number;
+        while ((end = buffer.indexOf("\n\n")) >= 0) {
+          const frame = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          if (!opened) {
+            opened = true;
+            delay = 1000;
+            handlers.onOpen?.(connected);
+            connected = true;
+          }
+          const data = frame
+            .split("\n")
+            .filter((line) => line.startsWith("data:"))
+            .map((line) => line.slice(5).trimStart())
+            .join("\n");
+          if (data) handlers.onMessage(data);
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, delay));
+    delay = Math.min(delay * 2, 30000);
+  }
+}
@@ -16,10 +16,17 @@ export interface RequestRead {
   status: string;
   assignedTo: number | null;
   assignedToUsername: string | null;
+  /** First request this one repeats (flagged duplicate), else null. */
+  duplicateOf: number | null;
   createdAt: string;
   updatedAt: string;
 }
 
+/** Event of GET /requests/stream; "resync" means the list must be refetched. */
+export type RequestChange =
+  | { type: "created" | "updated"; request: RequestRead }
+  | { type: "resync" };
+
 export interface MasterOption {
   id: number;
   username: string;
@@ -1,10 +1,31 @@
-import React, { useState, useEffect } from "react";
-import { api } from "../api/client";
-import type { RequestRead, MasterOption, AuditEvent } from "../api/types";
+import React, { useState, useEffect, useRef } from "react";
+import { api, streamEvents } from "../api/client";
+import type { RequestRead, RequestChange, MasterOption, AuditEvent } from "../api/types";
 import { useCurrentUser } from "../hooks/useCurrentUser";
 import { ErrorBanner, parseErrorMessage } from "../components/ErrorBanner";
 
 const STATUS_OPTIONS = ["", "new", "assigned", "in_progress", "done", "cancelled"];
+// Upper bound of ids per GET /requests/history call (backend limit).
+const HISTORY_BATCH_SIZE = 100;
+
+/** Insert or replace row, keeping the server order (createdAt desc, id desc). */
+function upsertSorted(list: RequestRead[], row: RequestRead): RequestRead[] {
+  const rest = list.filter((r) => r.id !== row.id);
+  const created = Date.parse(row.createdAt);
+  const index = rest.findIndex((r) => {
+    const other = Date.parse(r.createdAt);
+    return other < created || (other === created && r.id < row.id);
+  });
+  if (index < 0) return [...rest, row];
+  return [...rest.slice(0, index), row, ...rest.slice(index)];
+}
+
+/** Apply a changed row to the list: filtered out rows disappear, others are upserted. */
+function applyChange(list: RequestRead[], row: RequestRead, statusFilter: string): RequestRead[] {
+  return statusFilter && row.status !== statusFilter
+    ? list.filter((r) => r.id !== row.id)
+    : upsertSorted(list, row);
+}
 
 export function DispatcherDashboard() {
   const { user } = useCurrentUser();
@@ -19,22 +40,67 @@ export function DispatcherDashboard() {
   const [historyOpen, setHistoryOpen] = useState<number | null>(null);
   const [historyByRequest, setHistoryByRequest] = useState<Record<number, AuditEvent[]>>({});
 
-  const fetchRequests = async () => {
-    setLoading(true);
+  // Rows changed while a list load is in flight: the loaded page may predate
+  // them, so they are applied again on top of it. null when nothing is loading.
+  const pendingRows = useRef<RequestRead[] | null>(null);
+  const loadSeq = useRef(0);
+
+  const loadRequests = async (showLoading: boolean) => {
+    const seq = ++loadSeq.current;
+    pendingRows.current = pendingRows.current ?? [];
+    if (showLoading) setLoading(true);
     setError(null);
     try {
       const params = statusFilter ? `?status=${encodeURIComponent(statusFilter)}` : "";
       const data = await api.get<RequestRead[]>(`/requests${params}`);
-      setRequests(data);
+      // A newer load supersedes this one.
+      if (seq !== loadSeq.current) return;
+      const replay = pendingRows.current ?? [];
+      setRequests(replay.reduce((list, row) => applyChange(list, row, statusFilter), data));
     } catch (err) {
-      setError(parseErrorMessage(err));
+      if (seq === loadSeq.current) setError(parseErrorMessage(err));
     } finally {
-      setLoading(false);
+      if (seq === loadSeq.current) {
+        pendingRows.current = null;
+        setLoading(false);
+      }
     }
   };
 
+  const fetchRequests = () => loadRequests(true);
+
+  const applyRow = (row: RequestRead) => {
+    pendingRows.current?.push(row);
+    setRequests((prev) => applyChange(prev, row, statusFilter));
+  };
+
   useEffect(() => {
+    const controller = new AbortController();
+    pendingRows.current = null;
+    streamEvents(
+      "/requests/stream",
+      {
+        // Subscribed: reload, so changes made before the subscription (or
+        // while disconnected) are not missed. Events arriving during the
+        // load are buffered in pendingRows and replayed over its result.
+        onOpen: () => {
+          loadRequests(false);
+        },
+        onMessage: (data) => {
+          const change = JSON.parse(data) as RequestChange;
+          if (change.type === "resync") {
+            loadRequests(false);
+          } else {
+            applyRow(change.request);
+          }
+        },
+      },
+      controller.signal
+    );
+    // Shows the list even when the stream cannot connect; superseded by the
+    // load in onOpen when it does.
     fetchRequests();
+    return () => controller.abort();
   }, [statusFilter]);
 
   useEffect(() => {
@@ -52,9 +118,11 @@ export function DispatcherDashboard() {
     setAssigning(id);
     setError(null);
     try {
-      await api.patch(`/requests/${id}/assign`, { masterId: idNum });
+      const row = await api.patch<RequestRead>(`/requests/${id}/assign`, {
+        masterId: idNum,
+      });
       setAssignForm((f) => ({ ...f, [id]: "" }));
-      await fetchRequests();
+      applyRow(row);
     } catch (err) {
       setError(parseErrorMessage(err));
     } finally {
@@ -66,8 +134,7 @@ export function DispatcherDashboard() {
     setCancelling(id);
     setError(null);
     try {
-      await api.patch(`/requests/${id}/cancel`);
-      await fetchRequests();
+      applyRow(await api.patch<RequestRead>(`/requests/${id}/cancel`));
     } catch (err) {
       setError(parseErrorMessage(err));
     } finally {
@@ -82,9 +149,18 @@ export function DispatcherDashboard() {
     }
     setHistoryOpen(id);
     if (historyByRequest[id] !== undefined) return;
+    // One batched call for this row and the other listed rows not loaded yet.
+    const ids = [
+      id,
+      ...requests
+        .map((r) => r.id)
+        .filter((other) => other !== id && historyByRequest[other] === undefined),
+    ].slice(0, HISTORY_BATCH_SIZE);
     try {
-      const data = await api.get<AuditEvent[]>(`/requests/${id}/history`);
-      setHistoryByRequest((prev) => ({ ...prev, [id]: data }));
+      const data = await api.get<Record<string, AuditEvent[]>>(
+        `/requests/history?ids=${ids.join(",")}`
+      );
+      setHistoryByRequest((prev) => ({ ...prev, ...data }));
     } catch {
       setHistoryByRequest((prev) => ({ ...prev, [id]: [] }));
     }
@@ -96,6 +172,7 @@ export function DispatcherDashboard() {
     cancel: "Отменена",
     take: "Взята в работу",
     done: "Выполнена",
+    repeat: "Повторная подача",
   };
 
   return (
@@ -148,6 +225,11 @@ export function DispatcherDashboard() {
                   <td>{r.problemText}</td>
                   <td>
                     <span className="badge">{r.status}</span>
+                    {r.duplicateOf !== null && (
+                      <span className="badge" title="Повторная заявка">
+                        дубль #{r.duplicateOf}
+                      </span>
+                    )}
                   </td>
                   <td>{r.assignedToUsername ?? r.assignedTo ?? "—"}</td>
                   <td>
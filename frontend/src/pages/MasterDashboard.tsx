@@ -10,6 +10,7 @@ const ACTION_LABELS: Record<string, string> = {
   cancel: "Отменена",
   take: "Взята в работу",
   done: "Выполнена",
+  repeat: "Повторная подача",
 };
 
 export function MasterDashboard() {
@@ -42,8 +43,27 @@ export function MasterDashboard() {
     setActing(id);
     setError(null);
     try {
-      await api.patch(`/requests/${id}/take`);
-      await fetchRequests();
+      const row = await api.patch<RequestRead>(`/requests/${id}/take`);
+      setRequests((prev) => prev.map((r) => (r.id === row.id ? row : r)));
+    } catch (err) {
+      setError(parseErrorMessage(err));
+    } finally {
+      setActing(null);
+    }
+  };
+
+  const handleClaimNext = async () => {
+    setActing(0);
+    setError(null);
+    try {
+      // 204 (empty queue) arrives as {}.
+      const row = await api.post<Partial<RequestRead>>("/master/requests/claim-next");
+      if (row.id === undefined) {
+        setError("Нет свободных заявок");
+        return;
+      }
+      const claimed = row as RequestRead;
+      setRequests((prev) => [claimed, ...prev.filter((r) => r.id !== claimed.id)]);
     } catch (err) {
       setError(parseErrorMessage(err));
     } finally {
@@ -55,8 +75,8 @@ export function MasterDashboard() {
     setActing(id);
     setError(null);
     try {
-      await api.patch(`/requests/${id}/done`);
-      await fetchRequests();
+      const row = await api.patch<RequestRead>(`/requests/${id}/done`);
+      setRequests((prev) => prev.map((r) => (r.id === row.id ? row : r)));
     } catch (err) {
       setError(parseErrorMessage(err));
     } finally {
@@ -83,6 +103,14 @@ export function MasterDashboard() {
     <div className="stack stack--lg">
       <h1>Мастер{user?.username ? ` — ${user.username}` : ""}</h1>
       <div className="row">
+        <button
+          type="button"
+          className="btn btn-primary"
+          disabled={acting !== null}
+          onClick={handleClaimNext}
+        >
+          {acting === 0 ? "…" : "Взять следующую"}
+        </button>
         <button type="button" className="btn btn-ghost" onClick={fetchRequests}>
           Обновить
         </button>